@@ -9,6 +9,7 @@ from app.core import security
 from app.core.config import settings
 from app.db.session import get_db
 from app.models.user import User
+from app.services.principal_cache import Principal, principal_cache
 
 # Define que o token deve ser enviado no header "Authorization: Bearer <token>"
 # e aponta para a rota de login para obter o token
@@ -20,9 +21,11 @@ reusable_oauth2 = OAuth2PasswordBearer(
 async def get_current_user(
         db: AsyncSession = Depends(get_db),
         token: str = Depends(reusable_oauth2)
-) -> User:
+) -> Principal:
     """
-    Decodifica o token JWT e busca o usuário no banco.
+    Decodifica o token JWT e resolve o usuário: cache (memória/Redis), claims do
+    token e, só se nenhum responder, o banco. Devolve um Principal (id, email,
+    role, school_id, tenant_id), não o model User ligado à sessão.
     """
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=["HS256"])
@@ -38,6 +41,10 @@ async def get_current_user(
             detail="Não foi possível validar as credenciais",
         )
 
+    principal = await principal_cache.get(int(user_id), payload)
+    if principal is not None:
+        return principal
+
     # Busca o usuário no banco de forma assíncrona
     result = await db.execute(select(User).filter(User.id == int(user_id)))
     user = result.scalars().first()
@@ -45,12 +52,14 @@ async def get_current_user(
     if not user:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
 
-    return user
+    principal = Principal.from_user(user)
+    await principal_cache.remember(principal)
+    return principal
 
 
 async def get_current_active_user(
-        current_user: User = Depends(get_current_user),
-) -> User:
+        current_user: Principal = Depends(get_current_user),
+) -> Principal:
     """
     Verifica se o usuário está ativo (opcional, se tiver campo is_active)
     """
@@ -0,0 +1,169 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Type
+
+from fastapi import HTTPException, Query, Response, status
+from pydantic import BaseModel, create_model
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import RelationshipProperty
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class PageParams:
+    """
+    Parâmetros comuns das listagens (Depends(PageParams)):
+
+      - cursor: id do último item da página anterior (vem no header X-Next-Cursor);
+        a página seguinte é "id > cursor ORDER BY id" (keyset), com custo constante
+        em qualquer profundidade, ao contrário do OFFSET
+      - limit: itens por página (até MAX_PAGE_SIZE; padrão DEFAULT_PAGE_SIZE)
+      - fields: colunas devolvidas, separadas por vírgula (ex.: "id,name"); id sempre vem
+      - expand: relacionamentos incluídos, separados por vírgula (ex.: "availabilities")
+      - skip: OFFSET antigo, mantido por compatibilidade; ignorado quando há cursor
+
+    Sem cursor e sem limit vale o limite padrão do endpoint (keyset_page(default_limit=)),
+    o mesmo de antes da paginação: 100 na maioria, nenhum onde a lista vinha inteira.
+    """
+
+    def __init__(
+            self,
+            cursor: Optional[int] = Query(None, ge=0, description="id do último item da página anterior"),
+            limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+            fields: Optional[str] = Query(None, description="Colunas separadas por vírgula"),
+            expand: Optional[str] = Query(None, description="Relacionamentos separados por vírgula"),
+            skip: int = Query(0, ge=0, deprecated=True),
+    ):
+        self.cursor = cursor
+        self.limit = limit
+        self.fields = fields
+        self.expand = expand
+        self.skip = skip
+
+
+def projection_model(schema: Type[BaseModel], **extra_fields: Any) -> Type[BaseModel]:
+    """
+    Versão de `schema` com todos os campos opcionais, para o response_model das
+    listagens com fields= (use com response_model_exclude_unset=True: campos não
+    pedidos ficam fora do JSON). extra_fields: relacionamentos de expand= que o
+    schema não declara, no formato do create_model (ex.: class_group=(Optional[X], None)).
+    """
+    fields = {name: (Optional[field.annotation], None) for name, field in schema.model_fields.items()}
+    fields.update(extra_fields)
+    return create_model(f"{schema.__name__}Projection", **fields)
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [v.strip() for v in (value or "").split(",") if v.strip()]
+
+
+def _resolve_fields(params: PageParams, default_fields: Sequence[str]) -> List[str]:
+    requested = _split(params.fields) or list(default_fields)
+    unknown = [f for f in requested if f not in default_fields]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Campos desconhecidos: {', '.join(unknown)}. Disponíveis: {', '.join(default_fields)}",
+        )
+    return ["id"] + [f for f in requested if f != "id"]
+
+
+def _resolve_expand(params: PageParams, expandable: Sequence[str]) -> List[str]:
+    requested = _split(params.expand)
+    unknown = [e for e in requested if e not in expandable]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Não é possível expandir: {', '.join(unknown)}. Disponíveis: {', '.join(expandable) or '-'}",
+        )
+    return requested
+
+
+async def _expand(db: AsyncSession, model, name: str, items: List[Dict[str, Any]]) -> None:
+    """
+    Carrega o relacionamento `name` da página inteira com uma consulta só
+    (IN nas chaves da página) e anexa em cada item: lista (um-para-muitos) ou objeto.
+    """
+    relationship: RelationshipProperty = getattr(model, name).property
+    local_column, remote_column = relationship.local_remote_pairs[0]
+    keys = {item[local_column.key] for item in items if item.get(local_column.key) is not None}
+
+    target = relationship.mapper
+    columns = [attr.columns[0] for attr in target.column_attrs]
+    related: Dict[Any, List[Dict[str, Any]]] = {}
+    if keys:
+        result = await db.execute(select(*columns).where(remote_column.in_(keys)).order_by(*target.primary_key))
+        for row in result.mappings():
+            related.setdefault(row[remote_column.key], []).append(dict(row))
+
+    for item in items:
+        values = related.get(item.get(local_column.key), [])
+        item[name] = values if relationship.uselist else (values[0] if values else None)
+
+
+async def keyset_page(
+        db: AsyncSession,
+        model,
+        where: Sequence[Any],
+        params: PageParams,
+        default_fields: Sequence[str],
+        expandable: Sequence[str] = (),
+        default_limit: Optional[int] = DEFAULT_PAGE_SIZE,
+) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """
+    Uma página de `model` filtrada por `where` (escola/dono), como dicionários só com as
+    colunas pedidas. Devolve (itens, próximo cursor ou None na última página).
+
+    default_limit: tamanho da página quando o cliente não manda limit; None = lista
+    inteira quando também não há cursor (endpoints que nunca tiveram limite).
+    """
+    fields = _resolve_fields(params, default_fields)
+    expand = _resolve_expand(params, expandable)
+
+    # Chaves locais dos relacionamentos (ex.: subject.teacher_id) entram na consulta mesmo fora de fields
+    hidden = []
+    for name in expand:
+        local_key = getattr(model, name).property.local_remote_pairs[0][0].key
+        if local_key not in fields:
+            hidden.append(local_key)
+
+    query = select(*[getattr(model, f) for f in fields + hidden]).where(*where).order_by(model.id)
+    if params.cursor is not None:
+        query = query.where(model.id > params.cursor)
+    elif params.skip:
+        query = query.offset(params.skip)
+
+    limit = params.limit
+    if limit is None:
+        limit = default_limit if default_limit is not None or params.cursor is None else DEFAULT_PAGE_SIZE
+    if limit is not None:
+        # Um item a mais diz se há próxima página sem um COUNT
+        query = query.limit(limit + 1)
+
+    result = await db.execute(query)
+    items = [dict(row) for row in result.mappings()]
+
+    next_cursor = None
+    if limit is not None and len(items) > limit:
+        items = items[:limit]
+        next_cursor = items[-1]["id"]
+
+    for name in expand:
+        await _expand(db, model, name, items)
+    for item in items:
+        for key in hidden:
+            item.pop(key, None)
+
+    return items, next_cursor
+
+
+def page_response(response: Response, items: List[Dict[str, Any]],
+                  next_cursor: Optional[int]) -> List[Dict[str, Any]]:
+    """
+    Põe o cursor da próxima página no header e devolve a lista (mesmo formato de
+    antes), que o FastAPI serializa pelo response_model do endpoint.
+    """
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = str(next_cursor)
+    return items
@@ -7,7 +7,8 @@ from app.api.v1.endpoints import (
     schedules,
     schools,
     subjects,
-    constraints
+    constraints,
+    imports
 )
 
 api_router = APIRouter()
@@ -20,4 +21,5 @@ api_router.include_router(classes.router, prefix="/classes", tags=["classes"])
 # --- 2. Adicione esta linha ---
 api_router.include_router(subjects.router, prefix="/subjects", tags=["subjects"])
 api_router.include_router(schedules.router, prefix="/schedules", tags=["schedules"])
-api_router.include_router(constraints.router, prefix="/constraints", tags=["constraints"])
\ No newline at end of file
+api_router.include_router(constraints.router, prefix="/constraints", tags=["constraints"])
+api_router.include_router(imports.router, prefix="/imports", tags=["imports"])
\ No newline at end of file
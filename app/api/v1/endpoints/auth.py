@@ -10,6 +10,8 @@ from app.models.user import User
 from app.schemas.token import Token
 from app.core import security
 from app.core.config import settings
+from app.core.exceptions import PasswordHasherSaturatedError
+from app.services.principal_cache import Principal, principal_cache
 
 router = APIRouter()
 
@@ -25,17 +27,39 @@ async def login_access_token(
     result = await db.execute(select(User).filter(User.email == form_data.username))
     user = result.scalars().first()
 
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    verified, new_hash = False, None
+    if user:
+        try:
+            verified, new_hash = await security.password_hasher.verify_and_update(
+                form_data.password, user.hashed_password
+            )
+        except PasswordHasherSaturatedError as e:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail=e.detail,
+                headers={"Retry-After": str(e.retry_after)},
+            )
+
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email ou senha incorretos",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Hash com custo antigo: regrava com o PASSWORD_BCRYPT_ROUNDS atual, sem o usuário perceber
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+
+    # Escola e papel vão no token: as próximas requisições não precisam buscar o usuário
+    principal = Principal.from_user(user)
+    await principal_cache.remember(principal)
+
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return {
         "access_token": security.create_access_token(
-            user.id, expires_delta=access_token_expires
+            user.id, expires_delta=access_token_expires, claims=principal.claims()
         ),
         "token_type": "bearer",
     }
@@ -1,10 +1,11 @@
 from typing import List, Any, Dict
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from pydantic import BaseModel
 
 from app.api.dependencies import get_db, get_current_user
+from app.api.pagination import PageParams, keyset_page, page_response, projection_model
 from app.models.user import User
 from app.models.constraint import Constraint
 from app.schemas.school_schemas import ConstraintSchema, ConstraintCreate
@@ -25,6 +26,7 @@ async def create_constraint(
     new_constraint = Constraint(
         type=constraint_in.type,
         data=constraint_in.data,
+        weight=constraint_in.weight,
         school_id=current_user.school_id
     )
     db.add(new_constraint)
@@ -33,14 +35,25 @@ async def create_constraint(
     return new_constraint
 
 
-@router.get("/", response_model=List[ConstraintSchema])
+CONSTRAINT_FIELDS = ("id", "type", "data", "weight", "school_id")
+ConstraintPage = projection_model(ConstraintSchema)
+
+
+@router.get("/", response_model=List[ConstraintPage], response_model_exclude_unset=True)
 async def read_constraints(
+        response: Response,
+        page: PageParams = Depends(),
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
-    query = select(Constraint).where(Constraint.school_id == current_user.school_id)
-    result = await db.execute(query)
-    return result.scalars().all()
+    items, next_cursor = await keyset_page(
+        db, Constraint,
+        where=[Constraint.school_id == current_user.school_id],
+        params=page,
+        default_fields=CONSTRAINT_FIELDS,
+        default_limit=None,  # Sempre devolveu todas as regras da escola
+    )
+    return page_response(response, items, next_cursor)
 
 
 @router.delete("/{id}", status_code=status.HTTP_204_NO_CONTENT)
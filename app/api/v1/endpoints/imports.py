@@ -0,0 +1,72 @@
+import csv
+import xml.etree.ElementTree as ET
+from typing import Optional
+
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile, status
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.dependencies import get_db, get_current_user
+from app.models.user import User
+from app.schemas.import_export import ImportResult
+from app.services.bulk_import import IMPORT_KINDS, BulkImporter
+from app.utils.xml_json import FORMATS, detect_format, iter_records
+
+router = APIRouter()
+
+
+@router.post("/{kind}", response_model=ImportResult)
+async def import_records(
+        kind: str,
+        file: UploadFile = File(...),
+        format: Optional[str] = Query(None, description="csv, json ou xml; padrão: pela extensão do arquivo"),
+        atomic: bool = Query(True, description="Qualquer linha com erro cancela a importação inteira"),
+        db: AsyncSession = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Importa professores (teachers), turmas (class_groups), matérias (subjects) ou
+    regras (constraints) da escola do usuário a partir de um arquivo CSV (com
+    cabeçalho), JSON (lista ou um objeto por linha) ou XML (um elemento por registro,
+    filhos da raiz).
+
+    O arquivo é lido em lotes, sem carregar tudo na memória, e gravado numa transação
+    só. Matérias referenciam professor e turma por teacher_code / class_group (nome)
+    ou por teacher_id / class_group_id; regras, pelas mesmas chaves dentro de data.
+    Importe professores e turmas antes.
+
+    Resposta: quantas linhas foram lidas e gravadas e os erros por linha. Com atomic
+    (padrão) e algum erro, nada é gravado e a resposta vem com 422.
+    """
+    if kind not in IMPORT_KINDS:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Tipo de importação desconhecido: {kind}. Disponíveis: {', '.join(IMPORT_KINDS)}",
+        )
+    if not current_user.school_id:
+        raise HTTPException(status_code=400, detail="Usuário sem escola vinculada")
+
+    fmt = (format or detect_format(file.filename)).lower()
+    if fmt not in FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Formato não reconhecido; use ?format= com um de: {', '.join(FORMATS)}",
+        )
+
+    importer = BulkImporter(db, current_user.school_id, kind, atomic=atomic)
+    try:
+        # file.file é o upload já em disco/memória (SpooledTemporaryFile), lido aos poucos
+        report = await importer.run(iter_records(file.file, fmt))
+    # DefusedXmlException (entidades/DTD no XML) é um ValueError
+    except (ValueError, ET.ParseError, csv.Error, UnicodeDecodeError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Arquivo inválido: {e}",
+        )
+    finally:
+        await file.close()
+
+    report["format"] = fmt
+    if atomic and report["failed"]:
+        return JSONResponse(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, content=report)
+    return report
@@ -1,86 +1,220 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Query, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from sqlalchemy.orm import selectinload
-from typing import Any, Dict
+from sqlalchemy.exc import IntegrityError
+from typing import Any, Dict, Optional
 from datetime import datetime
 
 from app.api.dependencies import get_db, get_current_user
+from app.db.session import BackgroundSessionLocal
 from app.models.user import User
-from app.models.schedule import Schedule
-from app.models.teacher import Teacher
-from app.models.class_group import ClassGroup
+from app.models.schedule import RUNNING_STATUSES, Schedule
+from app.models.school import School
 # Importe outros modelos necessários aqui (Subject, Constraint, etc) se for usar
 
-from app.schemas.school_schemas import ScheduleSchema
-from app.tasks.generate_schedule import task_generate_schedule
-from app.models.subject import Subject
+from app.schemas.school_schemas import ScheduleSchema, ScheduleGenerateRequest
+from app.services.schedule_generator import resolve_solver_params
+from app.tasks.generate_schedule import dispatch_generation, revoke_generation
+from app.core.config import settings
+from app.tasks.solver_executor import solver_executor
+from app.core.exceptions import SolverSaturatedError
+from app.services.progress import publish_progress, subscribe_progress
+from app.utils.helpers import get_lessons
+from app.services.cancellation import request_cancel
+from app.services.result_cache import compute_fingerprint, result_cache
+from app.services.solver_input import load_solver_input
+from app.services.grid_renderer import (
+    build_grid, etag_matches, get_completed_grid, grid_etag, load_name_maps, load_time_grid,
+)
+from app.services.lesson_index import load_lesson_tuples, query_lessons, schedule_result
+from app.services.schedule_diff import diff_lessons, expand_patch
+from app.services.conflict_detector import detect_conflicts
 router = APIRouter()
 
 
+
 @router.post("/generate", response_model=ScheduleSchema)
 async def generate_schedule(
         background_tasks: BackgroundTasks,
+        response: Response,
+        params: Optional[ScheduleGenerateRequest] = None,
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
-    # 1. Cria o registro de agendamento (status: processing)
-    schedule_attempt = Schedule(
-        status="processing",
-        generated_at=datetime.utcnow(),
-        school_id=current_user.school_id
+    """
+    Enfileira a geração da grade da escola.
+    O corpo é opcional e permite ajustar a busca do solver (perfil, workers, semente...).
+    Gerações ainda em andamento da mesma escola são canceladas (a nova as substitui).
+    Se a entrada (dados + parâmetros) for idêntica a uma geração concluída ou em
+    andamento, devolve essa geração sem rodar o solver (header X-Schedule-Cache).
+    """
+    params = params or ScheduleGenerateRequest()
+    try:
+        solver_params = resolve_solver_params(params.solver.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    school_id = current_user.school_id
+
+    # 1. Coleta os dados e calcula o fingerprint da entrada do solver
+    school_data = await _collect_school_data(db, school_id, params)
+
+    # Conflitos óbvios (carga maior que os horários livres) nem chegam ao solver
+    if settings.CONFLICT_PRECHECK:
+        conflicts = detect_conflicts(school_data)
+        if conflicts:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail={"message": "Impossível gerar grade. Há regras que não cabem na semana.",
+                        "conflicts": conflicts},
+            )
+
+    fingerprint = compute_fingerprint(school_data, solver_params)
+
+    async with result_cache.lock(fingerprint):
+        # 2. Mesma entrada já resolvida (ou sendo resolvida): devolve sem ocupar o solver
+        existing = await _find_same_input(db, school_id, fingerprint)
+        if existing is not None:
+            response.headers["X-Schedule-Cache"] = "hit" if existing.status == "completed" else "coalesced"
+            return await _schedule_response(db, existing)
+
+        # 3. Cancela as gerações em andamento desta escola: só a mais recente importa
+        await _supersede_running(db, school_id)
+
+        # 4. Cria o registro de agendamento
+        schedule_attempt = Schedule(
+            status="queued",
+            generated_at=datetime.utcnow(),
+            school_id=school_id,
+            input_fingerprint=fingerprint
+        )
+        db.add(schedule_attempt)
+        try:
+            await db.flush()
+        except IntegrityError:
+            # Outro processo da API criou a mesma geração agora (ux_schedule_running_fingerprint):
+            # o lock acima só vale neste processo; junta-se à geração dele
+            await db.rollback()
+            existing = await _find_same_input(db, school_id, fingerprint)
+            if existing is None:
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Geração com a mesma entrada em andamento; tente novamente.",
+                )
+            response.headers["X-Schedule-Cache"] = "coalesced"
+            return await _schedule_response(db, existing)
+
+        # 5. Reserva uma vaga no executor do solver (429 se estiver saturado).
+        # No Celery a fila é do broker; o status vira "processing" quando um worker pegar a task.
+        use_local_executor = settings.SOLVER_RUN_BACKEND != "celery"
+        if use_local_executor:
+            try:
+                starts_now = solver_executor.reserve(school_id, schedule_attempt.id)
+            except SolverSaturatedError as e:
+                await db.rollback()
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail=e.detail,
+                    headers={"Retry-After": str(e.retry_after)},
+                )
+            schedule_attempt.status = "processing" if starts_now else "queued"
+
+        await db.commit()
+        await db.refresh(schedule_attempt)
+
+    try:
+        # 6. Enfileira a geração (Background Task local ou Celery)
+        dispatch_generation(
+            background_tasks,
+            schedule_id=schedule_attempt.id,
+            school_data=school_data,
+            school_id=school_id,
+            solver_params=solver_params
+        )
+    except Exception:
+        # Nada foi agendado: devolve a vaga e não deixa o registro preso em "queued"
+        if use_local_executor:
+            solver_executor.release(school_id, schedule_attempt.id)
+        schedule_attempt.status = "error"
+        await db.commit()
+        raise
+
+    response.headers["X-Schedule-Cache"] = "miss"
+    return schedule_attempt
+
+
+async def _find_same_input(db: AsyncSession, school_id: int, fingerprint: str) -> Optional[Schedule]:
+    """
+    Procura um agendamento da escola com a mesma entrada: concluído (resultado
+    reaproveitado) ou em andamento (a requisição se junta a ele).
+    """
+    cached_id = result_cache.get(school_id, fingerprint)
+    if cached_id is not None:
+        result = await db.execute(select(Schedule).where(
+            Schedule.id == cached_id,
+            Schedule.school_id == school_id,
+            Schedule.status == "completed"
+        ))
+        cached = result.scalar_one_or_none()
+        if cached is not None:
+            return cached
+        result_cache.forget(school_id, fingerprint)
+
+    query = (
+        select(Schedule)
+        .where(
+            Schedule.school_id == school_id,
+            Schedule.input_fingerprint == fingerprint,
+            Schedule.status.in_(("completed",) + RUNNING_STATUSES)
+        )
+        .order_by(Schedule.id.desc())
+        .limit(1)
     )
+    result = await db.execute(query)
+    existing = result.scalar_one_or_none()
+
+    if existing is not None and existing.status == "completed":
+        result_cache.remember(school_id, fingerprint, existing.id)
+    return existing
+
+
+async def _collect_school_data(db: AsyncSession, school_id: int, params: ScheduleGenerateRequest) -> Dict[str, Any]:
+    """Coleta os dados da escola no formato do solver (uma ida ao banco, ver solver_input)."""
+    incremental = params.incremental or params.minimize_changes
+    school_data = await load_solver_input(db, school_id, include_previous=incremental)
+
+    # --- REGENERAÇÃO INCREMENTAL (parte da última grade concluída) ---
+    if incremental:
+        school_data["minimize_changes"] = params.minimize_changes
 
-    db.add(schedule_attempt)
+    return school_data
+
+
+async def _cancel_schedule(db: AsyncSession, schedule: Schedule) -> None:
+    """Marca como cancelado e sinaliza o solver (thread, processo ou Celery) para parar."""
+    schedule.status = "cancelled"
     await db.commit()
-    await db.refresh(schedule_attempt)
-
-    # 2. Coleta os dados (Serializando para dicionários)
-
-    # --- PROFESSORES ---
-    query_teachers = select(Teacher).where(Teacher.school_id == current_user.school_id)
-    t_result = await db.execute(query_teachers)
-    # Dica: Se precisar das disponibilidades, lembre do selectinload ou carregue aqui
-    teachers_data = [{"id": t.id, "name": t.name} for t in t_result.scalars().all()]
-
-    # --- TURMAS ---
-    query_classes = select(ClassGroup).where(ClassGroup.school_id == current_user.school_id)
-    c_result = await db.execute(query_classes)
-    classes_data = [{"id": c.id, "name": c.name, "grade": c.grade} for c in c_result.scalars().all()]
-    constraints_data = [{"type": c.type, "data": c.data} for c in const_result.scalars().all()]
-
-    # --- DISCIPLINAS (NOVO) ---
-    query_subjects = select(Subject).where(Subject.school_id == current_user.school_id)
-    s_result = await db.execute(query_subjects)
-    subjects_data = [
-        {
-            "id": s.id,
-            "name": s.name,
-            "teacher_id": s.teacher_id,  # Quem dá aula?
-            "class_group_id": s.class_group_id,  # Para qual turma?
-            "weekly_lessons": s.weekly_lessons,  # Quantas aulas?
-            "max_daily_lessons": s.max_daily_lessons,
-            "allow_consecutive": s.allow_consecutive
-        }
-        for s in s_result.scalars().all()
-    ]
-
-    # Monta o pacote de dados
-    school_data = {
-        "teachers": teachers_data,
-        "class_groups": classes_data,
-        "subjects": subjects_data,
-        "constraints": constraints_data
-    }
 
-    # 3. Chama a Background Task
-    background_tasks.add_task(
-        task_generate_schedule,
-        schedule_id=schedule_attempt.id,
-        school_data=school_data
+    request_cancel(schedule.id)
+    solver_executor.discard(schedule.school_id, schedule.id)
+    if settings.SOLVER_RUN_BACKEND == "celery":
+        revoke_generation(schedule.id)
+    publish_progress(schedule.id, {"type": "done", "schedule_id": schedule.id, "status": "cancelled"})
+
+
+async def _supersede_running(db: AsyncSession, school_id: int) -> None:
+    query = select(Schedule).where(
+        Schedule.school_id == school_id,
+        Schedule.status.in_(RUNNING_STATUSES)
     )
+    result = await db.execute(query)
+    for running in result.scalars().all():
+        print(f"--> [API] Geração {running.id} substituída por uma nova.")
+        await _cancel_schedule(db, running)
 
-    return schedule_attempt
 
 @router.get("/{schedule_id}", response_model=ScheduleSchema)
 async def read_schedule(
@@ -102,85 +236,267 @@ async def read_schedule(
     if not schedule:
         raise HTTPException(status_code=404, detail="Schedule not found")
 
+    return await _schedule_response(db, schedule)
+
+
+async def _schedule_response(db: AsyncSession, schedule: Schedule) -> ScheduleSchema:
+    # As aulas de grades concluídas moram na schedule_lesson: o JSON é montado aqui
+    data = ScheduleSchema.model_validate(schedule)
+    data.result_data = await schedule_result(db, schedule)
+    return data
+
+
+@router.post("/{schedule_id}/cancel", response_model=ScheduleSchema)
+async def cancel_schedule(
+        schedule_id: int,
+        db: AsyncSession = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Cancela uma geração na fila ou em andamento, liberando a vaga do solver.
+    """
+    query = select(Schedule).where(
+        Schedule.id == schedule_id,
+        Schedule.school_id == current_user.school_id
+    )
+    result = await db.execute(query)
+    schedule = result.scalar_one_or_none()
+
+    if not schedule:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    if schedule.status not in RUNNING_STATUSES:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"A geração não está em andamento (status: {schedule.status})",
+        )
+
+    await _cancel_schedule(db, schedule)
+    await db.refresh(schedule)
     return schedule
 
 
+async def _current_status(schedule_id: int) -> Optional[str]:
+    # Sessão própria (pool de fundo): a do request não deve ficar presa durante todo o streaming
+    async with BackgroundSessionLocal() as session:
+        result = await session.execute(select(Schedule.status).where(Schedule.id == schedule_id))
+        return result.scalar_one_or_none()
+
+
+@router.get("/{schedule_id}/events")
+async def stream_schedule_events(
+        schedule_id: int,
+        db: AsyncSession = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Server-Sent Events com o progresso da geração: cada solução melhor encontrada
+    (objetivo, limitante, tempo decorrido e, periodicamente, as aulas) e um evento
+    final "done" com o status. A melhor solução parcial também fica em result_data.
+    """
+    query = select(Schedule.status).where(
+        Schedule.id == schedule_id,
+        Schedule.school_id == current_user.school_id
+    )
+    result = await db.execute(query)
+    current_status = result.scalar_one_or_none()
+
+    if current_status is None:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+
+    def format_event(event: Dict[str, Any]) -> str:
+        return f"event: {event['type']}\ndata: {json.dumps(event)}\n\n"
+
+    async def event_stream():
+        if current_status not in RUNNING_STATUSES:
+            yield format_event({"type": "done", "schedule_id": schedule_id, "status": current_status})
+            return
+
+        async for event in subscribe_progress(schedule_id):
+            if event["type"] == "keepalive":
+                # Pode ter terminado antes da inscrição: confere no banco
+                latest = await _current_status(schedule_id)
+                if latest not in RUNNING_STATUSES:
+                    yield format_event({"type": "done", "schedule_id": schedule_id, "status": latest})
+                    return
+                yield ": keepalive\n\n"
+                continue
+
+            yield format_event(event)
+            if event["type"] == "done":
+                return
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/{schedule_id}/grid", response_model=Dict[str, Any])
 async def get_schedule_grid(
         schedule_id: int,
+        request: Request,
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
     """
     Retorna a grade formatada visualmente (Turma -> Dias da Semana -> Horários).
     Traduz os IDs para Nomes reais.
+
+    Grades concluídas são materializadas na conclusão e servidas do cache com ETag:
+    If-None-Match com o ETag atual devolve 304. O ETag muda quando algum nome
+    de professor, matéria ou turma da escola muda (School.catalog_version).
     """
-    # 1. Busca o Agendamento
-    query = select(Schedule).where(
-        Schedule.id == schedule_id,
-        Schedule.school_id == current_user.school_id
+    # 1. Busca só os metadados do agendamento (sem o JSON da grade)
+    query = (
+        select(
+            Schedule.status,
+            Schedule.grid_catalog_version,
+            Schedule.result_data.is_(None).label("empty"),
+            School.catalog_version,
+        )
+        .join(School, School.id == Schedule.school_id)
+        .where(
+            Schedule.id == schedule_id,
+            Schedule.school_id == current_user.school_id
+        )
     )
     result = await db.execute(query)
-    schedule = result.scalar_one_or_none()
+    meta = result.one_or_none()
+
+    if not meta or meta.empty:
+        raise HTTPException(status_code=404, detail="Schedule not found or empty")
+
+    # 2. Grade concluída: imutável enquanto os nomes não mudarem -> cacheável
+    if meta.status == "completed":
+        catalog_version = meta.catalog_version or 0
+        etag = grid_etag(schedule_id, catalog_version)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
 
-    if not schedule or not schedule.result_data:
+        if etag_matches(request.headers.get("if-none-match", ""), etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+        grid = await get_completed_grid(db, schedule_id, catalog_version, meta.grid_catalog_version)
+        return JSONResponse(
+            content={"schedule_id": schedule_id, "status": meta.status, "grid": grid},
+            headers=headers,
+        )
+
+    # 3. Em andamento (solução parcial): monta na hora, sem cache
+    res = await db.execute(select(Schedule.result_data).where(Schedule.id == schedule_id))
+    result_data = res.scalar_one()
+    if not result_data:
         raise HTTPException(status_code=404, detail="Schedule not found or empty")
 
-    # 2. Busca os Nomes (Metadados) para traduzir os IDs
-    # Isso evita que o frontend tenha que fazer 50 requisições
-
-    # Professores
-    t_res = await db.execute(select(Teacher.id, Teacher.name).where(Teacher.school_id == current_user.school_id))
-    teachers_map = {t.id: t.name for t in t_res.all()}
-
-    # Matérias
-    s_res = await db.execute(select(Subject.id, Subject.name).where(Subject.school_id == current_user.school_id))
-    subjects_map = {s.id: s.name for s in s_res.all()}
-
-    # Turmas
-    c_res = await db.execute(
-        select(ClassGroup.id, ClassGroup.name).where(ClassGroup.school_id == current_user.school_id))
-    classes_map = {c.id: c.name for c in c_res.all()}
-
-    # 3. Monta a Grade
-    # Estrutura: { "Nome da Turma": { "Segunda": [Aula1, Aula2...], "Terça": ... } }
-
-    grid = {}
-    days_map = {0: "Segunda", 1: "Terça", 2: "Quarta", 3: "Quinta", 4: "Sexta", 5: "Sábado"}
-
-    # Inicializa a estrutura vazia para todas as turmas que estão na solução
-    for item in schedule.result_data:
-        c_id = item['class_group_id']
-        c_name = classes_map.get(c_id, f"Turma {c_id}")
-
-        if c_name not in grid:
-            grid[c_name] = {}
-            for d in range(5):  # 0 a 4 (Seg a Sex)
-                day_name = days_map[d]
-                grid[c_name][day_name] = [None] * 5  # 5 horários vazios
-
-    # Preenche os horários
-    for item in schedule.result_data:
-        c_id = item['class_group_id']
-        t_id = item['teacher_id']
-        s_id = item['subject_id']
-        day = item['day_of_week']  # 0 a 4
-        period = item['period']  # 0 a 4
-
-        c_name = classes_map.get(c_id, f"Turma {c_id}")
-        t_name = teachers_map.get(t_id, f"Prof. {t_id}")
-        s_name = subjects_map.get(s_id, f"Matéria {s_id}")
-        day_name = days_map.get(day, f"Dia {day}")
-
-        # Proteção contra índices fora do limite (caso mude regra de slots)
-        if 0 <= period < 5:
-            grid[c_name][day_name][period] = {
-                "materia": s_name,
-                "professor": t_name
-            }
+    names = await load_name_maps(db, current_user.school_id)
+    grid = build_grid(get_lessons(result_data), names, await load_time_grid(db, current_user.school_id))
 
     return {
         "schedule_id": schedule_id,
-        "status": schedule.status,
+        "status": meta.status,
         "grid": grid
-    }
\ No newline at end of file
+    }
+
+
+async def _indexed_schedule(db: AsyncSession, schedule_id: int, school_id: int) -> None:
+    """Confere se a grade é da escola e está concluída (as aulas estão na schedule_lesson)."""
+    query = select(Schedule.status).where(
+        Schedule.id == schedule_id,
+        Schedule.school_id == school_id
+    )
+    result = await db.execute(query)
+    current_status = result.scalar_one_or_none()
+
+    if current_status is None:
+        raise HTTPException(status_code=404, detail="Schedule not found")
+    if current_status != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"A grade ainda não foi concluída (status: {current_status})",
+        )
+
+    await ensure_indexed(db, schedule_id)
+
+
+@router.get("/{schedule_id}/teachers/{teacher_id}", response_model=Dict[str, Any])
+async def get_teacher_timetable(
+        schedule_id: int,
+        teacher_id: int,
+        db: AsyncSession = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Semana de um professor: só as aulas dele, ordenadas por dia e horário.
+    """
+    await _indexed_schedule(db, schedule_id, current_user.school_id)
+    lessons = await query_lessons(db, schedule_id, teacher_id=teacher_id)
+    return {"schedule_id": schedule_id, "teacher_id": teacher_id, "lessons": lessons}
+
+
+@router.get("/{schedule_id}/class-groups/{class_group_id}", response_model=Dict[str, Any])
+async def get_class_group_timetable(
+        schedule_id: int,
+        class_group_id: int,
+        db: AsyncSession = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Semana de uma turma: só as aulas dela, ordenadas por dia e horário.
+    """
+    await _indexed_schedule(db, schedule_id, current_user.school_id)
+    lessons = await query_lessons(db, schedule_id, class_group_id=class_group_id)
+    return {"schedule_id": schedule_id, "class_group_id": class_group_id, "lessons": lessons}
+
+
+@router.get("/{schedule_id}/now", response_model=Dict[str, Any])
+async def get_lessons_now(
+        schedule_id: int,
+        day: int = Query(..., ge=0, le=6, description="Dia da semana (0 = Segunda)"),
+        period: Optional[int] = Query(None, ge=0, description="Horário (0 = primeira aula); vazio = dia todo"),
+        db: AsyncSession = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+):
+    """
+    Quem está dando aula em um dia (e, opcionalmente, em um horário específico).
+    """
+    await _indexed_schedule(db, schedule_id, current_user.school_id)
+    lessons = await query_lessons(db, schedule_id, day=day, period=period)
+    return {"schedule_id": schedule_id, "day": day, "period": period, "lessons": lessons}
+
+
+@router.get("/{schedule_id}/diff/{other_id}", response_model=Dict[str, Any])
+async def diff_schedules(
+        schedule_id: int,
+        other_id: int,
+        format: str = Query("full", pattern="^(full|patch)$", description="full = aulas completas; patch = compacto"),
+        db: AsyncSession = Depends(get_db),
+        current_user: User = Depends(get_current_user)
+):
+    """
+    O que mudou de uma grade (schedule_id) para outra (other_id): aulas
+    adicionadas, removidas e movidas de horário, calculado no servidor.
+
+    format=patch devolve listas de inteiros ([g, t, s, d, h] e, nas movidas,
+    [g, t, s, d_antigo, h_antigo, d_novo, h_novo]) para sincronização incremental.
+    """
+    for sid in (schedule_id, other_id):
+        await _indexed_schedule(db, sid, current_user.school_id)
+
+    patch = diff_lessons(
+        await load_lesson_tuples(db, schedule_id),
+        await load_lesson_tuples(db, other_id),
+    )
+    summary = {
+        "added": len(patch["added"]),
+        "removed": len(patch["removed"]),
+        "moved": len(patch["moved"]),
+        "unchanged": patch["unchanged"],
+    }
+
+    return {
+        "from": schedule_id,
+        "to": other_id,
+        "format": format,
+        "summary": summary,
+        "changes": patch if format == "patch" else expand_patch(patch),
+    }
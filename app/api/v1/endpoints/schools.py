@@ -1,11 +1,13 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
+from sqlalchemy import update
 
 from app.api import dependencies as deps
+from app.api.pagination import PageParams, keyset_page, page_response, projection_model
 from app.models.school import School
-from app.schemas.school_schemas import SchoolCreate, SchoolRead
+from app.schemas.school_schemas import SchoolCreate, SchoolRead, TimeGridSchema
 
 router = APIRouter()
 
@@ -25,14 +27,60 @@ async def create_school(
     await db.refresh(school)
     return school
 
-@router.get("/", response_model=List[SchoolRead])
+SCHOOL_FIELDS = ("id", "name", "address", "created_at")
+SchoolPage = projection_model(SchoolRead)
+
+
+@router.get("/", response_model=List[SchoolPage], response_model_exclude_unset=True)
 async def read_schools(
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    page: PageParams = Depends(),
     db: AsyncSession = Depends(deps.get_db),
     current_user = Depends(deps.get_current_active_user)
 ):
+    items, next_cursor = await keyset_page(
+        db, School,
+        where=[School.owner_id == current_user.id],
+        params=page,
+        default_fields=SCHOOL_FIELDS,
+    )
+    return page_response(response, items, next_cursor)
+
+async def _get_owned_school(db: AsyncSession, school_id: int, current_user) -> School:
     result = await db.execute(
-        select(School).filter(School.owner_id == current_user.id).offset(skip).limit(limit)
+        select(School).filter(School.id == school_id, School.owner_id == current_user.id)
     )
-    return result.scalars().all()
\ No newline at end of file
+    school = result.scalar_one_or_none()
+    if not school:
+        raise HTTPException(status_code=404, detail="School not found")
+    return school
+
+@router.get("/{school_id}/time-grid", response_model=TimeGridSchema)
+async def read_time_grid(
+    school_id: int,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user = Depends(deps.get_current_active_user)
+):
+    """Forma da semana da escola (dias, aulas por dia, intervalos e turnos)."""
+    school = await _get_owned_school(db, school_id, current_user)
+    return TimeGridSchema(**(school.time_grid or {}))
+
+@router.put("/{school_id}/time-grid", response_model=TimeGridSchema)
+async def update_time_grid(
+    school_id: int,
+    time_grid: TimeGridSchema,
+    db: AsyncSession = Depends(deps.get_db),
+    current_user = Depends(deps.get_current_active_user)
+):
+    """
+    Define a forma da semana usada pelo solver e pela grade visual.
+    As grades já materializadas são remontadas no formato novo (catalog_version).
+    """
+    await _get_owned_school(db, school_id, current_user)
+    await db.execute(
+        update(School)
+        .where(School.id == school_id)
+        .values(time_grid=time_grid.model_dump(), catalog_version=School.catalog_version + 1)
+    )
+    await db.commit()
+    return time_grid
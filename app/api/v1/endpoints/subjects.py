@@ -1,12 +1,13 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.api.dependencies import get_db, get_current_user
+from app.api.pagination import PageParams, keyset_page, page_response, projection_model
 from app.models.user import User
 from app.models.subject import Subject
-from app.schemas.school_schemas import SubjectCreate, SubjectSchema
+from app.schemas.school_schemas import ClassGroupSchema, SubjectCreate, SubjectSchema
 
 router = APIRouter()
 
@@ -37,19 +38,32 @@ async def create_subject(
     return new_subject
 
 
-@router.get("/", response_model=List[SubjectSchema])
+SUBJECT_FIELDS = (
+    "id", "name", "weekly_lessons", "max_daily_lessons", "allow_consecutive",
+    "teacher_id", "class_group_id", "school_id",
+)
+# expand=class_group traz a turma de cada matéria
+SubjectPage = projection_model(SubjectSchema, class_group=(Optional[ClassGroupSchema], None))
+
+
+@router.get("/", response_model=List[SubjectPage], response_model_exclude_unset=True)
 async def read_subjects(
-        skip: int = 0,
-        limit: int = 100,
+        response: Response,
+        page: PageParams = Depends(),
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
     """
-    Lista todas as disciplinas da escola.
+    Lista as disciplinas da escola, paginadas por cursor (header X-Next-Cursor).
     """
-    query = select(Subject).where(Subject.school_id == current_user.school_id).offset(skip).limit(limit)
-    result = await db.execute(query)
-    return result.scalars().all()
+    items, next_cursor = await keyset_page(
+        db, Subject,
+        where=[Subject.school_id == current_user.school_id],
+        params=page,
+        default_fields=SUBJECT_FIELDS,
+        expandable=("class_group",),
+    )
+    return page_response(response, items, next_cursor)
 
 
 @router.delete("/{subject_id}", status_code=status.HTTP_204_NO_CONTENT)
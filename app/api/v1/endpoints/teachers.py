@@ -1,11 +1,12 @@
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, selectinload
 from app.api import dependencies
 from app.api.dependencies import get_current_user
+from app.api.pagination import PageParams, keyset_page, page_response, projection_model
 from app.db.session import get_db
 from app.models import User
 from app.models.teacher import Teacher
@@ -47,26 +48,26 @@ async def create_teacher(
     return teacher_loaded
 
 
-@router.get("/", response_model=List[TeacherSchema])
+TEACHER_FIELDS = ("id", "name", "email", "code", "importance", "school_id")
+TeacherPage = projection_model(TeacherSchema)
+
+
+@router.get("/", response_model=List[TeacherPage], response_model_exclude_unset=True)
 async def read_teachers(
-        skip: int = 0,
-        limit: int = 100,
+        response: Response,
+        page: PageParams = Depends(),
         db: AsyncSession = Depends(get_db),
         current_user: User = Depends(get_current_user)
 ):
-    # 1. Defina a query usando 'select' (não db.query)
-    # 2. Filtre por school_id (não owner_id)
-    # 3. Use selectinload para evitar erro de "MissingGreenlet" nas disponibilidades
-    query = (
-        select(Teacher)
-        .where(Teacher.school_id == current_user.school_id)  # Filtra pela escola do usuário logado
-        .options(selectinload(Teacher.availabilities))  # Carrega os relacionamentos
-        .offset(skip)
-        .limit(limit)
+    """
+    Professores da escola do usuário, paginados por cursor (header X-Next-Cursor).
+    As disponibilidades só vêm com expand=availabilities (uma consulta a mais por página).
+    """
+    items, next_cursor = await keyset_page(
+        db, Teacher,
+        where=[Teacher.school_id == current_user.school_id],  # Filtra pela escola do usuário logado
+        params=page,
+        default_fields=TEACHER_FIELDS,
+        expandable=("availabilities",),
     )
-
-    # 4. Execute a query de forma assíncrona
-    result = await db.execute(query)
-
-    # 5. Retorne os escalares (os objetos Teacher)
-    return result.scalars().all()
\ No newline at end of file
+    return page_response(response, items, next_cursor)
\ No newline at end of file
@@ -7,6 +7,7 @@ from app.db.session import get_db
 from app.models.user import User
 from app.schemas.user import UserCreate, User as UserSchema
 from app.core import security
+from app.core.exceptions import PasswordHasherSaturatedError
 
 router = APIRouter()
 
@@ -28,9 +29,18 @@ async def create_user(
             detail="O usuário com este email já existe no sistema.",
         )
 
+    try:
+        hashed_password = await security.password_hasher.hash(user_in.password)
+    except PasswordHasherSaturatedError as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=e.detail,
+            headers={"Retry-After": str(e.retry_after)},
+        )
+
     db_obj = User(
         email=user_in.email,
-        hashed_password=security.get_password_hash(user_in.password),
+        hashed_password=hashed_password,
         role=user_in.role,
         school_id=user_in.school_id,
         tenant_id=user_in.school_id if user_in.school_id else None
@@ -1,5 +1,6 @@
 import os
 from functools import lru_cache
+from typing import Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 # Forçamos o caminho para a raiz do projeto (um nível acima de onde este arquivo config.py está)
@@ -13,6 +14,18 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "School Schedule SaaS"
     API_V1_STR: str = "/api/v1"
     SECRET_KEY: str = "secret"
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24
+
+    # --- Cache de usuários autenticados (get_current_user sem ida ao banco) ---
+    PRINCIPAL_CACHE_SIZE: int = 4096
+    PRINCIPAL_CACHE_TTL_SECONDS: int = 300
+    PRINCIPAL_CACHE_REDIS: bool = False  # Camada compartilhada no Redis, além da memória
+
+    # --- Hash de senhas (bcrypt fora do event loop) ---
+    PASSWORD_BCRYPT_ROUNDS: int = 12  # Custo; hashes com outro custo são refeitos no login
+    PASSWORD_HASH_WORKERS: int = 4  # Threads de hash (o bcrypt solta o GIL)
+    PASSWORD_HASH_MAX_PENDING: int = 64  # Hashes aceitos (rodando + esperando); além disso, 503
+    PASSWORD_HASH_RETRY_AFTER_SECONDS: int = 2
 
     # Valores padrão (serão substituídos pelo .env se ele for lido)
     POSTGRES_SERVER: str = "localhost"
@@ -21,6 +34,83 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = "postgres"
     POSTGRES_DB: str = "school_schedule"
 
+    # --- Pools de conexão (app/db/session.py) ---
+    # Requisições: pool_size fixas + max_overflow extras; quem não consegue conexão
+    # em DB_POOL_TIMEOUT_SECONDS recebe erro (o "QueuePool limit ... reached")
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800  # Renova conexões antigas (proxies/firewalls derrubam as ociosas)
+    DB_POOL_PRE_PING: bool = True  # Testa a conexão ao tirá-la do pool
+    # Cache de prepared statements do asyncpg (por conexão); 0 desliga (obrigatório atrás de pgbouncer
+    # em modo transaction)
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Pool separado e menor para as escritas de fundo do solver e o streaming de progresso:
+    # gerações longas não tomam as conexões das requisições
+    DB_BACKGROUND_POOL_SIZE: int = 2
+    DB_BACKGROUND_MAX_OVERFLOW: int = 2
+
+    # --- Execução do solver ---
+    # "thread": roda no próprio processo da API (modo dev, comportamento antigo)
+    # "process": pool de processos dedicado, isolado do event loop da API
+    # "celery": fila distribuída (Redis), executada pelos workers do Procfile
+    SOLVER_BACKEND: str = "thread"
+    SOLVER_MAX_WORKERS: int = 2  # Gerações rodando ao mesmo tempo
+    SOLVER_QUEUE_LIMIT: int = 10  # Máximo de gerações aceitas (rodando + na fila)
+    SOLVER_MAX_JOBS_PER_SCHOOL: int = 1  # Gerações simultâneas por escola
+    SOLVER_RETRY_AFTER_SECONDS: int = 30  # Header Retry-After das respostas 429
+    SOLVER_CANCEL_POLL_SECONDS: float = 2.0  # Intervalo de checagem de cancelamento no banco
+
+    # --- Parâmetros do CP-SAT (defaults para modelos do tamanho de uma grade escolar) ---
+    SOLVER_MAX_TIME_SECONDS: float = 30.0
+    SOLVER_MAX_TIME_LIMIT: float = 300.0  # Teto para o tempo pedido por requisição
+    SOLVER_NUM_SEARCH_WORKERS: int = 8
+    SOLVER_MAX_SEARCH_WORKERS: int = 16  # Teto para os workers pedidos por requisição
+    SOLVER_RANDOM_SEED: Optional[int] = None
+    SOLVER_LINEARIZATION_LEVEL: int = 1
+
+    # Parada antecipada da otimização (regras desejáveis): devolve uma grade boa sem esperar o teto
+    SOLVER_RELATIVE_GAP_LIMIT: float = 0.02  # Para com objetivo a até 2% do limitante
+    SOLVER_NO_IMPROVEMENT_SECONDS: float = 10.0  # Para se não melhorar nesse intervalo (0 = desliga)
+    SOLVER_MIN_RELATIVE_IMPROVEMENT: float = 0.005  # Melhoras menores não reiniciam o intervalo
+
+    # Decomposição: turnos/grupos que não compartilham professores são resolvidos à parte
+    SOLVER_DECOMPOSE: bool = True
+    SOLVER_COMPONENT_WORKERS: int = 4  # Componentes resolvidos em paralelo
+
+    # Diagnóstico de inviabilidade: conflitos de contagem antes do solver, MIS depois
+    CONFLICT_PRECHECK: bool = True
+    CONFLICT_MIS_MAX_SECONDS: float = 10.0
+
+    # --- Celery / Redis ---
+    REDIS_URL: str = "redis://localhost:6379/0"
+    CELERY_TASK_ALWAYS_EAGER: bool = False  # Roda as tasks no próprio processo, sem broker (testes)
+    CELERY_SOLVER_QUEUE: str = "solver"
+    CELERY_VISIBILITY_TIMEOUT: int = 3600  # Segundos até a task não confirmada voltar para a fila
+    CELERY_MAX_RETRIES: int = 3
+    # Folga da task além do tempo do solver: montagem do modelo, pré-checagem e gravação
+    # do resultado (limites em CELERY_SOFT_TIME_LIMIT / CELERY_TASK_TIME_LIMIT)
+    CELERY_TASK_TIME_MARGIN_SECONDS: int = 120
+
+    # --- Cache de resultados (gerações com a mesma entrada não rodam o solver de novo) ---
+    RESULT_CACHE_SIZE: int = 1024
+    RESULT_CACHE_TTL_SECONDS: int = 24 * 3600
+    RESULT_CACHE_REDIS: bool = False  # Camada compartilhada no Redis, além da memória
+
+    # --- Importação em lote (POST /imports/{tipo}) ---
+    IMPORT_BATCH_SIZE: int = 1000  # Linhas lidas, validadas e gravadas por vez
+    IMPORT_MAX_ERRORS: int = 500  # Erros listados no relatório (os demais só contam)
+
+    # --- Grades renderizadas (GET /schedules/{id}/grid) ---
+    GRID_CACHE_SIZE: int = 512
+
+    # --- Progresso das gerações (SSE) ---
+    # "memory": só funciona com SOLVER_BACKEND="thread" (mesmo processo da API)
+    # "redis": pub/sub no Redis, necessário com "process" e "celery"
+    PROGRESS_BACKEND: str = "memory"
+    PROGRESS_PERSIST_SECONDS: float = 5.0  # Intervalo mínimo entre gravações da melhor solução parcial
+    PROGRESS_LESSONS_SECONDS: float = 1.0  # Intervalo mínimo entre snapshots de aulas enviados
+
     # Configuração do Pydantic para ler o .env na raiz
     model_config = SettingsConfigDict(
         env_file=env_path,
@@ -28,8 +118,15 @@ class Settings(BaseSettings):
         extra="ignore"
     )
 
+    # URL completa do banco; se definida, substitui os POSTGRES_* acima
+    # (ex.: "sqlite+aiosqlite:///./loadtest.db" nos testes de carga, sem serviços externos)
+    DATABASE_URL: Optional[str] = None
+
     @property
     def ASYNC_DATABASE_URL(self) -> str:
+        if self.DATABASE_URL:
+            return self.DATABASE_URL
+
         # Importante: Bancos na nuvem (Aiven) EXIGEM SSL.
         # Adicionei o parâmetro ssl=require automaticamente.
         url = (
@@ -41,6 +138,24 @@ class Settings(BaseSettings):
         return url
 
 
+    @property
+    def SOLVER_RUN_BACKEND(self) -> str:
+        """Backend usado de fato: Celery em modo eager rodaria o solve dentro do event loop da requisição."""
+        if self.SOLVER_BACKEND == "celery" and self.CELERY_TASK_ALWAYS_EAGER:
+            return "thread"
+        return self.SOLVER_BACKEND
+
+    @property
+    def CELERY_SOFT_TIME_LIMIT(self) -> int:
+        # Solve mais longo permitido + diagnóstico de inviabilidade (MIS) + folga
+        return int(self.SOLVER_MAX_TIME_LIMIT + self.CONFLICT_MIS_MAX_SECONDS) + self.CELERY_TASK_TIME_MARGIN_SECONDS
+
+    @property
+    def CELERY_TASK_TIME_LIMIT(self) -> int:
+        # Mata a task se travar: depois do soft limit, com tempo para gravar o status "error"
+        return self.CELERY_SOFT_TIME_LIMIT + 30
+
+
 @lru_cache()
 def get_settings():
     conf = Settings()
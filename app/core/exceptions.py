@@ -0,0 +1,27 @@
+class SolverSaturatedError(Exception):
+    """
+    Levantada quando o executor do solver não aceita mais trabalhos
+    (fila global cheia ou limite de gerações simultâneas da escola).
+    O endpoint traduz para HTTP 429.
+    """
+
+    def __init__(self, detail: str, retry_after: int = 30):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class PasswordHasherSaturatedError(Exception):
+    """
+    Levantada quando o pool de hash de senhas já tem PASSWORD_HASH_MAX_PENDING
+    trabalhos (pico de logins). O endpoint traduz para HTTP 503.
+    """
+
+    def __init__(self, detail: str, retry_after: int = 2):
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class GenerationCancelledError(Exception):
+    """A geração foi cancelada (pelo usuário ou substituída por uma mais nova)."""
@@ -0,0 +1,19 @@
+from functools import lru_cache
+
+from app.core.config import settings
+
+
+@lru_cache()
+def get_redis():
+    """Cliente Redis síncrono (workers do solver, tasks do Celery)."""
+    import redis
+
+    return redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+
+@lru_cache()
+def get_async_redis():
+    """Cliente Redis assíncrono (endpoints da API)."""
+    import redis.asyncio as aioredis
+
+    return aioredis.from_url(settings.REDIS_URL, decode_responses=True)
@@ -1,19 +1,40 @@
+import asyncio
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Any, Union
+from typing import Any, Dict, Optional, Tuple, Union
 from jose import jwt
 from passlib.context import CryptContext
 from app.core.config import settings
+from app.core.exceptions import PasswordHasherSaturatedError
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min = max = custo configurado: hash com qualquer outro custo é refeito no login (needs_update)
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+)
 
 ALGORITHM = "HS256"
 
-def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
+def create_access_token(
+        subject: Union[str, Any],
+        expires_delta: timedelta = None,
+        claims: Optional[Dict[str, Any]] = None,
+) -> str:
+    """
+    claims: dados extras do usuário (school_id, tenant_id, role) levados no token,
+    para o get_current_user não precisar buscar o usuário no banco.
+    """
+    now = datetime.utcnow()
     if expires_delta:
-        expire = datetime.utcnow() + expires_delta
+        expire = now + expires_delta
     else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    to_encode = {"exp": expire, "sub": str(subject)}
+        expire = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    to_encode = {**(claims or {}), "exp": expire, "iat": now, "jti": uuid.uuid4().hex, "sub": str(subject)}
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
@@ -22,3 +43,65 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+class PasswordHasher:
+    """
+    bcrypt fora do event loop: cada hash/verificação leva centenas de ms de CPU e,
+    chamado direto num endpoint async, trava todas as outras requisições do worker.
+
+    Roda num pool de threads próprio (o bcrypt solta o GIL durante o hash, então as
+    threads rodam em paralelo). Limites:
+      - max_workers: hashes rodando ao mesmo tempo
+      - max_pending: hashes aceitos (rodando + esperando); além disso levanta
+        PasswordHasherSaturatedError, em vez de deixar a fila crescer sem fim
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def _executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bcrypt")
+            return self._pool
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise PasswordHasherSaturatedError(
+                    "Muitos logins ao mesmo tempo. Tente novamente em instantes.",
+                    retry_after=settings.PASSWORD_HASH_RETRY_AFTER_SECONDS,
+                )
+            self._pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor(), fn, *args)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(pwd_context.hash, password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        (senha confere?, hash novo). O hash novo só vem quando o atual usa outro
+        custo (PASSWORD_BCRYPT_ROUNDS) ou esquema: quem chama grava no usuário.
+        """
+        return await self._run(pwd_context.verify_and_update, plain_password, hashed_password)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = None
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
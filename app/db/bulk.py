@@ -0,0 +1,61 @@
+import json
+from typing import Any, List, Sequence, Tuple
+
+from sqlalchemy import JSON, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+def _with_defaults(model, columns: Sequence[str], records: List[Tuple[Any, ...]]):
+    """
+    Acrescenta as colunas fora de `columns` que têm default do lado do Python
+    (Column(default=...)): COPY e insert direto na tabela não os aplicam. Defaults
+    calculados (funções) são avaliados uma vez para o lote inteiro.
+    """
+    extra = []
+    for column in model.__table__.columns:
+        default = column.default
+        if column.name in columns or column.primary_key or default is None:
+            continue
+        if default.is_scalar:
+            extra.append((column.name, default.arg))
+        elif default.is_callable:
+            extra.append((column.name, default.arg(None)))
+
+    if not extra:
+        return columns, records
+    values = tuple(value for _, value in extra)
+    return tuple(columns) + tuple(name for name, _ in extra), [tuple(r) + values for r in records]
+
+
+async def bulk_insert(session: AsyncSession, model, columns: Sequence[str], records: List[Tuple[Any, ...]]) -> None:
+    """
+    Insere as linhas em lote: COPY no Postgres (asyncpg), executemany nos outros bancos.
+    Vai direto na tabela, sem os eventos do ORM por linha; os defaults das colunas
+    não informadas são preenchidos aqui.
+
+    Não faz commit. No Postgres o COPY usa a conexão crua da sessão: a transação
+    precisa já ter sido aberta por algum comando anterior na sessão, senão o COPY
+    roda fora dela.
+    """
+    if not records:
+        return
+    columns, records = _with_defaults(model, columns, records)
+
+    if session.bind.dialect.name == "postgresql":
+        # O COPY do asyncpg recebe JSON como texto (o tipo JSON do SQLAlchemy não entra aqui)
+        json_positions = [
+            i for i, c in enumerate(columns) if isinstance(model.__table__.c[c].type, JSON)
+        ]
+        if json_positions:
+            records = [
+                tuple(json.dumps(v) if i in json_positions and v is not None else v for i, v in enumerate(r))
+                for r in records
+            ]
+        connection = await session.connection()
+        raw = await connection.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            model.__tablename__, records=records, columns=list(columns)
+        )
+        return
+
+    await session.execute(insert(model.__table__), [dict(zip(columns, r)) for r in records])
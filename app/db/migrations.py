@@ -0,0 +1,111 @@
+from sqlalchemy import exists, insert, inspect, select, text, update
+
+from app.models.schedule import RUNNING_CONDITION
+
+# O projeto cria as tabelas com Base.metadata.create_all, que não altera tabelas
+# existentes. Colunas e índices adicionados depois entram aqui, de forma idempotente.
+
+# (tabela, coluna, tipo SQL)
+COLUMN_MIGRATIONS = [
+    ("schedule", "input_fingerprint", "VARCHAR(64)"),
+    ("schedule", "grid_data", "JSON"),
+    ("schedule", "grid_catalog_version", "INTEGER"),
+    ("schools", "catalog_version", "INTEGER NOT NULL DEFAULT 0"),
+    ("schools", "time_grid", "JSON"),
+]
+
+# (nome do índice, tabela, colunas)
+INDEX_MIGRATIONS = [
+    ("ix_schedule_school_fingerprint", "schedule", "school_id, input_fingerprint"),
+    # Paginação por cursor (keyset em id) dentro da escola/dono: custo constante por página
+    ("ix_teacher_school_page", "teacher", "school_id, id"),
+    ("ix_subject_school_page", "subject", "school_id, id"),
+    ("ix_constraints_school_page", "constraints", "school_id, id"),
+    ("ix_schools_owner_page", "schools", "owner_id, id"),
+    ("ix_availability_teacher", "availability", "teacher_id"),
+]
+
+# (nome do índice, tabela, colunas, condição): índices únicos parciais
+UNIQUE_INDEX_MIGRATIONS = [
+    # Uma geração em andamento por entrada (ver Schedule.__table_args__)
+    ("ux_schedule_running_fingerprint", "schedule", "school_id, input_fingerprint", RUNNING_CONDITION),
+]
+
+
+def run_migrations(sync_conn) -> None:
+    """Aplica as colunas/índices que faltam. Usar com conn.run_sync(run_migrations)."""
+    inspector = inspect(sync_conn)
+    existing_tables = set(inspector.get_table_names())
+
+    for table, column, ddl in COLUMN_MIGRATIONS:
+        if table not in existing_tables:
+            continue
+        columns = {c["name"] for c in inspector.get_columns(table)}
+        if column not in columns:
+            print(f"INFO:     Migração: adicionando coluna {table}.{column}")
+            sync_conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+    for name, table, columns in INDEX_MIGRATIONS:
+        if table in existing_tables:
+            sync_conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
+
+    for name, table, columns, condition in UNIQUE_INDEX_MIGRATIONS:
+        if table not in existing_tables:
+            continue
+        try:
+            # Savepoint: linhas duplicadas antigas impedem o índice, mas não o resto da migração
+            with sync_conn.begin_nested():
+                sync_conn.execute(text(
+                    f"CREATE UNIQUE INDEX IF NOT EXISTS {name} ON {table} ({columns}) WHERE {condition}"
+                ))
+        except Exception as e:
+            print(f"WARNING:  Migração: índice {name} não criado: {e}")
+
+    if {"schedule", "schedule_lesson"} <= existing_tables:
+        backfill_schedule_lessons(sync_conn)
+
+
+def backfill_schedule_lessons(sync_conn) -> None:
+    """
+    Grades concluídas antes da tabela schedule_lesson: move as aulas do result_data para
+    a tabela, deixando no JSON só as métricas. Grades já movidas têm linhas na
+    schedule_lesson e são puladas; a linha da grade fica travada (FOR UPDATE) enquanto
+    é movida, para dois workers subindo juntos não duplicarem as aulas.
+    """
+    from app.models.schedule import Schedule
+    from app.models.schedule_lesson import ScheduleLesson
+    from app.utils.helpers import get_lessons
+
+    not_indexed = ~exists().where(ScheduleLesson.schedule_id == Schedule.id)
+    pending = sync_conn.execute(
+        select(Schedule.id).where(Schedule.status == "completed", not_indexed)
+    ).scalars().all()
+
+    moved = 0
+    for schedule_id in pending:
+        result_data = sync_conn.execute(
+            select(Schedule.result_data)
+            .where(Schedule.id == schedule_id, not_indexed)
+            .with_for_update()
+        ).scalar_one_or_none()
+        lessons = get_lessons(result_data)
+        if not lessons:
+            continue
+
+        sync_conn.execute(insert(ScheduleLesson.__table__), [
+            {
+                "schedule_id": schedule_id, "class_group_id": l["class_group_id"], "teacher_id": l["teacher_id"],
+                "subject_id": l["subject_id"], "day": l["day_of_week"], "period": l["period"],
+            }
+            for l in lessons
+        ])
+        stats = result_data.get("stats") if isinstance(result_data, dict) else None
+        sync_conn.execute(
+            update(Schedule)
+            .where(Schedule.id == schedule_id)
+            .values(result_data={"stats": stats, "lesson_count": len(lessons)})
+        )
+        moved += 1
+
+    if moved:
+        print(f"INFO:     Migração: aulas de {moved} grades movidas para schedule_lesson")
@@ -1,20 +1,130 @@
-from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+import threading
+from typing import Any, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from app.core.config import settings
 
-# Cria a engine assíncrona usando a URL definida no config.py
-engine = create_async_engine(settings.ASYNC_DATABASE_URL, echo=False)
+
+def _engine_url():
+    url = make_url(settings.ASYNC_DATABASE_URL)
+    if url.get_driver_name() == "asyncpg":
+        # Cache de statements do dialeto do SQLAlchemy (o do asyncpg vai em connect_args)
+        url = url.update_query_dict({"prepared_statement_cache_size": str(settings.DB_STATEMENT_CACHE_SIZE)})
+    return url
+
+
+def _engine_options(pool_size: Optional[int], max_overflow: int = 0) -> Dict[str, Any]:
+    """Opções de create_async_engine; pool_size=None = sem pool (NullPool)."""
+    url = _engine_url()
+    options: Dict[str, Any] = {"echo": False}
+
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {"statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE}
+
+    if pool_size is None:
+        options["poolclass"] = NullPool
+    elif url.get_backend_name() != "sqlite":
+        # SQLite (testes locais) fica com o pool padrão do dialeto
+        options.update(
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+        )
+    return options
+
+
+def _session_factory(bind: AsyncEngine) -> sessionmaker:
+    return sessionmaker(
+        bind=bind,
+        class_=AsyncSession,
+        expire_on_commit=False,
+        autocommit=False,
+        autoflush=False,
+    )
+
+
+# Cria a engine assíncrona usando a URL definida no config.py (pool das requisições)
+engine = create_async_engine(_engine_url(), **_engine_options(settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW))
 
 # Configura a sessão
-AsyncSessionLocal = sessionmaker(
-    bind=engine,
-    class_=AsyncSession,
-    expire_on_commit=False,
-    autocommit=False,
-    autoflush=False,
+AsyncSessionLocal = _session_factory(engine)
+
+# Pool das tarefas de fundo no processo da API (gravação do resultado do solver,
+# status do streaming SSE): menor e separado, para gerações longas não esgotarem
+# as conexões das requisições.
+background_engine = create_async_engine(
+    _engine_url(), **_engine_options(settings.DB_BACKGROUND_POOL_SIZE, settings.DB_BACKGROUND_MAX_OVERFLOW)
 )
 
+BackgroundSessionLocal = _session_factory(background_engine)
+
+# Engine para processos worker (Celery): cada task roda num event loop novo (asyncio.run),
+# e conexões do asyncpg não podem ser reaproveitadas entre loops. Sem pool, portanto.
+worker_engine = create_async_engine(_engine_url(), **_engine_options(None))
+
+WorkerSessionLocal = _session_factory(worker_engine)
+
+
+class PoolMetrics:
+    """Contadores de uso de um pool (eventos checkout/checkin), além do estado atual."""
+
+    def __init__(self, name: str, bind: AsyncEngine):
+        self.name = name
+        self.pool = bind.sync_engine.pool
+        self.checkouts = 0
+        self.checked_out = 0
+        self.peak_checked_out = 0
+        self._lock = threading.Lock()
+
+        event.listen(self.pool, "checkout", self._on_checkout)
+        event.listen(self.pool, "checkin", self._on_checkin)
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        with self._lock:
+            self.checkouts += 1
+            self.checked_out += 1
+            self.peak_checked_out = max(self.peak_checked_out, self.checked_out)
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.checked_out = max(0, self.checked_out - 1)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            data = {
+                "pool": type(self.pool).__name__,
+                "checked_out": self.checked_out,
+                "peak_checked_out": self.peak_checked_out,
+                "checkouts": self.checkouts,
+            }
+        # Pools com fila (QueuePool); NullPool/StaticPool não têm esses números
+        for key, method in (("size", "size"), ("checked_in", "checkedin"), ("overflow", "overflow")):
+            if hasattr(self.pool, method):
+                data[key] = getattr(self.pool, method)()
+        if hasattr(self.pool, "size"):
+            data["capacity"] = self.pool.size() + max(0, getattr(self.pool, "_max_overflow", 0))
+        return data
+
+
+_pool_metrics = [
+    PoolMetrics("requests", engine),
+    PoolMetrics("background", background_engine),
+    PoolMetrics("worker", worker_engine),
+]
+
+
+def pool_metrics() -> Dict[str, Dict[str, Any]]:
+    """Uso atual de cada pool deste processo (exposto em /health/db-pool)."""
+    return {m.name: m.snapshot() for m in _pool_metrics}
+
+
 # Função (dependência) que será usada em todos os endpoints
 async def get_db():
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
@@ -1,11 +1,15 @@
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from contextlib import asynccontextmanager
 from fastapi.middleware.cors import CORSMiddleware
 
+from app.api.dependencies import get_current_user
 from app.api.router import api_router
 from app.core.config import settings
-from app.db.session import engine
+from app.core.security import password_hasher
+from app.db.session import engine, pool_metrics
+from app.db.migrations import run_migrations
 from app.models.base import Base
+from app.tasks.solver_executor import solver_executor
 
 # IMPORTANTE: Importar o pacote models garante que todos os ficheiros
 # (user, school, class_group, subject, etc.) sejam lidos e registados no Base.metadata
@@ -22,6 +26,8 @@ async def lifespan(app: FastAPI):
             # Isso cria todas as tabelas definidas nos models se elas não existirem
             # O run_sync é necessário porque o create_all do SQLAlchemy não é nativamente assíncrono
             await conn.run_sync(Base.metadata.create_all)
+            # Colunas/índices novos em tabelas que já existiam
+            await conn.run_sync(run_migrations)
         print("INFO:     Tabelas verificadas/criadas com sucesso.")
     except Exception as e:
         print(f"ERROR:    Erro ao criar tabelas: {e}")
@@ -30,6 +36,8 @@ async def lifespan(app: FastAPI):
     yield
 
     print(f"INFO:     Finalizando {settings.PROJECT_NAME}...")
+    solver_executor.shutdown()
+    password_hasher.shutdown()
 
 
 app = FastAPI(
@@ -52,6 +60,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Lidos pelo front: cache da grade e cursor da próxima página das listagens
+    expose_headers=["ETag", "X-Next-Cursor"],
 )
 
 # Incluindo as rotas da API
@@ -66,6 +76,15 @@ async def root():
     }
 
 
+@app.get("/health/db-pool", dependencies=[Depends(get_current_user)])
+async def db_pool_health():
+    """
+    Uso dos pools de conexão deste worker (requisições, tarefas de fundo, Celery).
+    Exige login: tamanho do pool e conexões em uso não são públicos.
+    """
+    return pool_metrics()
+
+
 if __name__ == "__main__":
     import uvicorn
 
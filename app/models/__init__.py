@@ -6,4 +6,6 @@ from app.models.subject import Subject
 from app.models.class_group import ClassGroup
 from app.models.availability import Availability  # <--- ADICIONE ESTA LINHA
 from app.models.constraint import Constraint
-from app.models.schedule import Schedule
\ No newline at end of file
+from app.models.schedule import Schedule
+from app.models.schedule_lesson import ScheduleLesson
+from app.models import events  # Registra os listeners (versão do catálogo, cache de usuários)
\ No newline at end of file
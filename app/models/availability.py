@@ -1,9 +1,12 @@
-from sqlalchemy import Column, String, Integer, Boolean, ForeignKey
+from sqlalchemy import Column, String, Integer, Boolean, ForeignKey, Index
 from sqlalchemy.orm import relationship  # Adicione este import
 from app.models.base import TenantBase
 
 class Availability(TenantBase):
     __tablename__ = "availability"
+    __table_args__ = (
+        Index("ix_availability_teacher", "teacher_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     teacher_id = Column(Integer, ForeignKey("teacher.id"))
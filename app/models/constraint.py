@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, JSON, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, JSON, Boolean, Index
 from sqlalchemy.orm import relationship
 
 from app.models.base import TenantBase
@@ -6,6 +6,9 @@ from app.models.base import TenantBase
 
 class Constraint(TenantBase):
     __tablename__ = "constraints"
+    __table_args__ = (
+        Index("ix_constraints_school_page", "school_id", "id"),  # Paginação por cursor
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     school_id = Column(Integer, ForeignKey("schools.id"), nullable=False)
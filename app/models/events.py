@@ -0,0 +1,76 @@
+from sqlalchemy import event, inspect, update
+from sqlalchemy.orm import Session
+
+from app.models.class_group import ClassGroup
+from app.models.school import School
+from app.models.subject import Subject
+from app.models.teacher import Teacher
+from app.models.user import User
+
+
+def _bump_catalog_version(mapper, connection, target):
+    """
+    Qualquer escrita em professor, matéria ou turma pode mudar um nome exibido na grade:
+    incrementa School.catalog_version na mesma transação.
+    """
+    if target.school_id is None:
+        return
+    connection.execute(
+        update(School)
+        .where(School.id == target.school_id)
+        .values(catalog_version=School.catalog_version + 1)
+    )
+
+
+for _model in (Teacher, Subject, ClassGroup):
+    for _event_name in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event_name, _bump_catalog_version)
+
+
+# ids de usuários alterados na transação da sessão, invalidados só depois do commit
+PENDING_PRINCIPALS_KEY = "pending_principal_invalidations"
+
+
+def _invalidate_principal(mapper, connection, target):
+    """
+    Usuário removido ou alterado: o cache de autenticação e os claims dos tokens antigos
+    deixam de valer. Roda no flush, antes do commit: só anota o id na sessão. Invalidar
+    aqui deixaria outra requisição recolocar no cache a linha antiga até o commit.
+    """
+    if target.id is None:
+        return
+    session = inspect(target).session
+    if session is None:
+        from app.services.principal_cache import principal_cache
+
+        principal_cache.invalidate(target.id)
+        return
+    session.info.setdefault(PENDING_PRINCIPALS_KEY, set()).add(target.id)
+
+
+def _invalidate_principal_on_update(mapper, connection, target):
+    # Só a senha mudou (ex.: rehash no login): os dados do principal continuam os mesmos
+    from app.services.principal_cache import PRINCIPAL_FIELDS
+
+    state = inspect(target)
+    if any(state.attrs[f].history.has_changes() for f in PRINCIPAL_FIELDS if f != "id"):
+        _invalidate_principal(mapper, connection, target)
+
+
+def _invalidate_committed_principals(session):
+    from app.services.principal_cache import principal_cache
+
+    for user_id in session.info.pop(PENDING_PRINCIPALS_KEY, ()):
+        principal_cache.invalidate(user_id)
+
+
+def _discard_pending_principals(session):
+    # Rollback: nada mudou no banco, o cache continua valendo
+    session.info.pop(PENDING_PRINCIPALS_KEY, None)
+
+
+event.listen(User, "after_update", _invalidate_principal_on_update)
+event.listen(User, "after_delete", _invalidate_principal)
+# Session síncrona: é a que a AsyncSession usa por baixo (sync_session)
+event.listen(Session, "after_commit", _invalidate_committed_principals)
+event.listen(Session, "after_rollback", _discard_pending_principals)
@@ -1,15 +1,32 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, JSON, Index, text
 from sqlalchemy.orm import relationship
 from app.models.base import TenantBase
 
+# Gerações ainda em andamento: só elas recebem status/resultado do solver
+RUNNING_STATUSES = ("queued", "processing")
+RUNNING_CONDITION = "status IN ('queued', 'processing')"
+
 
 class Schedule(TenantBase):
     __tablename__ = "schedule"
+    __table_args__ = (
+        Index("ix_schedule_school_fingerprint", "school_id", "input_fingerprint"),
+        # Uma geração em andamento por entrada, valendo entre todos os processos da API
+        Index(
+            "ux_schedule_running_fingerprint", "school_id", "input_fingerprint", unique=True,
+            postgresql_where=text(RUNNING_CONDITION), sqlite_where=text(RUNNING_CONDITION),
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     status = Column(String, default="pending")
     generated_at = Column(DateTime)
     result_data = Column(JSON, nullable=True)  # Para salvar o JSON da grade gerada
+    # Hash da entrada do solver (dados da escola + parâmetros): evita resolver de novo o mesmo problema
+    input_fingerprint = Column(String(64), nullable=True)
+    # Grade visual pronta (turma -> dia -> horários), montada quando a geração conclui
+    grid_data = Column(JSON, nullable=True)
+    grid_catalog_version = Column(Integer, nullable=True)  # School.catalog_version usado no grid_data
 
     # Adicione ou Verifique:
     school_id = Column(Integer, ForeignKey("schools.id"), nullable=False)
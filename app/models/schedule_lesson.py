@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Integer, SmallInteger, ForeignKey, Index
+
+from app.models.base import Base
+
+
+class ScheduleLesson(Base):
+    """
+    Uma aula de uma grade concluída. É aqui que as aulas ficam guardadas: o
+    result_data da grade concluída guarda só as métricas, e o JSON das aulas
+    é montado na leitura.
+    Os índices compostos atendem as visões por professor, por turma e por horário
+    sem varrer todas as aulas da escola.
+    """
+    __tablename__ = "schedule_lesson"
+    __table_args__ = (
+        Index("ix_schedule_lesson_teacher", "schedule_id", "teacher_id", "day", "period"),
+        Index("ix_schedule_lesson_class_group", "schedule_id", "class_group_id", "day", "period"),
+        Index("ix_schedule_lesson_slot", "schedule_id", "day", "period"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    schedule_id = Column(Integer, ForeignKey("schedule.id", ondelete="CASCADE"), nullable=False)
+    class_group_id = Column(Integer, nullable=False)
+    teacher_id = Column(Integer, nullable=False)
+    subject_id = Column(Integer, nullable=False)
+    day = Column(SmallInteger, nullable=False)  # 0=Seg ... 4=Sex
+    period = Column(SmallInteger, nullable=False)  # 0 = 1º horário
@@ -1,15 +1,24 @@
-from sqlalchemy import Column, Integer, String, ForeignKey
+from sqlalchemy import Column, Integer, String, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
 from app.models.base import TenantBase
 
 class School(TenantBase):
     __tablename__ = "schools"
+    __table_args__ = (
+        Index("ix_schools_owner_page", "owner_id", "id"),  # Paginação por cursor
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     code = Column(String, unique=True, index=True)
     address = Column(String, nullable=True)
     owner_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    # Incrementado quando nomes de professores, matérias ou turmas mudam (ver models/events.py).
+    # Invalida as grades materializadas e os ETags de /schedules/{id}/grid.
+    catalog_version = Column(Integer, nullable=False, default=0, server_default="0")
+    # Forma da semana (dias, aulas por dia, intervalos, turnos); ver services/time_grid.py.
+    # Vazio = Seg a Sex, 5 aulas por dia.
+    time_grid = Column(JSON, nullable=True)
 
     class_groups = relationship("ClassGroup", back_populates="school")
     teachers = relationship("Teacher", back_populates="school")
@@ -1,10 +1,13 @@
-from sqlalchemy import Column, String, Integer, ForeignKey, Boolean
+from sqlalchemy import Column, String, Integer, ForeignKey, Boolean, Index
 from sqlalchemy.orm import relationship
 
 from app.models.base import TenantBase
 
 class Subject(TenantBase):
     __tablename__ = "subject"
+    __table_args__ = (
+        Index("ix_subject_school_page", "school_id", "id"),  # Paginação por cursor
+    )
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False)
     code = Column(String)
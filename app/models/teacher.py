@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Integer, ForeignKey
+from sqlalchemy import Column, String, Integer, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 from app.models.base import TenantBase
@@ -6,6 +6,9 @@ from app.models.base import TenantBase
 
 class Teacher(TenantBase):
     __tablename__ = "teacher"
+    __table_args__ = (
+        Index("ix_teacher_school_page", "school_id", "id"),  # Paginação por cursor
+    )
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String)
     code = Column(String)
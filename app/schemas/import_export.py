@@ -0,0 +1,83 @@
+import json
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field, field_validator, model_validator
+
+
+class ImportRow(BaseModel):
+    """Base das linhas importadas: célula vazia (CSV/XML) vale como ausente (usa o padrão)."""
+
+    @model_validator(mode="before")
+    @classmethod
+    def drop_empty(cls, data):
+        if not isinstance(data, dict):
+            return data
+        cleaned = {}
+        for key, value in data.items():
+            if isinstance(value, str):
+                value = value.strip()
+            if value is not None and value != "":
+                cleaned[key] = value
+        return cleaned
+
+
+class TeacherImportRow(ImportRow):
+    name: str
+    code: str
+    email: Optional[str] = None
+    importance: int = 1
+
+
+class ClassGroupImportRow(ImportRow):
+    name: str
+    grade: Optional[str] = None
+    shift: Optional[str] = None
+
+
+class SubjectImportRow(ImportRow):
+    name: str
+    code: Optional[str] = None
+    weekly_lessons: int = Field(4, ge=1)
+    max_daily_lessons: int = Field(2, ge=1)
+    allow_consecutive: bool = True
+    # Referências pelo código do professor / nome da turma (ou direto pelo id)
+    teacher_code: Optional[str] = None
+    teacher_id: Optional[int] = None
+    class_group: Optional[str] = None
+    class_group_id: Optional[int] = None
+
+
+class ConstraintImportRow(ImportRow):
+    type: str
+    name: Optional[str] = None
+    # No CSV/XML vem como texto JSON. Referências dentro de data: teacher_code / class_group
+    # (ou teacher_id / class_group_id), resolvidas como nas matérias
+    data: Dict[str, Any] = {}
+    weight: int = Field(100, ge=0)  # 100 = obrigatória; < 100 = desejável
+    active: bool = True
+
+    @field_validator("data", mode="before")
+    @classmethod
+    def parse_json(cls, value):
+        if isinstance(value, str):
+            try:
+                return json.loads(value)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"JSON inválido em data: {e.msg}")
+        return value
+
+
+class ImportRowError(BaseModel):
+    row: int  # Posição do registro no arquivo (1 = primeiro registro, sem contar o cabeçalho)
+    errors: List[str]
+
+
+class ImportResult(BaseModel):
+    kind: str
+    format: str
+    rows: int
+    inserted: int
+    failed: int
+    errors: List[ImportRowError] = []
+    errors_truncated: bool = False  # Mais erros do que IMPORT_MAX_ERRORS: só os primeiros vêm na lista
+    seconds: float
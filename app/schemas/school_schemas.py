@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from typing import List, Optional, Any, Dict
 from datetime import datetime
 
@@ -77,6 +77,34 @@ class SchoolRead(SchoolBase):
     class Config:
         from_attributes = True
 
+
+class ShiftWindow(BaseModel):
+    # Horários do dia (0 = primeiro) e dias (0 = Segunda) do turno; vazio = todos
+    slots: Optional[List[int]] = None
+    days: Optional[List[int]] = None
+
+
+class TimeGridSchema(BaseModel):
+    days: int = Field(5, ge=1, le=7)
+    slots_per_day: int = Field(5, ge=1, le=16)
+    breaks: List[int] = []  # Intervalo depois do horário h (h e h+1 não são seguidos)
+    slot_times: Optional[List[List[str]]] = None  # [["07:00", "07:50"], ...]
+    shifts: Dict[str, ShiftWindow] = {}  # ClassGroup.shift -> janela
+
+    @model_validator(mode="after")
+    def check_bounds(self):
+        for h in self.breaks:
+            if not 0 <= h < self.slots_per_day - 1:
+                raise ValueError(f"Intervalo fora do dia: {h}")
+        if self.slot_times is not None and len(self.slot_times) != self.slots_per_day:
+            raise ValueError("slot_times precisa ter um horário para cada aula do dia")
+        for name, window in self.shifts.items():
+            if any(not 0 <= h < self.slots_per_day for h in window.slots or []):
+                raise ValueError(f"Turno {name}: horário fora do dia")
+            if any(not 0 <= d < self.days for d in window.days or []):
+                raise ValueError(f"Turno {name}: dia fora da semana")
+        return self
+
 class TeacherCreate(BaseModel):
     name: str
     code: str
@@ -125,9 +153,30 @@ class ClassGroupSchema(BaseModel):
     class Config:
         from_attributes = True
 
+class SolverOptions(BaseModel):
+    # Perfil pronto ("fast", "balanced", "thorough"); os campos abaixo sobrescrevem o perfil
+    preset: Optional[str] = None
+    max_time_in_seconds: Optional[float] = None
+    num_search_workers: Optional[int] = None
+    random_seed: Optional[int] = None  # Semente fixa = busca reproduzível (com 1 worker)
+    linearization_level: Optional[int] = None  # 0, 1 ou 2
+    # Parada antecipada quando há regras desejáveis (peso < 100) na função objetivo
+    relative_gap_limit: Optional[float] = None
+    no_improvement_seconds: Optional[float] = None
+    min_relative_improvement: Optional[float] = None
+
+
+class ScheduleGenerateRequest(BaseModel):
+    solver: SolverOptions = SolverOptions()
+    # Parte da última grade concluída da escola (solution hints)
+    incremental: bool = False
+    # Minimiza as aulas que mudam de lugar em relação à última grade (implica incremental)
+    minimize_changes: bool = False
+
+
 class ScheduleSchema(BaseModel):
     id: int
-    status: str
+    status: str  # queued, processing, completed, error, cancelled
     generated_at: Optional[datetime]
     school_id: int
     result_data: Optional[Any] = None
@@ -155,6 +204,7 @@ class SubjectSchema(SubjectCreate):
 class ConstraintCreate(BaseModel):
     type: str
     data: Dict[str, Any]
+    weight: int = 100  # 100 = obrigatória; < 100 = desejável (peso na otimização)
 
 
 class ConstraintSchema(ConstraintCreate):
@@ -7,3 +7,7 @@ class Token(BaseModel):
 
 class TokenPayload(BaseModel):
     sub: Optional[int] = None
+    jti: Optional[str] = None
+    school_id: Optional[int] = None
+    tenant_id: Optional[int] = None
+    role: Optional[str] = None
@@ -0,0 +1,235 @@
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.db.bulk import bulk_insert
+from app.models.class_group import ClassGroup
+from app.models.constraint import Constraint
+from app.models.school import School
+from app.models.subject import Subject
+from app.models.teacher import Teacher
+from app.schemas.import_export import (
+    ClassGroupImportRow,
+    ConstraintImportRow,
+    SubjectImportRow,
+    TeacherImportRow,
+)
+
+# tipo -> (schema da linha, model, colunas gravadas)
+IMPORT_KINDS = {
+    "teachers": (TeacherImportRow, Teacher, ("name", "code", "email", "importance", "school_id")),
+    "class_groups": (ClassGroupImportRow, ClassGroup, ("name", "grade", "shift", "school_id")),
+    "subjects": (SubjectImportRow, Subject, (
+        "name", "code", "weekly_lessons", "max_daily_lessons", "allow_consecutive",
+        "teacher_id", "class_group_id", "school_id",
+    )),
+    "constraints": (ConstraintImportRow, Constraint, ("type", "name", "data", "weight", "active", "school_id")),
+}
+
+# Tipos cujas linhas mudam nomes exibidos na grade (School.catalog_version)
+CATALOG_KINDS = ("teachers", "class_groups", "subjects")
+
+
+def _take(rows: Iterator[Dict[str, Any]], size: int) -> List[Dict[str, Any]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            break
+    return batch
+
+
+def _format_errors(error: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(p) for p in e['loc']) or 'registro'}: {e['msg']}" for e in error.errors()]
+
+
+class BulkImporter:
+    """
+    Importação em lote de professores, turmas, matérias ou regras de uma escola, numa transação só.
+
+    Os registros chegam de um iterador (app/utils/xml_json.py) e são lidos, validados e
+    gravados em lotes de IMPORT_BATCH_SIZE: a memória não cresce com o arquivo.
+    Referências (código do professor, nome da turma; nas regras, dentro de data) são
+    resolvidas com mapas carregados uma vez no começo, e os lotes vão com bulk_insert
+    (COPY no Postgres).
+
+    Linhas inválidas não são gravadas e entram no relatório de erros. Com atomic=True,
+    qualquer erro desfaz a importação inteira (nada é gravado).
+    """
+
+    def __init__(self, session: AsyncSession, school_id: int, kind: str, atomic: bool = True):
+        self.session = session
+        self.school_id = school_id
+        self.kind = kind
+        self.atomic = atomic
+        self.schema, self.model, self.columns = IMPORT_KINDS[kind]
+
+        self.rows = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors: List[Dict[str, Any]] = []
+
+        # Chaves já usadas (no banco + no arquivo) e referências para as matérias
+        self.existing_keys: set = set()
+        self.teacher_ids: Dict[str, int] = {}
+        self.class_group_ids: Dict[str, int] = {}
+        # Todos os ids da escola, para teacher_id/class_group_id informados direto (checagem O(1))
+        self.valid_teacher_ids: set = set()
+        self.valid_class_group_ids: set = set()
+
+    async def load_references(self) -> None:
+        """Uma consulta por tabela referenciada; também abre a transação (ver bulk_insert)."""
+        if self.kind in ("teachers", "subjects", "constraints"):
+            result = await self.session.execute(
+                select(Teacher.code, Teacher.id).where(Teacher.school_id == self.school_id)
+            )
+            rows = result.all()
+            self.teacher_ids = {code: t_id for code, t_id in rows if code}
+            # Professores sem código só podem ser referenciados pelo id
+            self.valid_teacher_ids = {t_id for _, t_id in rows}
+        if self.kind in ("class_groups", "subjects", "constraints"):
+            result = await self.session.execute(
+                select(ClassGroup.name, ClassGroup.id).where(ClassGroup.school_id == self.school_id)
+            )
+            rows = result.all()
+            self.class_group_ids = {name: g_id for name, g_id in rows}
+            self.valid_class_group_ids = {g_id for _, g_id in rows}
+
+        if self.kind == "teachers":
+            self.existing_keys = set(self.teacher_ids)
+        elif self.kind == "class_groups":
+            self.existing_keys = set(self.class_group_ids)
+
+    # ------------------------------------------------------------------
+    def _record(self, row_number: int, raw: Dict[str, Any]) -> Optional[Tuple[Any, ...]]:
+        """Valida e resolve uma linha; devolve a tupla nas colunas do model ou None (erro)."""
+        if "__invalid__" in raw:
+            self._error(row_number, [raw["__invalid__"]])
+            return None
+        try:
+            row = self.schema.model_validate(raw)
+        except ValidationError as e:
+            self._error(row_number, _format_errors(e))
+            return None
+
+        values = row.model_dump()
+        values["school_id"] = self.school_id
+
+        if self.kind == "teachers":
+            if row.code in self.existing_keys:
+                self._error(row_number, [f"code: professor {row.code} já existe na escola"])
+                return None
+            self.existing_keys.add(row.code)
+
+        elif self.kind == "class_groups":
+            if row.name in self.existing_keys:
+                self._error(row_number, [f"name: turma {row.name} já existe na escola"])
+                return None
+            self.existing_keys.add(row.name)
+
+        elif self.kind == "subjects":
+            errors = []
+            values["teacher_id"] = self._resolve(
+                row.teacher_code, row.teacher_id, self.teacher_ids, self.valid_teacher_ids,
+                "teacher_code", "professor", errors,
+            )
+            values["class_group_id"] = self._resolve(
+                row.class_group, row.class_group_id, self.class_group_ids, self.valid_class_group_ids,
+                "class_group", "turma", errors,
+            )
+            if errors:
+                self._error(row_number, errors)
+                return None
+
+        elif self.kind == "constraints":
+            errors = []
+            data = dict(row.data)
+            if "teacher_code" in data or "teacher_id" in data:
+                data["teacher_id"] = self._resolve(
+                    data.pop("teacher_code", None), data.get("teacher_id"), self.teacher_ids,
+                    self.valid_teacher_ids, "data.teacher_code", "professor", errors,
+                )
+            if "class_group" in data or "class_group_id" in data:
+                data["class_group_id"] = self._resolve(
+                    data.pop("class_group", None), data.get("class_group_id"), self.class_group_ids,
+                    self.valid_class_group_ids, "data.class_group", "turma", errors,
+                )
+            if errors:
+                self._error(row_number, errors)
+                return None
+            values["data"] = data
+
+        return tuple(values[c] for c in self.columns)
+
+    def _resolve(self, key, given_id, ids: Dict[str, int], valid_ids: set, field: str, label: str,
+                 errors: List[str]) -> Optional[int]:
+        """Id da referência pela chave (código/nome) ou pelo id informado, sempre da mesma escola."""
+        if key is not None:
+            if key not in ids:
+                errors.append(f"{field}: {label} {key} não encontrado na escola")
+            return ids.get(key)
+        if given_id is not None and given_id not in valid_ids:
+            errors.append(f"{field}_id: {label} {given_id} não encontrado na escola")
+        return given_id
+
+    def _error(self, row_number: int, messages: List[str]) -> None:
+        self.failed += 1
+        if len(self.errors) < settings.IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row_number, "errors": messages})
+
+    # ------------------------------------------------------------------
+    async def run(self, records: Iterator[Dict[str, Any]]) -> Dict[str, Any]:
+        """Importa tudo e faz commit (ou rollback, se atomic e houve erro). Devolve o relatório."""
+        start = time.perf_counter()
+        await self.load_references()
+
+        try:
+            while True:
+                # Leitura e parsing do arquivo (síncronos) fora do event loop
+                batch = await run_in_threadpool(_take, records, settings.IMPORT_BATCH_SIZE)
+                if not batch:
+                    break
+
+                prepared = []
+                for raw in batch:
+                    self.rows += 1
+                    record = self._record(self.rows, raw)
+                    if record is not None:
+                        prepared.append(record)
+
+                if prepared and not (self.atomic and self.failed):
+                    await bulk_insert(self.session, self.model, self.columns, prepared)
+                    self.inserted += len(prepared)
+
+            if self.atomic and self.failed:
+                await self.session.rollback()
+                self.inserted = 0
+            else:
+                if self.inserted and self.kind in CATALOG_KINDS:
+                    # Os eventos por linha (models/events.py) não rodam no lote: nomes mudaram uma vez
+                    await self.session.execute(
+                        update(School)
+                        .where(School.id == self.school_id)
+                        .values(catalog_version=School.catalog_version + 1)
+                    )
+                await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+
+        print(f"--> [Import] Escola {self.school_id}: {self.inserted} {self.kind} importados, "
+              f"{self.failed} linhas com erro ({time.perf_counter() - start:.2f}s)")
+        return {
+            "kind": self.kind,
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "seconds": round(time.perf_counter() - start, 3),
+        }
@@ -0,0 +1,90 @@
+import threading
+import time
+
+from sqlalchemy import select
+
+from app.core.config import settings
+
+# Gerações canceladas conhecidas neste processo (caminho rápido do backend "thread")
+_cancelled_local = set()
+_lock = threading.Lock()
+
+
+def request_cancel(schedule_id: int) -> None:
+    """Sinaliza o cancelamento para o solver que roda neste processo."""
+    with _lock:
+        _cancelled_local.add(schedule_id)
+
+
+class CancelToken:
+    """
+    Diz ao solver se a geração foi cancelada.
+
+    Picklable (só guarda o id), então vai junto com o solve para processos worker e
+    nós do Celery. Confere primeiro o sinal local e, no máximo a cada
+    SOLVER_CANCEL_POLL_SECONDS, o status no banco, que é a fonte da verdade
+    gravada por POST /schedules/{id}/cancel.
+
+    is_cancelled() bloqueia na consulta: é para a thread do solver. No event loop,
+    use is_cancelled_async().
+    """
+
+    def __init__(self, schedule_id: int):
+        self.schedule_id = schedule_id
+        self._last_poll = 0.0
+
+    def __call__(self) -> bool:
+        return self.is_cancelled()
+
+    def is_cancelled(self) -> bool:
+        with _lock:
+            if self.schedule_id in _cancelled_local:
+                return True
+
+        now = time.monotonic()
+        if now - self._last_poll < settings.SOLVER_CANCEL_POLL_SECONDS:
+            return False
+        self._last_poll = now
+
+        if self._fetch_status() == "cancelled":
+            request_cancel(self.schedule_id)
+            return True
+        return False
+
+    async def is_cancelled_async(self) -> bool:
+        """Mesma checagem, com a consulta aguardada no pool de background (não trava o loop)."""
+        from app.db.session import BackgroundSessionLocal
+        from app.models.schedule import Schedule
+
+        with _lock:
+            if self.schedule_id in _cancelled_local:
+                return True
+
+        try:
+            async with BackgroundSessionLocal() as session:
+                result = await session.execute(select(Schedule.status).where(Schedule.id == self.schedule_id))
+                status = result.scalar_one_or_none()
+        except Exception as e:
+            print(f"--> [Cancelamento] Falha ao consultar status da geração {self.schedule_id}: {e}")
+            return False
+
+        if status == "cancelled":
+            request_cancel(self.schedule_id)
+            return True
+        return False
+
+    def _fetch_status(self):
+        from app.db.session import WorkerSessionLocal
+        from app.models.schedule import Schedule
+        from app.utils.helpers import run_coroutine_sync
+
+        async def fetch():
+            async with WorkerSessionLocal() as session:
+                result = await session.execute(select(Schedule.status).where(Schedule.id == self.schedule_id))
+                return result.scalar_one_or_none()
+
+        try:
+            return run_coroutine_sync(fetch())
+        except Exception as e:
+            print(f"--> [Cancelamento] Falha ao consultar status da geração {self.schedule_id}: {e}")
+            return None
@@ -1 +1,172 @@
-# Detecta e explica restrições impeditivas
\ No newline at end of file
+# Detecta e explica restrições impeditivas
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+from ortools.sat.python import cp_model
+
+from app.services.schedule_generator import ScheduleGeneratorService
+
+
+def _names(items: List[Dict[str, Any]], fallback: str) -> Dict[int, str]:
+    return {i["id"]: i.get("name") or f"{fallback} {i['id']}" for i in items}
+
+
+def detect_conflicts(school_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Análise rápida (só contagens, sem solver) das causas óbvias de inviabilidade:
+
+      - SUBJECT_SLOTS: matéria com mais aulas semanais que horários livres
+        (professor disponível e dentro do turno da turma)
+      - SUBJECT_DAILY_LIMIT: weekly_lessons > max_daily_lessons x dias com horário livre
+      - TEACHER_OVERLOAD: carga semanal do professor > horários em que ele pode dar aula
+      - CLASS_GROUP_OVERLOAD: aulas semanais da turma > slots da semana no turno
+
+    Usa a mesma poda de horários do ScheduleGeneratorService.
+    Lista vazia não garante que o modelo é viável; só que não há conflito de contagem.
+    """
+    service = ScheduleGeneratorService(school_data)
+    blocked = service._blocked_teacher_slots()
+    group_windows = service._group_allowed_slots()
+    grid = service.grid
+    all_slots = set(range(grid.n_slots))
+
+    teachers = _names(service.teachers, "Prof.")
+    groups = _names(service.groups, "Turma")
+
+    conflicts = []
+    teacher_load = defaultdict(int)
+    teacher_windows = defaultdict(set)  # slots em que alguma turma do professor tem aula
+    group_load = defaultdict(int)
+
+    for s in service.subjects:
+        g_id, t_id, weekly = s.get("class_group_id"), s.get("teacher_id"), s.get("weekly_lessons") or 0
+        if not g_id or not t_id or not weekly:
+            continue
+
+        window = group_windows.get(g_id, all_slots)
+        teacher_load[t_id] += weekly
+        teacher_windows[t_id] |= window
+        group_load[g_id] += weekly
+
+        free_by_day = [
+            sum(1 for slot in grid.day_slots(d) if slot in window and (t_id, slot) not in blocked)
+            for d in range(grid.days)
+        ]
+        available = sum(free_by_day)
+        subject_name = s.get("name") or f"Matéria {s['id']}"
+
+        if weekly > available:
+            conflicts.append({
+                "type": "SUBJECT_SLOTS",
+                "subject_id": s["id"],
+                "teacher_id": t_id,
+                "class_group_id": g_id,
+                "required": weekly,
+                "available": available,
+                "message": (
+                    f"{subject_name} ({groups.get(g_id, g_id)}) precisa de {weekly} aulas, mas "
+                    f"{teachers.get(t_id, t_id)} só tem {available} horários livres no turno da turma."
+                ),
+            })
+            continue
+
+        max_daily = s.get("max_daily_lessons")
+        if max_daily is not None:
+            capacity = sum(min(max_daily, free) for free in free_by_day)
+            if weekly > capacity:
+                conflicts.append({
+                    "type": "SUBJECT_DAILY_LIMIT",
+                    "subject_id": s["id"],
+                    "teacher_id": t_id,
+                    "class_group_id": g_id,
+                    "required": weekly,
+                    "available": capacity,
+                    "message": (
+                        f"{subject_name} ({groups.get(g_id, g_id)}) precisa de {weekly} aulas, mas com "
+                        f"no máximo {max_daily} por dia só cabem {capacity}."
+                    ),
+                })
+
+    for t_id, load in teacher_load.items():
+        available = sum(1 for slot in teacher_windows[t_id] if (t_id, slot) not in blocked)
+        if load > available:
+            conflicts.append({
+                "type": "TEACHER_OVERLOAD",
+                "teacher_id": t_id,
+                "required": load,
+                "available": available,
+                "message": (
+                    f"{teachers.get(t_id, f'Prof. {t_id}')} tem {load} aulas na semana, "
+                    f"mas só {available} horários disponíveis."
+                ),
+            })
+
+    for g_id, load in group_load.items():
+        available = len(group_windows.get(g_id, all_slots))
+        if load > available:
+            conflicts.append({
+                "type": "CLASS_GROUP_OVERLOAD",
+                "class_group_id": g_id,
+                "required": load,
+                "available": available,
+                "message": (
+                    f"{groups.get(g_id, f'Turma {g_id}')} tem {load} aulas na semana, "
+                    f"mas o turno só tem {available} horários."
+                ),
+            })
+
+    return conflicts
+
+
+def find_infeasible_subset(
+        school_data: Dict[str, Any],
+        max_time_in_seconds: float = 10.0
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Conjunto mínimo de regras que, juntas, tornam a grade impossível (MIS).
+
+    Cada carga semanal e cada limite diário de matéria vira uma restrição
+    condicionada a um literal de suposição (assumption). O CP-SAT devolve um
+    núcleo inviável (SufficientAssumptionsForInfeasibility), que é reduzido por
+    deleção: tira uma regra por vez e, se continuar inviável, ela não era necessária.
+    Choques de horário e indisponibilidades ficam como regras fixas.
+
+    Retorna None se o modelo não for comprovadamente inviável dentro do tempo.
+    """
+    deadline = time.monotonic() + max_time_in_seconds
+
+    service = ScheduleGeneratorService(school_data)
+    service.track_assumptions = True
+    service.build_model()
+
+    model = service.model
+    literals = {lit.Index(): lit for lit in service.assumption_literals}
+
+    def solve(assumptions: List[int]) -> Any:
+        model.ClearAssumptions()
+        model.AddAssumptions([literals[i] for i in assumptions])
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = max(0.1, deadline - time.monotonic())
+        solver.parameters.num_search_workers = 1  # núcleos de suposições exigem busca sequencial
+        return solver, solver.Solve(model)
+
+    solver, status = solve(list(literals))
+    if status != cp_model.INFEASIBLE:
+        return None
+
+    # Núcleo vazio (ex.: provado no presolve): parte de todas as regras
+    core = list(solver.SufficientAssumptionsForInfeasibility()) or list(literals)
+
+    i = 0
+    while i < len(core) and time.monotonic() < deadline:
+        candidate = core[:i] + core[i + 1:]
+        solver, status = solve(candidate)
+        if status == cp_model.INFEASIBLE:
+            # Continua inviável sem a regra i: descarta-a (e o que o novo núcleo também dispensar)
+            reduced = set(solver.SufficientAssumptionsForInfeasibility())
+            core = [c for c in candidate if c in reduced] if reduced else candidate
+        else:
+            i += 1
+
+    return [service.assumptions[index] for index in core]
@@ -0,0 +1,236 @@
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from app.core.config import settings
+from app.services.conflict_detector import detect_conflicts
+from app.services.schedule_generator import resolve_solver_params, run_solver
+
+# Chaves do school_data que valem para a escola inteira e são copiadas em todo componente
+SHARED_KEYS = ("time_grid", "slot_times", "shift_windows", "minimize_changes")
+
+# Estatísticas que somam entre componentes (o resto é por componente)
+SUMMED_STATS = ("variables_created", "variables_pruned", "num_branches", "num_conflicts",
+                "num_constraints", "lessons_moved")
+
+
+class _UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, node):
+        self.parent.setdefault(node, node)
+        root = node
+        while self.parent[root] != root:
+            root = self.parent[root]
+        # Compressão de caminho
+        while self.parent[node] != root:
+            self.parent[node], node = root, self.parent[node]
+        return root
+
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[root_b] = root_a
+
+
+def split_components(school_data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Divide a escola em subproblemas independentes.
+
+    Monta o grafo turma–professor a partir das disciplinas: turmas que compartilham
+    (direta ou indiretamente) algum professor ficam no mesmo componente. Turnos que
+    não dividem professores viram componentes separados e podem ser resolvidos à parte.
+    """
+    uf = _UnionFind()
+    for s in school_data.get("subjects", []):
+        g_id, t_id = s.get("class_group_id"), s.get("teacher_id")
+        if g_id and t_id:
+            uf.union(("g", g_id), ("t", t_id))
+
+    # Só entram no particionamento os nós que têm alguma aula
+    components: Dict[Any, Dict[str, Any]] = {}
+
+    def component_of(node) -> Optional[Dict[str, Any]]:
+        if node not in uf.parent:
+            return None
+        root = uf.find(node)
+        if root not in components:
+            components[root] = {
+                "teachers": [], "class_groups": [], "subjects": [],
+                "constraints": [], "availabilities": [], "previous_lessons": [],
+                "_group_ids": set(), "_teacher_ids": set(),
+            }
+            for key in SHARED_KEYS:
+                if key in school_data:
+                    components[root][key] = school_data[key]
+        return components[root]
+
+    for s in school_data.get("subjects", []):
+        comp = component_of(("g", s.get("class_group_id")))
+        if comp is not None:
+            comp["subjects"].append(s)
+
+    for g in school_data.get("class_groups", []):
+        comp = component_of(("g", g["id"]))
+        if comp is not None:
+            comp["class_groups"].append(g)
+            comp["_group_ids"].add(g["id"])
+
+    for t in school_data.get("teachers", []):
+        comp = component_of(("t", t["id"]))
+        if comp is not None:
+            comp["teachers"].append(t)
+            comp["_teacher_ids"].add(t["id"])
+
+    for a in school_data.get("availabilities", []):
+        comp = component_of(("t", a.get("teacher_id")))
+        if comp is not None:
+            comp["availabilities"].append(a)
+
+    for lesson in school_data.get("previous_lessons", []) or []:
+        comp = component_of(("g", lesson[0]))
+        if comp is not None:
+            comp["previous_lessons"].append(lesson)
+
+    for c in school_data.get("constraints", []):
+        data = c.get("data") or {}
+        if data.get("teacher_id") is not None:
+            targets = [component_of(("t", data["teacher_id"]))]
+        elif data.get("class_group_id") is not None:
+            targets = [component_of(("g", data["class_group_id"]))]
+        else:
+            # Regra da escola toda: vale para todos os componentes
+            targets = list(components.values())
+        for comp in targets:
+            if comp is not None:
+                comp["constraints"].append(c)
+
+    result = []
+    for comp in components.values():
+        comp.pop("_group_ids")
+        comp.pop("_teacher_ids")
+        result.append(comp)
+    return result
+
+
+def _merge_results(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Junta os resultados dos componentes em um único retorno, no formato do solve()."""
+    stats: Dict[str, Any] = {key: 0 for key in SUMMED_STATS}
+    stats["components"] = len(results)
+    stats["component_stats"] = [r.get("stats") or {} for r in results]
+
+    for comp_stats in stats["component_stats"]:
+        for key in SUMMED_STATS:
+            stats[key] += comp_stats.get(key) or 0
+
+    # Os componentes rodam em paralelo: o tempo total é o do mais lento
+    stats["wall_time"] = max((s.get("wall_time") or 0 for s in stats["component_stats"]), default=0)
+
+    if any(r.get("status") == "cancelled" for r in results):
+        return {"status": "cancelled", "stats": stats}
+
+    failed = [i for i, r in enumerate(results) if r.get("status") != "success"]
+    if failed:
+        error = {
+            "status": "error",
+            "error": "Impossível gerar grade. Conflito de restrições ou falta de tempo.",
+            "failed_components": failed,
+            "stats": stats,
+        }
+        conflicts = [c for i in failed for c in results[i].get("conflicts") or []]
+        if conflicts:
+            error["conflicts"] = conflicts
+        return error
+
+    lessons = []
+    for r in results:
+        lessons.extend(r.get("result") or [])
+    return {"status": "success", "result": lessons, "stats": stats}
+
+
+def _use_processes() -> bool:
+    # Processos daemon (ex.: workers prefork do Celery) não podem criar filhos, e com
+    # PROGRESS_BACKEND="memory" os eventos têm de ser publicados neste processo (é aqui
+    # que estão os assinantes do SSE). Nesses casos usa threads: o CP-SAT libera o GIL
+    # durante a busca.
+    return not multiprocessing.current_process().daemon and settings.PROGRESS_BACKEND != "memory"
+
+
+def _component_callback(progress_callback, component: int, partials, n_components: int):
+    if progress_callback is None:
+        return None
+    # ProgressReporter marca de qual componente veio o evento e junta as parciais em `partials`
+    for_component = getattr(progress_callback, "for_component", None)
+    return for_component(component, partials, n_components) if for_component else progress_callback
+
+
+def _solve_components(pool: Optional[Executor], components, component_params, progress_callback,
+                      should_stop, partials) -> Dict[str, Any]:
+    """Resolve os componentes (no pool, ou em sequência sem pool) e junta os resultados."""
+    calls = [
+        (c, component_params, _component_callback(progress_callback, i, partials, len(components)), should_stop)
+        for i, c in enumerate(components)
+    ]
+    if pool is None:
+        return _merge_results([run_solver(*args) for args in calls])
+    futures = [pool.submit(run_solver, *args) for args in calls]
+    return _merge_results([f.result() for f in futures])
+
+
+def solve_school(
+        school_data: Dict[str, Any],
+        solver_params: Optional[Dict[str, Any]] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        should_stop: Optional[Callable[[], bool]] = None
+) -> Dict[str, Any]:
+    """
+    Ponto de entrada do executor do solver: decompõe a escola em componentes
+    independentes, resolve cada um em paralelo e junta os resultados.
+    Com um só componente (ou SOLVER_DECOMPOSE=False) é o mesmo que run_solver.
+    progress_callback e should_stop precisam ser picklable quando os componentes
+    vão para processos.
+    """
+    solver_params = solver_params or resolve_solver_params()
+
+    # Conflitos de contagem: rejeita em milissegundos, sem ocupar o solver
+    if settings.CONFLICT_PRECHECK:
+        conflicts = detect_conflicts(school_data)
+        if conflicts:
+            print(f"--> [Conflitos] {len(conflicts)} conflitos encontrados antes do solver.")
+            return {
+                "status": "error",
+                "error": "Impossível gerar grade. Há regras que não cabem na semana.",
+                "conflicts": conflicts,
+                "stats": {"precheck": True},
+            }
+
+    if not settings.SOLVER_DECOMPOSE:
+        return run_solver(school_data, solver_params, progress_callback, should_stop)
+
+    components = split_components(school_data)
+    if len(components) <= 1:
+        return run_solver(school_data, solver_params, progress_callback, should_stop)
+
+    # Componentes maiores primeiro: melhor balanceamento no pool
+    components.sort(key=lambda c: len(c["subjects"]), reverse=True)
+    n_parallel = max(1, min(len(components), settings.SOLVER_COMPONENT_WORKERS))
+
+    # Divide os workers de busca entre os componentes que rodam ao mesmo tempo
+    component_params = dict(solver_params)
+    component_params["num_search_workers"] = max(1, solver_params["num_search_workers"] // n_parallel)
+
+    print(f"--> [Decomposição] {len(components)} componentes independentes, {n_parallel} em paralelo.")
+
+    if n_parallel == 1:
+        return _solve_components(None, components, component_params, progress_callback, should_stop, {})
+
+    if not _use_processes():
+        with ThreadPoolExecutor(max_workers=n_parallel) as pool:
+            return _solve_components(pool, components, component_params, progress_callback, should_stop, {})
+
+    context = multiprocessing.get_context("spawn")
+    with context.Manager() as manager, ProcessPoolExecutor(max_workers=n_parallel, mp_context=context) as pool:
+        # Parciais dos componentes compartilhadas entre os processos (juntadas em ProgressReporter)
+        partials = manager.dict() if progress_callback is not None else None
+        return _solve_components(pool, components, component_params, progress_callback, should_stop, partials)
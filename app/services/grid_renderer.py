@@ -0,0 +1,157 @@
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.class_group import ClassGroup
+from app.models.schedule import Schedule
+from app.models.school import School
+from app.models.subject import Subject
+from app.models.teacher import Teacher
+from app.services.lesson_index import DAYS_MAP, load_lessons
+from app.services.time_grid import TimeGrid
+from app.utils.cache import LRUCache
+
+# (schedule_id, catalog_version) -> grade pronta. Grades concluídas não mudam;
+# só os nomes podem mudar, e aí o catalog_version da escola muda junto.
+grid_cache = LRUCache(maxsize=settings.GRID_CACHE_SIZE)
+
+
+def grid_etag(schedule_id: int, catalog_version: int) -> str:
+    return f'W/"grid-{schedule_id}-{catalog_version}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    If-None-Match contém o ETag? Lista separada por vírgulas ou "*", comparação
+    fraca (W/ ignorado), como manda a RFC 9110 para o If-None-Match.
+    """
+    tags = [t.strip() for t in (if_none_match or "").split(",") if t.strip()]
+    if "*" in tags:
+        return True
+
+    def opaque(tag: str) -> str:
+        return tag[2:] if tag.startswith("W/") else tag
+
+    return any(opaque(t) == opaque(etag) for t in tags)
+
+
+async def load_name_maps(db: AsyncSession, school_id: int) -> Dict[str, Dict[int, str]]:
+    """Nomes de professores, matérias e turmas da escola para traduzir os IDs."""
+    t_res = await db.execute(select(Teacher.id, Teacher.name).where(Teacher.school_id == school_id))
+    s_res = await db.execute(select(Subject.id, Subject.name).where(Subject.school_id == school_id))
+    c_res = await db.execute(select(ClassGroup.id, ClassGroup.name).where(ClassGroup.school_id == school_id))
+    return {
+        "teachers": {t.id: t.name for t in t_res.all()},
+        "subjects": {s.id: s.name for s in s_res.all()},
+        "classes": {c.id: c.name for c in c_res.all()},
+    }
+
+
+async def load_time_grid(db: AsyncSession, school_id: int) -> TimeGrid:
+    res = await db.execute(select(School.time_grid).where(School.id == school_id))
+    return TimeGrid.from_config(res.scalar_one_or_none())
+
+
+def build_grid(
+        lessons: List[Dict[str, Any]],
+        names: Dict[str, Dict[int, str]],
+        time_grid: Optional[TimeGrid] = None
+) -> Dict[str, Any]:
+    """
+    Monta a grade visual a partir das aulas, no formato da semana da escola.
+    Estrutura: { "Nome da Turma": { "Segunda": [Aula1, Aula2...], "Terça": ... } }
+    """
+    teachers_map, subjects_map, classes_map = names["teachers"], names["subjects"], names["classes"]
+    time_grid = time_grid or TimeGrid()
+    days, slots = time_grid.days, time_grid.slots_per_day
+    grid = {}
+
+    # Inicializa a estrutura vazia para todas as turmas que estão na solução
+    for item in lessons:
+        c_id = item['class_group_id']
+        c_name = classes_map.get(c_id, f"Turma {c_id}")
+
+        if c_name not in grid:
+            grid[c_name] = {}
+            for d in range(days):
+                day_name = DAYS_MAP[d]
+                grid[c_name][day_name] = [None] * slots  # horários vazios
+
+    # Preenche os horários
+    for item in lessons:
+        c_id = item['class_group_id']
+        t_id = item['teacher_id']
+        s_id = item['subject_id']
+        day = item['day_of_week']  # 0 = Segunda
+        period = item['period']  # 0 = primeiro horário
+
+        c_name = classes_map.get(c_id, f"Turma {c_id}")
+        t_name = teachers_map.get(t_id, f"Prof. {t_id}")
+        s_name = subjects_map.get(s_id, f"Matéria {s_id}")
+        day_name = DAYS_MAP.get(day, f"Dia {day}")
+
+        # Proteção contra índices fora do limite (caso mude regra de slots)
+        if day_name in grid[c_name] and 0 <= period < slots:
+            grid[c_name][day_name][period] = {
+                "materia": s_name,
+                "professor": t_name
+            }
+
+    return grid
+
+
+async def materialize_grid(db: AsyncSession, schedule: Schedule, lessons: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Monta a grade de um agendamento concluído e grava em Schedule.grid_data,
+    junto com a versão do catálogo de nomes usada. Não faz commit.
+    """
+    version_res = await db.execute(
+        select(School.catalog_version, School.time_grid).where(School.id == schedule.school_id)
+    )
+    school = version_res.one()
+    catalog_version = school.catalog_version or 0
+
+    names = await load_name_maps(db, schedule.school_id)
+    grid = build_grid(lessons, names, TimeGrid.from_config(school.time_grid))
+
+    schedule.grid_data = grid
+    schedule.grid_catalog_version = catalog_version
+    grid_cache.set((schedule.id, catalog_version), grid)
+    return grid
+
+
+async def get_completed_grid(
+        db: AsyncSession,
+        schedule_id: int,
+        catalog_version: int,
+        stored_version: Optional[int]
+) -> Dict[str, Any]:
+    """
+    Grade de um agendamento concluído: memória -> grid_data gravado -> remonta
+    (e regrava) se os nomes mudaram desde a última materialização.
+    """
+    grid = grid_cache.get((schedule_id, catalog_version))
+    if grid is not None:
+        return grid
+
+    if stored_version == catalog_version:
+        res = await db.execute(select(Schedule.grid_data).where(Schedule.id == schedule_id))
+        grid = res.scalar_one_or_none()
+
+    if grid is None:
+        res = await db.execute(select(Schedule.school_id).where(Schedule.id == schedule_id))
+        school_id = res.scalar_one()
+        names = await load_name_maps(db, school_id)
+        grid = build_grid(await load_lessons(db, schedule_id), names, await load_time_grid(db, school_id))
+
+        await db.execute(
+            update(Schedule)
+            .where(Schedule.id == schedule_id)
+            .values(grid_data=grid, grid_catalog_version=catalog_version)
+        )
+        await db.commit()
+
+    grid_cache.set((schedule_id, catalog_version), grid)
+    return grid
@@ -0,0 +1,132 @@
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.bulk import bulk_insert
+from app.models.class_group import ClassGroup
+from app.models.schedule import Schedule
+from app.models.schedule_lesson import ScheduleLesson
+from app.models.subject import Subject
+from app.models.teacher import Teacher
+from app.services.schedule_generator import DAY_NAMES
+
+# Nomes completos, para as colunas da grade renderizada (grid_renderer)
+DAYS_MAP = {0: "Segunda", 1: "Terça", 2: "Quarta", 3: "Quinta", 4: "Sexta", 5: "Sábado", 6: "Domingo"}
+LESSON_COLUMNS = ("schedule_id", "class_group_id", "teacher_id", "subject_id", "day", "period")
+
+
+def lesson_view(class_group_id: int, teacher_id: int, subject_id: int, day: int, period: int) -> Dict[str, Any]:
+    """Aula no formato JSON da API (o mesmo que o solver devolve)."""
+    return {
+        "class_group_id": class_group_id,
+        "teacher_id": teacher_id,
+        "subject_id": subject_id,
+        "day_of_week": day,
+        "day_name": DAY_NAMES.get(day),
+        "period": period,
+        "period_index": period + 1,
+    }
+
+
+async def store_lessons(session: AsyncSession, schedule_id: int, lessons: List[Dict[str, Any]]) -> None:
+    """
+    (Re)grava as aulas da grade na tabela schedule_lesson em lote:
+    COPY no Postgres (asyncpg), executemany nos outros bancos.
+    Não faz commit: roda na mesma transação que grava o status.
+    """
+    await session.execute(delete(ScheduleLesson).where(ScheduleLesson.schedule_id == schedule_id))
+    if not lessons:
+        return
+
+    records = [
+        (schedule_id, l["class_group_id"], l["teacher_id"], l["subject_id"], l["day_of_week"], l["period"])
+        for l in lessons
+    ]
+    # Mesma conexão (e transação) da sessão; o DELETE acima já abriu a transação
+    await bulk_insert(session, ScheduleLesson, LESSON_COLUMNS, records)
+
+
+async def load_lesson_tuples(db: AsyncSession, schedule_id: int) -> List[Tuple[int, int, int, int, int]]:
+    """Aulas de uma grade concluída como tuplas (g, t, s, d, h)."""
+    result = await db.execute(
+        select(
+            ScheduleLesson.class_group_id,
+            ScheduleLesson.teacher_id,
+            ScheduleLesson.subject_id,
+            ScheduleLesson.day,
+            ScheduleLesson.period,
+        )
+        .where(ScheduleLesson.schedule_id == schedule_id)
+        .order_by(ScheduleLesson.class_group_id, ScheduleLesson.day, ScheduleLesson.period)
+    )
+    return [tuple(row) for row in result.all()]
+
+
+async def load_lessons(db: AsyncSession, schedule_id: int) -> List[Dict[str, Any]]:
+    """Aulas de uma grade concluída, montadas no formato JSON na leitura."""
+    return [lesson_view(*row) for row in await load_lesson_tuples(db, schedule_id)]
+
+
+async def schedule_result(db: AsyncSession, schedule: Schedule) -> Any:
+    """
+    result_data como a API sempre devolveu ({"lessons", "stats"}).
+    Grades concluídas guardam só as métricas no JSON; as aulas vêm da schedule_lesson.
+    Soluções parciais (em andamento) e erros continuam inteiros no result_data.
+    """
+    if schedule.status != "completed":
+        return schedule.result_data
+
+    schedule_id, result_data = schedule.id, schedule.result_data
+    stats = result_data.get("stats") if isinstance(result_data, dict) else None
+
+    return {"lessons": await load_lessons(db, schedule_id), "stats": stats}
+
+
+async def query_lessons(
+        db: AsyncSession,
+        schedule_id: int,
+        teacher_id: Optional[int] = None,
+        class_group_id: Optional[int] = None,
+        day: Optional[int] = None,
+        period: Optional[int] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Aulas de uma grade filtradas pelo índice, já com os nomes.
+    Custo proporcional às aulas devolvidas, não ao tamanho da escola.
+    """
+    query = (
+        select(
+            ScheduleLesson.day,
+            ScheduleLesson.period,
+            ScheduleLesson.class_group_id,
+            ClassGroup.name.label("class_group"),
+            ScheduleLesson.teacher_id,
+            Teacher.name.label("teacher"),
+            ScheduleLesson.subject_id,
+            Subject.name.label("subject"),
+        )
+        .outerjoin(ClassGroup, ClassGroup.id == ScheduleLesson.class_group_id)
+        .outerjoin(Teacher, Teacher.id == ScheduleLesson.teacher_id)
+        .outerjoin(Subject, Subject.id == ScheduleLesson.subject_id)
+        .where(ScheduleLesson.schedule_id == schedule_id)
+        .order_by(ScheduleLesson.day, ScheduleLesson.period)
+    )
+    if teacher_id is not None:
+        query = query.where(ScheduleLesson.teacher_id == teacher_id)
+    if class_group_id is not None:
+        query = query.where(ScheduleLesson.class_group_id == class_group_id)
+    if day is not None:
+        query = query.where(ScheduleLesson.day == day)
+    if period is not None:
+        query = query.where(ScheduleLesson.period == period)
+
+    result = await db.execute(query)
+    return [
+        {
+            **row._mapping,
+            "day_name": DAY_NAMES.get(row.day),
+            "period_index": row.period + 1,
+        }
+        for row in result.all()
+    ]
@@ -1 +1,214 @@
-# Minimiza janelas vagas, otimiza dias
\ No newline at end of file
+# Regras desejáveis (soft) e critérios de parada da otimização
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional
+
+# Constraint.weight: 100 (ou mais) = obrigatória; abaixo disso = desejável, e o peso
+# vira o custo de cada violação na função objetivo
+HARD_WEIGHT = 100
+
+# Tipos de Constraint tratados aqui (TEACHER_UNAVAILABILITY com peso 100 é poda no gerador)
+SOFT_TYPES = (
+    "TEACHER_UNAVAILABILITY",  # {"teacher_id", "day_of_week", "period"?}
+    "TEACHER_PREFERRED_DAYS",  # {"teacher_id", "days": [0, 2, 4]}
+    "TEACHER_GAPS",  # {"teacher_id"?}: evita janelas (horário vago entre duas aulas no dia)
+    "CONSECUTIVE_LESSONS",  # {"subject_id"?}: prefere aulas em dupla (horários seguidos)
+    "SPREAD_LESSONS",  # {"subject_id"?}: prefere no máximo uma aula da matéria por dia
+)
+
+
+def is_hard(constraint: Dict[str, Any]) -> bool:
+    weight = constraint.get("weight")
+    return weight is None or weight >= HARD_WEIGHT
+
+
+class SoftConstraintCompiler:
+    """
+    Traduz as regras desejáveis do school_data em termos da função objetivo do
+    ScheduleGeneratorService (service.objective_terms), com codificações lineares:
+    nenhuma regra cria variáveis por par de aulas, só por (professor|matéria, slot).
+
+    Uma regra desses tipos com peso 100 vira restrição obrigatória (violações == 0).
+    """
+
+    def __init__(self, service):
+        self.service = service
+        self.model = service.model
+        self.stats = defaultdict(int)
+
+        self.grid = service.grid
+        # (matéria, slot) -> variável; uma matéria tem uma só turma e um só professor
+        self.by_subject_slot = {(s, slot): var for (g, t, s, slot), var in service.vars.items()}
+        self.subject_ids = {s['id'] for s in service.subjects}
+        self.teacher_ids = {s['teacher_id'] for s in service.subjects if s.get('teacher_id')}
+
+    def compile(self) -> Dict[str, int]:
+        for c in self.service.data.get("constraints", []):
+            if c.get("type") not in SOFT_TYPES:
+                continue
+            # Indisponibilidade obrigatória já foi aplicada como poda de domínio
+            if c["type"] == "TEACHER_UNAVAILABILITY" and is_hard(c):
+                continue
+
+            handler = getattr(self, f"_{c['type'].lower()}")
+            handler(c.get("data") or {}, c.get("weight"))
+            self.stats[c["type"]] += 1
+
+        return dict(self.stats)
+
+    # ------------------------------------------------------------------
+    def _penalize(self, violations: List[Any], weight: Optional[int]) -> None:
+        """Soma das violações: == 0 se a regra for obrigatória, senão custo weight por violação."""
+        if not violations:
+            return
+        if weight is None or weight >= HARD_WEIGHT:
+            self.model.Add(sum(violations) == 0)
+        elif weight > 0:
+            self.service.objective_terms.append(weight * sum(violations))
+
+    def _teacher_vars(self, t_id: int, slots) -> List[Any]:
+        return [v for slot in slots for v in self.service.vars_by_teacher_slot.get((t_id, slot), [])]
+
+    def _selected(self, data: Dict[str, Any], key: str, all_ids: set) -> set:
+        # Sem id na regra = vale para todos
+        return {data[key]} & all_ids if data.get(key) is not None else all_ids
+
+    # ------------------------------------------------------------------
+    def _teacher_unavailability(self, data: Dict[str, Any], weight: Optional[int]) -> None:
+        t_id, day = data.get("teacher_id"), data.get("day_of_week")
+        if t_id is None or day is None:
+            return
+        periods = [data["period"]] if data.get("period") is not None else range(self.grid.slots_per_day)
+        self._penalize(self._teacher_vars(t_id, [self.grid.slot(day, h) for h in periods]), weight)
+
+    def _teacher_preferred_days(self, data: Dict[str, Any], weight: Optional[int]) -> None:
+        t_id, days = data.get("teacher_id"), set(data.get("days") or [])
+        if t_id is None or not days:
+            return
+        other_days = [slot for d in range(self.grid.days) if d not in days for slot in self.grid.day_slots(d)]
+        self._penalize(self._teacher_vars(t_id, other_days), weight)
+
+    def _teacher_gaps(self, data: Dict[str, Any], weight: Optional[int]) -> None:
+        """
+        Janela no horário h = já deu aula antes de h, ainda vai dar depois e está livre em h.
+        started[h] / ending[h] são o OR prefixo / sufixo da ocupação; como o objetivo os
+        empurra para baixo, bastam as desigualdades de limite inferior.
+        """
+        slots = self.grid.slots_per_day
+        for t_id in self._selected(data, "teacher_id", self.teacher_ids):
+            for d in range(self.grid.days):
+                # Ocupação do professor em cada horário do dia: 0/1 (AddAtMostOne no gerador)
+                busy = [sum(self._teacher_vars(t_id, [slot])) for slot in self.grid.day_slots(d)]
+                possible = [
+                    h for h, slot in enumerate(self.grid.day_slots(d))
+                    if self.service.vars_by_teacher_slot.get((t_id, slot))
+                ]
+                if len(possible) < 2:
+                    continue
+
+                started = [self.model.NewBoolVar(f"started_t{t_id}_d{d}_h{h}") for h in range(slots)]
+                ending = [self.model.NewBoolVar(f"ending_t{t_id}_d{d}_h{h}") for h in range(slots)]
+                for h in range(slots):
+                    self.model.Add(started[h] >= busy[h])
+                    self.model.Add(ending[h] >= busy[h])
+                    if h > 0:
+                        self.model.Add(started[h] >= started[h - 1])
+                    if h < slots - 1:
+                        self.model.Add(ending[h] >= ending[h + 1])
+
+                gaps = []
+                for h in range(possible[0] + 1, possible[-1]):
+                    gap = self.model.NewBoolVar(f"gap_t{t_id}_d{d}_h{h}")
+                    self.model.Add(gap >= started[h - 1] + ending[h + 1] - 1 - busy[h])
+                    gaps.append(gap)
+                self._penalize(gaps, weight)
+
+    def _consecutive_lessons(self, data: Dict[str, Any], weight: Optional[int]) -> None:
+        """
+        Aulas avulsas (fora de uma dupla) no dia. pair[h] = aula em h e em h+1, com duplas
+        sem sobreposição; avulsas = aulas do dia - 2 x duplas. Horários separados por
+        intervalo não formam dupla.
+        """
+        for s_id in self._selected(data, "subject_id", self.subject_ids):
+            for d in range(self.grid.days):
+                day_slots = self.grid.day_slots(d)
+                day_vars = [self.by_subject_slot.get((s_id, slot)) for slot in day_slots]
+                if sum(v is not None for v in day_vars) < 2:
+                    continue
+
+                pairs = []
+                for h in range(len(day_vars) - 1):
+                    a, b = day_vars[h], day_vars[h + 1]
+                    if a is None or b is None or not self.grid.is_consecutive(day_slots[h]):
+                        pairs.append(None)
+                        continue
+                    pair = self.model.NewBoolVar(f"pair_s{s_id}_d{d}_h{h}")
+                    self.model.Add(pair <= a)
+                    self.model.Add(pair <= b)
+                    if pairs and pairs[-1] is not None:
+                        self.model.Add(pair + pairs[-1] <= 1)
+                    pairs.append(pair)
+
+                singles = sum(v for v in day_vars if v is not None) - 2 * sum(p for p in pairs if p is not None)
+                self._penalize([singles], weight)
+
+    def _spread_lessons(self, data: Dict[str, Any], weight: Optional[int]) -> None:
+        """Excesso no dia = aulas da matéria no dia além da primeira."""
+        for s_id in self._selected(data, "subject_id", self.subject_ids):
+            for d in range(self.grid.days):
+                daily_vars = self.service.vars_by_subject_day.get((s_id, d))
+                if not daily_vars or len(daily_vars) < 2:
+                    continue
+                excess = self.model.NewIntVar(0, len(daily_vars) - 1, f"excess_s{s_id}_d{d}")
+                self.model.Add(excess >= sum(daily_vars) - 1)
+                self._penalize([excess], weight)
+
+
+class ImprovementTracker:
+    """
+    Critérios de parada antecipada da otimização, avaliados a cada solução nova
+    (record) e periodicamente pela thread de vigia (stalled):
+
+      - no_improvement_seconds: para se o objetivo não melhora há N segundos
+      - min_relative_improvement: melhoras menores que essa fração do objetivo
+        não contam como melhora (não reiniciam a janela)
+
+    O gap relativo (relative_gap_limit) é parâmetro nativo do CP-SAT.
+    """
+
+    def __init__(self, no_improvement_seconds: Optional[float], min_relative_improvement: float = 0.0):
+        self.no_improvement_seconds = no_improvement_seconds
+        self.min_relative_improvement = min_relative_improvement
+        self.best: Optional[float] = None
+        self.last_improvement_at: Optional[float] = None
+        self.stop_reason: Optional[str] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_params(cls, params: Dict[str, Any]) -> Optional["ImprovementTracker"]:
+        window = params.get("no_improvement_seconds")
+        if not window:
+            return None
+        return cls(window, params.get("min_relative_improvement") or 0.0)
+
+    def record(self, objective: float) -> None:
+        with self._lock:
+            if self.best is None:
+                improved = True
+            else:
+                threshold = abs(self.best) * self.min_relative_improvement
+                improved = self.best - objective > threshold
+            if improved:
+                self.last_improvement_at = time.monotonic()
+            if self.best is None or objective < self.best:
+                self.best = objective
+
+    def stalled(self) -> bool:
+        with self._lock:
+            if self.last_improvement_at is None:
+                return False  # Sem solução ainda: quem limita é o max_time_in_seconds
+            if time.monotonic() - self.last_improvement_at < self.no_improvement_seconds:
+                return False
+            self.stop_reason = f"sem melhora em {self.no_improvement_seconds:g}s"
+            return True
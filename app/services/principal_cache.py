@@ -0,0 +1,150 @@
+import json
+import time
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.utils.cache import LRUCache
+
+REDIS_KEY = "auth:principal:{user_id}"
+REDIS_STALE_KEY = "auth:principal:stale:{user_id}"
+
+# Dados do usuário que vão no token e no cache (o suficiente para os endpoints)
+PRINCIPAL_FIELDS = ("id", "email", "role", "school_id", "tenant_id")
+CLAIM_FIELDS = ("role", "school_id", "tenant_id")
+
+
+class Principal:
+    """
+    Usuário autenticado, sem vínculo com a sessão do banco: é o que o get_current_user
+    devolve. Os endpoints só leem id, school_id, role... como fariam com o model User.
+    """
+
+    def __init__(self, id: int, email: Optional[str] = None, role: Optional[str] = None,
+                 school_id: Optional[int] = None, tenant_id: Optional[int] = None):
+        self.id = id
+        self.email = email
+        self.role = role
+        self.school_id = school_id
+        self.tenant_id = tenant_id
+
+    @classmethod
+    def from_user(cls, user) -> "Principal":
+        return cls(**{f: getattr(user, f) for f in PRINCIPAL_FIELDS})
+
+    @classmethod
+    def from_claims(cls, payload: Dict[str, Any]) -> Optional["Principal"]:
+        """Principal a partir do token, se ele trouxer os claims (tokens antigos não trazem)."""
+        if not all(f in payload for f in CLAIM_FIELDS):
+            return None
+        return cls(id=int(payload["sub"]), **{f: payload[f] for f in CLAIM_FIELDS})
+
+    def claims(self) -> Dict[str, Any]:
+        return {f: getattr(self, f) for f in CLAIM_FIELDS}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {f: getattr(self, f) for f in PRINCIPAL_FIELDS}
+
+
+class PrincipalCache:
+    """
+    user_id -> Principal, para o get_current_user não ir ao banco a cada requisição.
+
+    Camadas: LRU em memória (limitado, com TTL), opcionalmente Redis
+    (PRINCIPAL_CACHE_REDIS) e os claims do próprio token. O banco só é consultado
+    quando nenhuma delas responde.
+
+    Alterar ou remover um usuário (models/events.py, depois do commit) apaga a entrada e marca o
+    usuário como "alterado em": tokens emitidos antes disso deixam de valer pelos
+    claims (podem estar desatualizados) e voltam a passar pelo banco.
+
+    A marca só é vista por todos os processos (e sobrevive a um restart) no Redis.
+    Sem ele, ou com ele fora do ar, os claims só valem até PRINCIPAL_CACHE_TTL_SECONDS
+    depois do iat; tokens mais velhos passam pelo banco e ficam no LRU local pelo
+    mesmo TTL. Assim nenhum processo usa dados de um usuário alterado por mais que
+    PRINCIPAL_CACHE_TTL_SECONDS.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.ttl = ttl
+        self._local = LRUCache(maxsize=maxsize, ttl=ttl)
+        # user_id -> instante (epoch) da última alteração; vale enquanto um token antigo puder valer
+        self._stale = LRUCache(maxsize=maxsize, ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+    async def get(self, user_id: int, payload: Dict[str, Any]) -> Optional[Principal]:
+        principal = self._local.get(user_id)
+        if principal is not None:
+            return principal
+
+        stale_since = self._stale.get(user_id)
+        stale_checked = False
+        if settings.PRINCIPAL_CACHE_REDIS:
+            try:
+                from app.core.redis_client import get_async_redis
+
+                redis = get_async_redis()
+                cached, remote_stale = await redis.mget(
+                    REDIS_KEY.format(user_id=user_id), REDIS_STALE_KEY.format(user_id=user_id)
+                )
+            except Exception as e:
+                print(f"--> [Auth] Redis indisponível: {e}")
+            else:
+                if cached is not None:
+                    principal = Principal(**json.loads(cached))
+                    self._local.set(user_id, principal)
+                    return principal
+                stale_checked = True
+                if remote_stale is not None:
+                    stale_since = max(stale_since or 0, float(remote_stale))
+
+        issued_at = payload.get("iat", 0)
+        # Token emitido antes da última alteração do usuário: claims não são confiáveis
+        if stale_since is not None and issued_at <= stale_since:
+            return None
+        # Sem a marca compartilhada, outro processo pode ter alterado o usuário: só tokens recentes
+        if not stale_checked and time.time() - issued_at > self.ttl:
+            return None
+
+        principal = Principal.from_claims(payload)
+        if principal is not None:
+            self._local.set(user_id, principal)
+        return principal
+
+    async def remember(self, principal: Principal) -> None:
+        self._local.set(principal.id, principal)
+
+        if settings.PRINCIPAL_CACHE_REDIS:
+            try:
+                from app.core.redis_client import get_async_redis
+
+                await get_async_redis().set(
+                    REDIS_KEY.format(user_id=principal.id),
+                    json.dumps(principal.to_dict()),
+                    ex=int(self.ttl),
+                )
+            except Exception as e:
+                print(f"--> [Auth] Redis indisponível: {e}")
+
+    def invalidate(self, user_id: int) -> None:
+        """Chamado depois do commit de escritas em User (síncrono: evento after_commit da sessão)."""
+        now = time.time()
+        self._local.delete(user_id)
+        self._stale.set(user_id, now)
+
+        if settings.PRINCIPAL_CACHE_REDIS:
+            try:
+                from app.core.redis_client import get_redis
+
+                redis = get_redis()
+                redis.delete(REDIS_KEY.format(user_id=user_id))
+                redis.set(
+                    REDIS_STALE_KEY.format(user_id=user_id), now,
+                    ex=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+                )
+            except Exception as e:
+                print(f"--> [Auth] Redis indisponível: {e}")
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,249 @@
+import asyncio
+import json
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+from sqlalchemy import update
+
+from app.core.config import settings
+
+PROGRESS_CHANNEL = "schedule:{schedule_id}:progress"
+LAST_EVENT_KEY = "schedule:{schedule_id}:last_event"
+LAST_EVENT_TTL = 3600
+
+
+class ProgressHub:
+    """
+    Pub/sub em memória para o progresso das gerações (PROGRESS_BACKEND="memory").
+    Publicação thread-safe: o CP-SAT chama o callback de dentro das threads do solver.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers: Dict[int, set] = {}
+        self._last_event: Dict[int, Dict[str, Any]] = {}
+
+    def publish(self, schedule_id: int, event: Dict[str, Any]) -> None:
+        with self._lock:
+            if event.get("type") == "done":
+                self._last_event.pop(schedule_id, None)
+            else:
+                self._last_event[schedule_id] = event
+            subscribers = list(self._subscribers.get(schedule_id, ()))
+
+        for queue, loop in subscribers:
+            loop.call_soon_threadsafe(queue.put_nowait, event)
+
+    def last_event(self, schedule_id: int) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._last_event.get(schedule_id)
+
+    def subscribe(self, schedule_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.setdefault(schedule_id, set()).add((queue, asyncio.get_running_loop()))
+        return queue
+
+    def unsubscribe(self, schedule_id: int, queue: asyncio.Queue) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(schedule_id, set())
+            subscribers.difference_update({s for s in subscribers if s[0] is queue})
+            if not subscribers:
+                self._subscribers.pop(schedule_id, None)
+
+
+progress_hub = ProgressHub()
+
+
+def publish_progress(schedule_id: int, event: Dict[str, Any]) -> None:
+    """Publica um evento de progresso no backend configurado (memória ou Redis)."""
+    if settings.PROGRESS_BACKEND == "redis":
+        from app.core.redis_client import get_redis
+
+        try:
+            payload = json.dumps(event)
+            redis = get_redis()
+            redis.publish(PROGRESS_CHANNEL.format(schedule_id=schedule_id), payload)
+            if event.get("type") != "done":
+                redis.set(LAST_EVENT_KEY.format(schedule_id=schedule_id), payload, ex=LAST_EVENT_TTL)
+        except Exception as e:
+            # Progresso é best-effort: nunca derruba a geração
+            print(f"--> [Progresso] Falha ao publicar no Redis: {e}")
+        return
+
+    progress_hub.publish(schedule_id, event)
+
+
+async def subscribe_progress(schedule_id: int) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Itera sobre os eventos de uma geração, começando pelo último conhecido.
+    Emite {"type": "keepalive"} a cada 15 s sem novidades.
+    """
+    if settings.PROGRESS_BACKEND == "redis":
+        from app.core.redis_client import get_async_redis
+
+        redis = get_async_redis()
+        pubsub = redis.pubsub()
+        await pubsub.subscribe(PROGRESS_CHANNEL.format(schedule_id=schedule_id))
+        try:
+            last = await redis.get(LAST_EVENT_KEY.format(schedule_id=schedule_id))
+            if last:
+                yield json.loads(last)
+            while True:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=15.0)
+                yield json.loads(message["data"]) if message else {"type": "keepalive"}
+        finally:
+            await pubsub.unsubscribe()
+            await pubsub.close()
+        return
+
+    queue = progress_hub.subscribe(schedule_id)
+    try:
+        last = progress_hub.last_event(schedule_id)
+        if last:
+            yield last
+        while True:
+            try:
+                yield await asyncio.wait_for(queue.get(), timeout=15.0)
+            except asyncio.TimeoutError:
+                yield {"type": "keepalive"}
+    finally:
+        progress_hub.unsubscribe(schedule_id, queue)
+
+
+class PartialResultWriter:
+    """
+    Grava as soluções parciais no banco numa thread própria: o callback do CP-SAT só
+    enfileira e a busca não espera a conexão nem o UPDATE.
+
+    Guarda só a snapshot mais recente de cada geração; se o banco atrasar, as
+    intermediárias são descartadas. Uma gravação que chegue depois do resultado final
+    não faz nada (o UPDATE só vale com status "processing").
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, schedule_id: int, partial: Dict[str, Any]) -> None:
+        with self._cond:
+            self._pending[schedule_id] = partial
+            # Thread iniciada sob demanda (também em processos worker do solver)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="partial-result-writer", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                schedule_id, partial = self._pending.popitem()
+            self._save(schedule_id, partial)
+
+    @staticmethod
+    def _save(schedule_id: int, partial: Dict[str, Any]) -> None:
+        from app.db.session import WorkerSessionLocal
+        from app.models.schedule import Schedule
+        from app.utils.helpers import run_coroutine_sync
+
+        async def save():
+            async with WorkerSessionLocal() as session:
+                # Só enquanto a geração ainda está rodando: nunca sobrescreve o resultado final
+                await session.execute(
+                    update(Schedule)
+                    .where(Schedule.id == schedule_id, Schedule.status == "processing")
+                    .values(result_data=partial)
+                )
+                await session.commit()
+
+        try:
+            run_coroutine_sync(save())
+        except Exception as e:
+            print(f"--> [Progresso] Falha ao salvar solução parcial: {e}")
+
+
+partial_writer = PartialResultWriter()
+
+
+class ProgressReporter:
+    """
+    Callback de progresso passado ao ScheduleGeneratorService.
+
+    Picklable (só guarda ids), para poder ir junto com o solve para um processo worker.
+    Publica cada solução melhor e grava a melhor solução parcial no banco no máximo
+    a cada PROGRESS_PERSIST_SECONDS, para o cliente poder aceitá-la antes do fim
+    (gravação em segundo plano, pelo partial_writer). Com a escola decomposta, a
+    parcial gravada junta a melhor de cada componente, assim que todos têm uma.
+    """
+
+    def __init__(self, schedule_id: int, component: Optional[int] = None,
+                 partials=None, n_components: int = 0):
+        self.schedule_id = schedule_id
+        self.component = component
+        # Escola decomposta: melhor parcial de cada componente (dict, ou Manager().dict()
+        # quando os componentes rodam em processos), compartilhado entre os reporters
+        self.partials = partials
+        self.n_components = n_components
+        self._last_persist = 0.0
+
+    def for_component(self, component: int, partials=None, n_components: int = 0) -> "ProgressReporter":
+        return ProgressReporter(self.schedule_id, component, partials, n_components)
+
+    def __call__(self, event: Dict[str, Any]) -> None:
+        event = dict(event, schedule_id=self.schedule_id)
+        if self.component is not None:
+            event["component"] = self.component
+        publish_progress(self.schedule_id, event)
+
+        if event.get("lessons") is None:
+            return
+        if self.component is not None:
+            event = self._merge_components(event)
+            if event is None:
+                return
+
+        now = time.monotonic()
+        if now - self._last_persist >= settings.PROGRESS_PERSIST_SECONDS:
+            self._last_persist = now
+            self._persist_partial(event)
+
+    def _merge_components(self, event: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Guarda a parcial deste componente e, quando todos já têm uma, devolve a grade
+        completa (aulas de todos, objetivo e limite somados); antes disso, None.
+        """
+        if self.partials is None:
+            return None
+        self.partials[self.component] = {
+            "lessons": event["lessons"], "objective": event.get("objective"), "bound": event.get("bound"),
+        }
+        snapshot = dict(self.partials)
+        if len(snapshot) < self.n_components:
+            return None
+
+        parts = list(snapshot.values())
+        objectives = [p["objective"] for p in parts]
+        bounds = [p["bound"] for p in parts]
+        return {
+            "lessons": [lesson for p in parts for lesson in p["lessons"]],
+            "objective": sum(objectives) if None not in objectives else None,
+            "bound": sum(bounds) if None not in bounds else None,
+            "elapsed": event.get("elapsed"),
+        }
+
+    def _persist_partial(self, event: Dict[str, Any]) -> None:
+        partial = {
+            "lessons": event["lessons"],
+            "stats": {
+                "partial": True,
+                "objective_value": event.get("objective"),
+                "best_objective_bound": event.get("bound"),
+                "wall_time": event.get("elapsed"),
+            },
+        }
+        # Gravado pela thread do partial_writer: o callback volta logo para o solver
+        partial_writer.submit(self.schedule_id, partial)
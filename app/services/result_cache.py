@@ -0,0 +1,110 @@
+import asyncio
+import hashlib
+import json
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.utils.cache import LRUCache
+
+REDIS_KEY = "schedule:result:{school_id}:{fingerprint}"
+
+# Ordem canônica das listas do school_data (a ordem do banco não é garantida)
+_SORT_KEYS = {
+    "teachers": lambda t: t.get("id"),
+    "class_groups": lambda g: g.get("id"),
+    "subjects": lambda s: s.get("id"),
+}
+
+
+def compute_fingerprint(school_data: Dict[str, Any], solver_params: Dict[str, Any]) -> str:
+    """
+    Hash estável (sha256) da entrada do solver + parâmetros de busca.
+    Duas gerações com o mesmo fingerprint produzem grades equivalentes.
+    """
+    canonical = {}
+    for key, value in school_data.items():
+        if isinstance(value, list):
+            sort_key = _SORT_KEYS.get(key)
+            if sort_key is not None:
+                value = sorted(value, key=sort_key)
+            else:
+                value = sorted(value, key=lambda item: json.dumps(item, sort_keys=True, default=str))
+        canonical[key] = value
+
+    payload = json.dumps(
+        {"school_data": canonical, "solver_params": solver_params},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    """
+    fingerprint -> id do Schedule concluído com essa entrada.
+
+    Camadas: LRU em memória (limitado, com TTL) e, opcionalmente, Redis
+    (RESULT_CACHE_REDIS), compartilhado entre workers da API e do Celery.
+    O banco (coluna Schedule.input_fingerprint) continua sendo a última camada.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.ttl = ttl
+        self._local = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def lock(self, fingerprint: str) -> asyncio.Lock:
+        """
+        Serializa requisições idênticas neste processo, para que a segunda encontre
+        a geração da primeira em andamento em vez de enfileirar outra. Entre processos
+        quem garante é o índice único ux_schedule_running_fingerprint (ver /generate).
+        """
+        # Mantém poucos locks: os sem uso são descartados na próxima chamada
+        for key in [k for k, l in self._locks.items() if not l.locked() and k != fingerprint]:
+            del self._locks[key]
+        return self._locks.setdefault(fingerprint, asyncio.Lock())
+
+    def get(self, school_id: int, fingerprint: str) -> Optional[int]:
+        schedule_id = self._local.get((school_id, fingerprint))
+        if schedule_id is not None or not settings.RESULT_CACHE_REDIS:
+            return schedule_id
+
+        try:
+            from app.core.redis_client import get_redis
+
+            value = get_redis().get(REDIS_KEY.format(school_id=school_id, fingerprint=fingerprint))
+        except Exception as e:
+            print(f"--> [Cache] Redis indisponível: {e}")
+            return None
+
+        if value is None:
+            return None
+        self._local.set((school_id, fingerprint), int(value))
+        return int(value)
+
+    def remember(self, school_id: int, fingerprint: Optional[str], schedule_id: int) -> None:
+        if not fingerprint:
+            return
+        self._local.set((school_id, fingerprint), schedule_id)
+
+        if settings.RESULT_CACHE_REDIS:
+            try:
+                from app.core.redis_client import get_redis
+
+                get_redis().set(
+                    REDIS_KEY.format(school_id=school_id, fingerprint=fingerprint),
+                    schedule_id,
+                    ex=int(self.ttl),
+                )
+            except Exception as e:
+                print(f"--> [Cache] Redis indisponível: {e}")
+
+    def forget(self, school_id: int, fingerprint: str) -> None:
+        self._local.delete((school_id, fingerprint))
+
+
+result_cache = ResultCache(
+    maxsize=settings.RESULT_CACHE_SIZE,
+    ttl=settings.RESULT_CACHE_TTL_SECONDS,
+)
@@ -0,0 +1,63 @@
+from collections import Counter, defaultdict
+from typing import Any, Dict, Iterable, List, Tuple
+
+from app.services.lesson_index import lesson_view
+
+# (turma, professor, matéria, dia, horário)
+LessonTuple = Tuple[int, int, int, int, int]
+
+
+def diff_lessons(old: Iterable[LessonTuple], new: Iterable[LessonTuple]) -> Dict[str, List[List[int]]]:
+    """
+    Diferença entre duas grades por conjuntos de tuplas (g, t, s, d, h).
+
+    Aulas presentes nas duas grades são descartadas de uma vez (diferença de
+    multiconjuntos). No que sobra, uma aula da mesma (turma, professor, matéria)
+    que saiu de um horário e entrou em outro conta como "moved"; o resto é
+    "added" ou "removed".
+
+    Formato compacto (patch):
+      added/removed: [g, t, s, d, h]
+      moved:         [g, t, s, d_antigo, h_antigo, d_novo, h_novo]
+    """
+    old_count, new_count = Counter(old), Counter(new)
+    removed_count = old_count - new_count
+    added_count = new_count - old_count
+
+    # (g, t, s) -> horários que saíram / entraram
+    removed_slots = defaultdict(list)
+    added_slots = defaultdict(list)
+    for (g, t, s, d, h), n in removed_count.items():
+        removed_slots[(g, t, s)].extend([(d, h)] * n)
+    for (g, t, s, d, h), n in added_count.items():
+        added_slots[(g, t, s)].extend([(d, h)] * n)
+
+    added, removed, moved = [], [], []
+    for key in sorted(removed_slots.keys() | added_slots.keys()):
+        before = sorted(removed_slots.get(key, []))
+        after = sorted(added_slots.get(key, []))
+        pairs = min(len(before), len(after))
+
+        moved.extend([*key, *before[i], *after[i]] for i in range(pairs))
+        removed.extend([*key, *slot] for slot in before[pairs:])
+        added.extend([*key, *slot] for slot in after[pairs:])
+
+    return {
+        "added": added,
+        "removed": removed,
+        "moved": moved,
+        "unchanged": sum((old_count & new_count).values()),
+    }
+
+
+def expand_patch(patch: Dict[str, Any]) -> Dict[str, Any]:
+    """Versão legível do patch, com as aulas no mesmo formato do result_data."""
+    return {
+        "added": [lesson_view(*item) for item in patch["added"]],
+        "removed": [lesson_view(*item) for item in patch["removed"]],
+        "moved": [
+            {"from": lesson_view(g, t, s, d0, h0), "to": lesson_view(g, t, s, d1, h1)}
+            for g, t, s, d0, h0, d1, h1 in patch["moved"]
+        ],
+        "unchanged": patch["unchanged"],
+    }
@@ -1,10 +1,117 @@
+import threading
+import time
+from collections import defaultdict
+
 from ortools.sat.python import cp_model
-from typing import Dict, Any, List
+from typing import Dict, Any, Callable, List, Optional
+
+from app.core.config import settings
+from app.services.optimization import ImprovementTracker, SoftConstraintCompiler, is_hard
+from app.services.time_grid import TimeGrid
+
+# Nomes curtos dos dias no JSON das aulas (day_name)
+DAY_NAMES = {0: "Seg", 1: "Ter", 2: "Qua", 3: "Qui", 4: "Sex", 5: "Sáb", 6: "Dom"}
+
+# Perfis prontos de busca (o "plano" da geração). Valores explícitos da requisição
+# têm prioridade sobre o perfil, que tem prioridade sobre os defaults do Settings.
+SOLVER_PRESETS = {
+    "fast": {"max_time_in_seconds": 10.0, "num_search_workers": 4, "linearization_level": 0,
+             "relative_gap_limit": 0.05, "no_improvement_seconds": 3.0},
+    "balanced": {},
+    "thorough": {"max_time_in_seconds": 120.0, "num_search_workers": 16, "linearization_level": 2,
+                 "relative_gap_limit": 0.0, "no_improvement_seconds": 30.0},
+}
+
+
+def resolve_solver_params(options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Monta os parâmetros finais do CP-SAT a partir do Settings, do perfil escolhido
+    e dos valores da requisição, respeitando os limites do servidor.
+    """
+    options = {k: v for k, v in (options or {}).items() if v is not None}
+
+    params = {
+        "max_time_in_seconds": settings.SOLVER_MAX_TIME_SECONDS,
+        "num_search_workers": settings.SOLVER_NUM_SEARCH_WORKERS,
+        "random_seed": settings.SOLVER_RANDOM_SEED,
+        "linearization_level": settings.SOLVER_LINEARIZATION_LEVEL,
+        # Parada antecipada (só com função objetivo: regras desejáveis ou minimize_changes)
+        "relative_gap_limit": settings.SOLVER_RELATIVE_GAP_LIMIT,
+        "no_improvement_seconds": settings.SOLVER_NO_IMPROVEMENT_SECONDS,
+        "min_relative_improvement": settings.SOLVER_MIN_RELATIVE_IMPROVEMENT,
+    }
+
+    preset = options.pop("preset", None)
+    if preset is not None:
+        if preset not in SOLVER_PRESETS:
+            raise ValueError(f"Perfil de solver desconhecido: {preset}")
+        params.update(SOLVER_PRESETS[preset])
+
+    params.update({k: v for k, v in options.items() if k in params})
+
+    # Limites do servidor: ninguém pede 64 workers ou 1 hora de solve
+    params["num_search_workers"] = max(1, min(int(params["num_search_workers"]), settings.SOLVER_MAX_SEARCH_WORKERS))
+    params["max_time_in_seconds"] = max(1.0, min(float(params["max_time_in_seconds"]), settings.SOLVER_MAX_TIME_LIMIT))
+    params["linearization_level"] = max(0, min(int(params["linearization_level"]), 2))
+    params["relative_gap_limit"] = max(0.0, min(float(params["relative_gap_limit"]), 1.0))
+    params["no_improvement_seconds"] = max(0.0, float(params["no_improvement_seconds"] or 0))
+    params["min_relative_improvement"] = max(0.0, min(float(params["min_relative_improvement"]), 1.0))
+    return params
+
+
+class SolutionProgressCallback(cp_model.CpSolverSolutionCallback):
+    """
+    Chamado pelo CP-SAT a cada solução melhor encontrada.
+    Repassa objetivo, limitante e tempo decorrido para on_progress e, no máximo a cada
+    PROGRESS_LESSONS_SECONDS, também as aulas da solução (montá-las custa O(|vars|)).
+    Também alimenta o ImprovementTracker da parada antecipada.
+    """
+
+    def __init__(
+            self,
+            service: "ScheduleGeneratorService",
+            on_progress: Optional[Callable[[Dict[str, Any]], None]],
+            tracker: Optional[ImprovementTracker] = None
+    ):
+        super().__init__()
+        self.service = service
+        self.on_progress = on_progress
+        self.tracker = tracker
+        self.solutions = 0
+        self._last_lessons_at = float("-inf")
+
+    def on_solution_callback(self):
+        self.solutions += 1
+        has_objective = bool(self.service.objective_terms)
+        if self.tracker is not None and has_objective:
+            self.tracker.record(self.ObjectiveValue())
+        if self.on_progress is None:
+            return
+
+        event = {
+            "type": "solution",
+            "solutions": self.solutions,
+            "objective": self.ObjectiveValue() if has_objective else None,
+            "bound": self.BestObjectiveBound() if has_objective else None,
+            "elapsed": round(self.WallTime(), 3),
+        }
+
+        now = time.monotonic()
+        if now - self._last_lessons_at >= settings.PROGRESS_LESSONS_SECONDS:
+            self._last_lessons_at = now
+            event["lessons"] = self.service._format_solution(self)
+
+        try:
+            self.on_progress(event)
+        except Exception as e:
+            # Progresso nunca pode interromper a busca
+            print(f"--> [Algoritmo] Falha ao publicar progresso: {e}")
 
 
 class ScheduleGeneratorService:
-    def __init__(self, school_data: Dict[str, Any]):
+    def __init__(self, school_data: Dict[str, Any], solver_params: Optional[Dict[str, Any]] = None):
         self.data = school_data
+        self.solver_params = solver_params or resolve_solver_params()
         self.teachers = school_data.get("teachers", [])
         self.groups = school_data.get("class_groups", [])
         self.subjects = school_data.get("subjects", [])
@@ -12,15 +119,117 @@ class ScheduleGeneratorService:
         self.model = cp_model.CpModel()
         self.vars = {}  # Dicionário para guardar as variáveis de decisão
 
-        # Configurações básicas (podem vir do banco no futuro)
-        self.days = 5  # 0=Seg, 1=Ter, 2=Qua, 3=Qui, 4=Sex
-        self.slots = 5  # 5 aulas por dia
+        # Forma da semana da escola (dias x horários, intervalos, turnos).
+        # As variáveis usam o índice achatado slot = dia * slots + horário.
+        self.grid = TimeGrid.from_school_data(school_data)
+        self.days = self.grid.days  # 0=Seg, 1=Ter, ...
+        self.slots = self.grid.slots_per_day  # aulas por dia
 
-    def solve(self) -> Dict[str, Any]:
-        print(f"--> [Algoritmo] Iniciando com {len(self.subjects)} disciplinas...")
+        # Índices secundários, preenchidos junto com self.vars.
+        # Evitam varrer todas as variáveis a cada restrição (O(|vars|) por slot).
+        self.vars_by_group_slot = defaultdict(list)  # (g_id, slot) -> [vars]
+        self.vars_by_teacher_slot = defaultdict(list)  # (t_id, slot) -> [vars]
+        self.vars_by_subject = defaultdict(list)  # s_id -> [vars]
+        self.vars_by_subject_day = defaultdict(list)  # (s_id, d) -> [vars]
+
+        # Estatísticas da redução de domínio (preenchidas em build_model)
+        self.stats = {"variables_created": 0, "variables_pruned": 0}
+
+        # Regeneração incremental: aulas da última grade concluída, recebidas como
+        # [g, t, s, d, h] e guardadas como (g, t, s, slot); fora da semana atual são ignoradas
+        self.previous_lessons = set()
+        for g_id, t_id, s_id, d, h in school_data.get("previous_lessons") or []:
+            slot = self.grid.slot(d, h)
+            if slot is not None:
+                self.previous_lessons.add((g_id, t_id, s_id, slot))
+        # Se True, minimiza quantas aulas mudam de lugar em relação à grade anterior
+        self.minimize_changes = bool(school_data.get("minimize_changes"))
+
+        # Termos da função objetivo (somados e minimizados no solve, se houver algum)
+        self.objective_terms = []
+
+        # Diagnóstico de inviabilidade (conflict_detector.find_infeasible_subset):
+        # cargas e limites diários ficam condicionados a literais de suposição
+        self.track_assumptions = False
+        self.assumption_literals = []
+        self.assumptions = {}  # índice do literal -> descrição da regra
+
+    def _blocked_teacher_slots(self) -> set:
+        """
+        Pré-processamento: conjunto de (professor, slot) em que o professor
+        não pode dar aula. Nesses slots nenhuma variável é criada.
+        """
+        blocked = set()
+
+        for c in self.data.get("constraints", []):
+            # Indisponibilidade com peso < 100 é desejável: vira custo no objetivo (optimization.py)
+            if c['type'] == 'TEACHER_UNAVAILABILITY' and is_hard(c):
+                t_id = c['data'].get('teacher_id')
+                blocked_day = c['data'].get('day_of_week')  # 0=Seg, 4=Sex
+                blocked_period = c['data'].get('period')  # Opcional: só um horário
+
+                if t_id is None or blocked_day is None:
+                    continue
+
+                print(f"--> [Regra] Bloqueando Prof {t_id} no dia {blocked_day}")
+                periods = [blocked_period] if blocked_period is not None else range(self.slots)
+                self._block(blocked, t_id, blocked_day, periods)
+
+        # Linhas de Availability com is_available=False
+        for a in self.data.get("availabilities", []):
+            if a.get('is_available', True):
+                continue
+
+            t_id = a.get('teacher_id')
+            day = a.get('day_of_week')
+            if t_id is None or day is None:
+                continue
+
+            if a.get('period') is not None:
+                periods = [a['period']]
+            else:
+                periods = self.grid.periods_in_interval(a.get('start_time'), a.get('end_time'))
+
+            self._block(blocked, t_id, day, periods)
+
+        return blocked
+
+    def _block(self, blocked: set, t_id: int, day: int, periods) -> None:
+        for h in periods:
+            slot = self.grid.slot(day, h)
+            if slot is not None:
+                blocked.add((t_id, slot))
+
+    def _group_allowed_slots(self) -> Dict[int, set]:
+        """Slots permitidos para cada turma de acordo com a janela do seu turno."""
+        allowed = {}
+        for g in self.groups:
+            window = self.grid.shift_slots(g.get('shift'))
+            if window is not None:
+                allowed[g['id']] = window
+        return allowed
+
+    def _guard(self, constraint, rule: Dict[str, Any]) -> None:
+        """Com track_assumptions, a regra só vale se o seu literal de suposição for verdadeiro."""
+        if not self.track_assumptions:
+            return
+        literal = self.model.NewBoolVar(f"assume_{len(self.assumption_literals)}")
+        constraint.OnlyEnforceIf(literal)
+        self.assumption_literals.append(literal)
+        self.assumptions[literal.Index()] = rule
+
+    def build_model(self) -> None:
+        """Cria as variáveis e todas as restrições no self.model."""
+        # 0. REDUÇÃO DE DOMÍNIO
+        # Slots impossíveis (professor indisponível, fora do turno da turma, matéria sem
+        # aulas) nem chegam a virar variável, em vez de virarem uma restrição "== 0".
+        blocked_teacher_slots = self._blocked_teacher_slots()
+        group_allowed_slots = self._group_allowed_slots()
+        dense_total = 0
 
         # 1. CRIAR VARIÁVEIS
-        # Variável x[turma, professor, materia, dia, horario] -> 1 se tiver aula, 0 se não
+        # Variável x[turma, professor, materia, slot] -> 1 se tiver aula, 0 se não
+        # (slot = dia * aulas_por_dia + horário)
         for s in self.subjects:
             g_id = s['class_group_id']
             t_id = s['teacher_id']
@@ -30,137 +239,296 @@ class ScheduleGeneratorService:
             if not g_id or not t_id:
                 continue
 
-            for d in range(self.days):
-                for h in range(self.slots):
-                    # Cria a variável booleana para este slot
-                    self.vars[(g_id, t_id, s_id, d, h)] = self.model.NewBoolVar(
-                        f"x_g{g_id}_t{t_id}_s{s_id}_d{d}_h{h}"
-                    )
+            dense_total += self.grid.n_slots
+
+            # Matéria sem aulas na semana não precisa de variáveis
+            if not s.get('weekly_lessons'):
+                continue
+
+            group_window = group_allowed_slots.get(g_id)
+
+            for slot in range(self.grid.n_slots):
+                if (t_id, slot) in blocked_teacher_slots:
+                    continue
+                if group_window is not None and slot not in group_window:
+                    continue
+
+                # Cria a variável booleana para este slot
+                var = self.model.NewBoolVar(f"x_g{g_id}_t{t_id}_s{s_id}_{slot}")
+                self.vars[(g_id, t_id, s_id, slot)] = var
+
+                # Registra nos índices
+                self.vars_by_group_slot[(g_id, slot)].append(var)
+                self.vars_by_teacher_slot[(t_id, slot)].append(var)
+                self.vars_by_subject[s_id].append(var)
+                self.vars_by_subject_day[(s_id, slot // self.slots)].append(var)
+
+        self.stats["variables_created"] = len(self.vars)
+        self.stats["variables_pruned"] = dense_total - len(self.vars)
+        print(
+            f"--> [Algoritmo] {self.stats['variables_created']} variáveis criadas, "
+            f"{self.stats['variables_pruned']} podadas."
+        )
 
         # 2. RESTRIÇÃO: Carga Horária (A MAIS IMPORTANTE)
         # "A soma das aulas de Matemática tem que ser igual a 4"
         for s in self.subjects:
-            s_id = s['id']
-            g_id = s['class_group_id']
-            t_id = s['teacher_id']
             required_lessons = s.get('weekly_lessons', 0)
+            if not required_lessons or not s['class_group_id'] or not s['teacher_id']:
+                continue
 
-            if required_lessons > 0:
-                # Coleta todas as variáveis dessa matéria específica
-                materia_vars = []
-                for d in range(self.days):
-                    for h in range(self.slots):
-                        if (g_id, t_id, s_id, d, h) in self.vars:
-                            materia_vars.append(self.vars[(g_id, t_id, s_id, d, h)])
-
-                if materia_vars:
-                    # Adiciona a regra: Soma tem que ser EXATAMENTE igual ao exigido
-                    self.model.Add(sum(materia_vars) == required_lessons)
+            materia_vars = self.vars_by_subject.get(s['id'], [])
+            # Mesmo que a poda tenha eliminado todos os slots, a regra continua valendo:
+            # sum([]) == 4 deixa o modelo inviável, como antes.
+            ct = self.model.Add(sum(materia_vars) == required_lessons)
+            self._guard(ct, {
+                "type": "WEEKLY_LESSONS",
+                "subject_id": s['id'],
+                "class_group_id": s['class_group_id'],
+                "teacher_id": s['teacher_id'],
+                "value": required_lessons,
+                "message": f"{s.get('name') or 'Matéria ' + str(s['id'])}: {required_lessons} aulas por semana",
+            })
 
         # 3. RESTRIÇÃO: Choque de Horário (Turma)
         # Uma turma não pode ter 2 aulas no mesmo horário
-        for g in self.groups:
-            g_id = g['id']
-            for d in range(self.days):
-                for h in range(self.slots):
-                    # Pega todas as aulas dessa turma nesse horário (de qualquer matéria)
-                    vars_in_slot = [
-                        self.vars[key] for key in self.vars
-                        if key[0] == g_id and key[3] == d and key[4] == h
-                    ]
-                    if vars_in_slot:
-                        self.model.Add(sum(vars_in_slot) <= 1)
+        for vars_in_slot in self.vars_by_group_slot.values():
+            if len(vars_in_slot) > 1:
+                self.model.AddAtMostOne(vars_in_slot)
 
         # 4. RESTRIÇÃO: Choque de Horário (Professor)
         # Um professor não pode dar 2 aulas no mesmo horário (em turmas diferentes)
-        for t in self.teachers:
-            t_id = t['id']
-            for d in range(self.days):
-                for h in range(self.slots):
-                    # Pega todas as aulas desse professor nesse horário
-                    vars_in_slot = [
-                        self.vars[key] for key in self.vars
-                        if key[1] == t_id and key[3] == d and key[4] == h
-                    ]
-                    if vars_in_slot:
-                        self.model.Add(sum(vars_in_slot) <= 1)
+        for vars_in_slot in self.vars_by_teacher_slot.values():
+            if len(vars_in_slot) > 1:
+                self.model.AddAtMostOne(vars_in_slot)
 
         # 5. RESTRIÇÃO: Máximo de Aulas Diárias (Opcional - evita dobradinha tripla)
         for s in self.subjects:
             max_daily = s.get('max_daily_lessons', 2)  # Padrão: max 2 aulas por dia
-            g_id = s['class_group_id']
-            t_id = s['teacher_id']
-            s_id = s['id']
 
             for d in range(self.days):
-                daily_vars = []
-                for h in range(self.slots):
-                    if (g_id, t_id, s_id, d, h) in self.vars:
-                        daily_vars.append(self.vars[(g_id, t_id, s_id, d, h)])
+                daily_vars = self.vars_by_subject_day.get((s['id'], d))
+                if daily_vars and max_daily is not None and max_daily < len(daily_vars):
+                    ct = self.model.Add(sum(daily_vars) <= max_daily)
+                    self._guard(ct, {
+                        "type": "MAX_DAILY_LESSONS",
+                        "subject_id": s['id'],
+                        "class_group_id": s['class_group_id'],
+                        "teacher_id": s['teacher_id'],
+                        "day_of_week": d,
+                        "value": max_daily,
+                        "message": (
+                            f"{s.get('name') or 'Matéria ' + str(s['id'])}: "
+                            f"no máximo {max_daily} aulas no dia {d}"
+                        ),
+                    })
 
-                if daily_vars:
-                    self.model.Add(sum(daily_vars) <= max_daily)
+        # 6. RESTRIÇÃO: Aulas seguidas (Subject.allow_consecutive=False)
+        # A mesma matéria não pode ocupar dois horários seguidos no mesmo dia
+        # (horários separados por um intervalo não contam como seguidos)
+        for s in self.subjects:
+            if s.get('allow_consecutive', True) is not False:
+                continue
+            key = (s['class_group_id'], s['teacher_id'], s['id'])
+            for slot in range(self.grid.n_slots):
+                if not self.grid.is_consecutive(slot):
+                    continue
+                a, b = self.vars.get((*key, slot)), self.vars.get((*key, slot + 1))
+                if a is not None and b is not None:
+                    self.model.AddBoolOr([a.Not(), b.Not()])
 
-        for c in self.data.get("constraints", []):
-            if c['type'] == 'TEACHER_UNAVAILABILITY':
-                t_id = c['data'].get('teacher_id')
-                blocked_day = c['data'].get('day_of_week')  # 0=Seg, 4=Sex
+        # 7. REGRAS DESEJÁVEIS (Constraint.weight < 100) -> termos da função objetivo
+        self.stats["soft_constraints"] = SoftConstraintCompiler(self).compile()
 
-                print(f"--> [Regra] Bloqueando Prof {t_id} no dia {blocked_day}")
+    def solve(
+            self,
+            progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+            should_stop: Optional[Callable[[], bool]] = None
+    ) -> Dict[str, Any]:
+        """
+        Monta o modelo e roda o CP-SAT.
 
-                if t_id is not None and blocked_day is not None:
-                    # Varre todos os horários desse dia
-                    for h in range(self.slots):
-                        # Encontra todas as variáveis de aula deste professor neste dia/horário
-                        vars_to_block = []
-                        for key, var in self.vars.items():
-                            # key = (g_id, teacher_id, s_id, day, period)
-                            if key[1] == t_id and key[3] == blocked_day and key[4] == h:
-                                vars_to_block.append(var)
-
-                        # Se encontrou aulas possíveis, força a soma ser 0 (Nenhuma aula permitida)
-                        if vars_to_block:
-                            self.model.Add(sum(vars_to_block) == 0)
-
-            # --- EXECUTAR O SOLVER ---
+        :param progress_callback: Recebe um dict a cada solução melhor encontrada
+                                  (objetivo, limitante, tempo e, às vezes, as aulas).
+        :param should_stop: Consultado periodicamente durante a busca; se retornar True
+                            a busca é interrompida (cancelamento da geração).
+        """
+        print(f"--> [Algoritmo] Iniciando com {len(self.subjects)} disciplinas...")
+
+        self.build_model()
+        self._apply_warm_start()
+
+        if self.objective_terms:
+            self.model.Minimize(sum(self.objective_terms))
+
+        # --- EXECUTAR O SOLVER ---
         solver = cp_model.CpSolver()
+        self._configure_solver(solver)
 
-        # Tempo limite para não travar o servidor (30 segundos)
-        solver.parameters.max_time_in_seconds = 30.0
+        # Sem objetivo o CP-SAT já para na primeira solução: parada antecipada não se aplica
+        tracker = ImprovementTracker.from_params(self.solver_params) if self.objective_terms else None
 
-        status = solver.Solve(self.model)
+        search_done = threading.Event()
+        cancelled = threading.Event()
+        if should_stop is not None or tracker is not None:
+            threading.Thread(
+                target=self._watch_for_stop,
+                args=(solver, should_stop, search_done, cancelled, tracker),
+                daemon=True,
+            ).start()
+
+        try:
+            if progress_callback is not None or tracker is not None:
+                status = solver.Solve(self.model, SolutionProgressCallback(self, progress_callback, tracker))
+            else:
+                status = solver.Solve(self.model)
+        finally:
+            search_done.set()
+        self._collect_solver_stats(solver, status)
+        if tracker is not None and tracker.stop_reason:
+            self.stats["early_stop"] = tracker.stop_reason
+
+        if cancelled.is_set():
+            print(f"--> [Algoritmo] Busca interrompida: geração cancelada.")
+            return {"status": "cancelled", "stats": self.stats}
 
         if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
             print(f"--> [Algoritmo] Solução encontrada! (Status: {status})")
             return {
                 "status": "success",
-                "result": self._format_solution(solver)
+                "result": self._format_solution(solver),
+                "stats": self.stats
             }
         else:
             print(f"--> [Algoritmo] Nenhuma solução possível. Verifique as restrições.")
-            return {
+            result = {
                 "status": "error",
-                "error": "Impossível gerar grade. Conflito de restrições ou falta de tempo."
+                "error": "Impossível gerar grade. Conflito de restrições ou falta de tempo.",
+                "stats": self.stats
             }
+            if status == cp_model.INFEASIBLE:
+                # Inviabilidade comprovada: explica quais regras, juntas, não cabem
+                from app.services.conflict_detector import find_infeasible_subset
+
+                result["error"] = "Impossível gerar grade. As regras abaixo não cabem juntas."
+                result["conflicts"] = find_infeasible_subset(
+                    self.data, max_time_in_seconds=settings.CONFLICT_MIS_MAX_SECONDS
+                ) or []
+            return result
+
+    @staticmethod
+    def _watch_for_stop(
+            solver,
+            should_stop,
+            search_done: threading.Event,
+            cancelled: threading.Event,
+            tracker: Optional[ImprovementTracker] = None
+    ) -> None:
+        """
+        Thread auxiliar: interrompe a busca do CP-SAT quando should_stop() fica True
+        (cancelamento) ou quando o objetivo para de melhorar (parada antecipada).
+        """
+        while not search_done.wait(0.25):
+            if should_stop is not None and should_stop():
+                cancelled.set()
+                solver.StopSearch()
+                return
+            if tracker is not None and tracker.stalled():
+                print(f"--> [Algoritmo] Parada antecipada: {tracker.stop_reason}.")
+                solver.StopSearch()
+                return
+
+    def _apply_warm_start(self) -> None:
+        """
+        Usa a grade anterior como ponto de partida (solution hints) e, se pedido,
+        penaliza cada aula que sair do lugar onde estava.
+        """
+        if not self.previous_lessons:
+            return
+
+        for key, var in self.vars.items():
+            self.model.AddHint(var, 1 if key in self.previous_lessons else 0)
+
+        kept_vars = [self.vars[key] for key in self.previous_lessons if key in self.vars]
+        self.stats["warm_start"] = {
+            "previous_lessons": len(self.previous_lessons),
+            "hinted_in_place": len(kept_vars),
+        }
+
+        if self.minimize_changes and kept_vars:
+            # Aulas movidas = aulas anteriores que não ficaram no mesmo slot.
+            # Minimizar (len - soma) equivale a maximizar as aulas mantidas.
+            self.objective_terms.append(len(kept_vars) - sum(kept_vars))
+
+    def _configure_solver(self, solver: cp_model.CpSolver) -> None:
+        """Aplica os parâmetros de busca (tempo, workers paralelos, semente, linearização)."""
+        params = self.solver_params
+
+        # Tempo limite para não travar o servidor
+        solver.parameters.max_time_in_seconds = params["max_time_in_seconds"]
+
+        # Busca em portfólio: cada worker roda uma estratégia diferente em paralelo
+        solver.parameters.num_search_workers = params["num_search_workers"]
+        solver.parameters.linearization_level = params["linearization_level"]
+
+        # Com semente fixa e 1 worker o resultado é reproduzível
+        if params.get("random_seed") is not None:
+            solver.parameters.random_seed = params["random_seed"]
+
+        # Para quando (objetivo - limitante) / objetivo <= gap: "bom o suficiente"
+        if params.get("relative_gap_limit"):
+            solver.parameters.relative_gap_limit = params["relative_gap_limit"]
+
+    def _collect_solver_stats(self, solver: cp_model.CpSolver, status) -> None:
+        """Guarda as métricas da busca no self.stats (vão para o result_data)."""
+        self.stats.update({
+            "solver_status": solver.StatusName(status),
+            "wall_time": round(solver.WallTime(), 3),
+            "user_time": round(solver.UserTime(), 3),
+            "num_branches": solver.NumBranches(),
+            "num_conflicts": solver.NumConflicts(),
+            "objective_value": solver.ObjectiveValue() if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) else None,
+            "best_objective_bound": solver.BestObjectiveBound(),
+            "num_constraints": len(self.model.Proto().constraints),
+            "solver_params": dict(self.solver_params),
+        })
 
     def _format_solution(self, solver):
         """Converte as variáveis do OR-Tools para JSON legível"""
         schedule_json = []
 
-        # Mapeamento para nomes legíveis (opcional, ajuda no debug)
-        days_map = {0: "Seg", 1: "Ter", 2: "Qua", 3: "Qui", 4: "Sex"}
-
-        for (g_id, t_id, s_id, d, h), variable in self.vars.items():
+        lessons_kept = 0
+        for key, variable in self.vars.items():
             if solver.Value(variable) == 1:
+                if key in self.previous_lessons:
+                    lessons_kept += 1
+                g_id, t_id, s_id, slot = key
+                d, h = self.grid.split(slot)
                 # Encontrou uma aula marcada!
                 schedule_json.append({
                     "class_group_id": g_id,
                     "teacher_id": t_id,
                     "subject_id": s_id,
-                    "day_of_week": d,  # 0 a 4
-                    "day_name": days_map.get(d),
-                    "period": h,  # 0 a 4 (Horário da aula)
+                    "day_of_week": d,  # 0 = Segunda
+                    "day_name": DAY_NAMES.get(d),
+                    "period": h,  # Horário da aula no dia (0 = primeiro)
                     "period_index": h + 1  # 1º horário, 2º horário...
                 })
 
-        return schedule_json
\ No newline at end of file
+        if self.previous_lessons:
+            self.stats["lessons_moved"] = len(self.previous_lessons) - lessons_kept
+
+        return schedule_json
+
+
+def run_solver(
+        school_data: Dict[str, Any],
+        solver_params: Optional[Dict[str, Any]] = None,
+        progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None,
+        should_stop: Optional[Callable[[], bool]] = None
+) -> Dict[str, Any]:
+    """
+    Ponto de entrada usado pelo executor do solver.
+    Precisa ser uma função de módulo para poder ser enviada a um processo worker.
+    """
+    return ScheduleGeneratorService(school_data, solver_params).solve(progress_callback, should_stop)
@@ -0,0 +1,181 @@
+from typing import Any, Dict, List
+
+from sqlalchemy import JSON, func, literal_column, select, true
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.availability import Availability
+from app.models.class_group import ClassGroup
+from app.models.constraint import Constraint
+from app.models.schedule import Schedule
+from app.models.schedule_lesson import ScheduleLesson
+from app.models.school import School
+from app.models.subject import Subject
+from app.models.teacher import Teacher
+from app.utils.helpers import get_lessons
+
+# Colunas que o solver usa, por seção do school_data.
+# Só elas saem do banco: nada de entidades ORM completas.
+TEACHER_COLUMNS = {"id": Teacher.id, "name": Teacher.name}
+CLASS_GROUP_COLUMNS = {
+    "id": ClassGroup.id,
+    "name": ClassGroup.name,
+    "grade": ClassGroup.grade,
+    "shift": ClassGroup.shift,
+}
+SUBJECT_COLUMNS = {
+    "id": Subject.id,
+    "name": Subject.name,
+    "teacher_id": Subject.teacher_id,  # Quem dá aula?
+    "class_group_id": Subject.class_group_id,  # Para qual turma?
+    "weekly_lessons": Subject.weekly_lessons,  # Quantas aulas?
+    "max_daily_lessons": Subject.max_daily_lessons,
+    "allow_consecutive": Subject.allow_consecutive,
+}
+CONSTRAINT_COLUMNS = {
+    "id": Constraint.id,
+    "type": Constraint.type,
+    "data": Constraint.data,
+    "weight": Constraint.weight,
+}
+AVAILABILITY_COLUMNS = {
+    "teacher_id": Availability.teacher_id,
+    "day_of_week": Availability.day_of_week,
+    "start_time": Availability.start_time,
+    "end_time": Availability.end_time,
+    "is_available": Availability.is_available,
+}
+
+
+def _sections(school_id: int) -> Dict[str, Any]:
+    """(colunas, FROM/WHERE) de cada seção do school_data."""
+    return {
+        "teachers": (TEACHER_COLUMNS, lambda q: q.where(Teacher.school_id == school_id)),
+        "class_groups": (CLASS_GROUP_COLUMNS, lambda q: q.where(ClassGroup.school_id == school_id)),
+        "subjects": (SUBJECT_COLUMNS, lambda q: q.where(Subject.school_id == school_id)),
+        # Regras pausadas (active=False) não entram; NULL conta como ativa
+        "constraints": (CONSTRAINT_COLUMNS, lambda q: q.where(
+            Constraint.school_id == school_id,
+            func.coalesce(Constraint.active, true()) == true(),
+        )),
+        "availabilities": (AVAILABILITY_COLUMNS, lambda q: q.join(
+            Teacher, Teacher.id == Availability.teacher_id
+        ).where(Teacher.school_id == school_id)),
+    }
+
+
+# Aula no formato compacto [g, t, s, d, h] usado pelo solver
+PREVIOUS_LESSON_COLUMNS = (
+    ScheduleLesson.class_group_id,
+    ScheduleLesson.teacher_id,
+    ScheduleLesson.subject_id,
+    ScheduleLesson.day,
+    ScheduleLesson.period,
+)
+
+
+def _previous_schedule_id(school_id: int):
+    return (
+        select(Schedule.id)
+        .where(Schedule.school_id == school_id, Schedule.status == "completed")
+        .order_by(Schedule.id.desc())
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+def _previous_result_query(school_id: int):
+    # Só para grades concluídas antes da schedule_lesson (aulas ainda no JSON)
+    return select(Schedule.result_data).where(Schedule.id == _previous_schedule_id(school_id))
+
+
+def _previous_lessons_query(school_id: int):
+    return select(*PREVIOUS_LESSON_COLUMNS).where(ScheduleLesson.schedule_id == _previous_schedule_id(school_id))
+
+
+def _json_object(columns: Dict[str, Any]):
+    # Chaves como literais SQL: o asyncpg não consegue tipar parâmetros de json_build_object
+    args = []
+    for key, column in columns.items():
+        args.extend([literal_column(f"'{key}'"), column])
+    return func.json_build_object(*args)
+
+
+def _postgres_statement(school_id: int, include_previous: bool):
+    """
+    Um único SELECT que devolve o school_data inteiro já em JSON:
+    cada seção é um subselect com json_agg(json_build_object(...)).
+    """
+    parts = []
+    for name, (columns, where) in _sections(school_id).items():
+        section = where(select(func.coalesce(
+            func.json_agg(_json_object(columns)),
+            literal_column("'[]'::json"),
+        ))).scalar_subquery()
+        parts.extend([literal_column(f"'{name}'"), section])
+
+    parts.extend([
+        literal_column("'time_grid'"),
+        select(School.time_grid).where(School.id == school_id).scalar_subquery(),
+    ])
+
+    if include_previous:
+        lessons = (
+            select(func.coalesce(
+                func.json_agg(func.json_build_array(*PREVIOUS_LESSON_COLUMNS)),
+                literal_column("'[]'::json"),
+            ))
+            .where(ScheduleLesson.schedule_id == _previous_schedule_id(school_id))
+            .scalar_subquery()
+        )
+        parts.extend([
+            literal_column("'previous_lessons'"), lessons,
+            literal_column("'previous_result'"), _previous_result_query(school_id).scalar_subquery(),
+        ])
+
+    return select(func.json_build_object(*parts, type_=JSON))
+
+
+async def _load_generic(db: AsyncSession, school_id: int, include_previous: bool) -> Dict[str, Any]:
+    """Fallback para outros bancos (ex.: SQLite nos testes de carga): uma consulta de colunas por seção."""
+    data = {}
+    for name, (columns, where) in _sections(school_id).items():
+        result = await db.execute(where(select(*[c.label(k) for k, c in columns.items()])))
+        data[name] = [dict(row._mapping) for row in result.all()]
+
+    result = await db.execute(select(School.time_grid).where(School.id == school_id))
+    data["time_grid"] = result.scalar_one_or_none()
+
+    if include_previous:
+        result = await db.execute(_previous_lessons_query(school_id))
+        data["previous_lessons"] = [list(row) for row in result.all()]
+        result = await db.execute(_previous_result_query(school_id))
+        data["previous_result"] = result.scalar_one_or_none()
+    return data
+
+
+async def load_solver_input(db: AsyncSession, school_id: int, include_previous: bool = False) -> Dict[str, Any]:
+    """
+    Carrega tudo o que o solver precisa de uma escola em uma ida ao banco (Postgres):
+    professores, turmas, disciplinas, regras ativas, disponibilidades, a forma da
+    semana (time_grid) e, se pedido,
+    as aulas da última grade concluída (previous_lessons, para o warm-start).
+    """
+    if db.bind.dialect.name == "postgresql":
+        result = await db.execute(_postgres_statement(school_id, include_previous))
+        data = result.scalar_one()
+    else:
+        data = await _load_generic(db, school_id, include_previous)
+
+    if include_previous:
+        previous = data.pop("previous_result", None)
+        if not data.get("previous_lessons"):
+            data["previous_lessons"] = _compact_lessons(get_lessons(previous))
+    return data
+
+
+def _compact_lessons(lessons: List[Dict[str, Any]]) -> List[List[int]]:
+    """Aulas no formato compacto [g, t, s, d, h] usado pelo solver."""
+    return [
+        [l["class_group_id"], l["teacher_id"], l["subject_id"], l["day_of_week"], l["period"]]
+        for l in lessons
+    ]
@@ -0,0 +1,129 @@
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Semana padrão (e a de antes da configuração por escola): Seg a Sex, 5 aulas por dia
+DEFAULT_DAYS = 5
+DEFAULT_SLOTS_PER_DAY = 5
+
+
+class TimeGrid:
+    """
+    Forma da semana de uma escola: dias x horários por dia, intervalos e turnos.
+
+    Internamente cada (dia, horário) vira um único índice achatado
+    slot = dia * slots_per_day + horário, usado nas chaves das variáveis do solver.
+
+    Configuração (School.time_grid, ou school_data["time_grid"]):
+      {
+        "days": 6,
+        "slots_per_day": 9,
+        "breaks": [2, 5],                       # intervalo depois do 3º e do 6º horário
+        "slot_times": [["07:00", "07:50"], ...],
+        "shifts": {                             # janela de cada turno (ClassGroup.shift)
+          "Integral": {"slots": [0, 1, 2, 3, 4, 5, 6, 7, 8]},
+          "Noturno": {"slots": [0, 1, 2], "days": [0, 1, 2, 3, 4]}
+        }
+      }
+    Turno ausente em "shifts" usa a semana inteira. As chaves antigas do school_data
+    (slot_times e shift_windows = {turno: [horários]}) continuam aceitas.
+    """
+
+    def __init__(
+            self,
+            days: int = DEFAULT_DAYS,
+            slots_per_day: int = DEFAULT_SLOTS_PER_DAY,
+            breaks: Iterable[int] = (),
+            slot_times: Optional[List[List[str]]] = None,
+            shifts: Optional[Dict[str, Dict[str, List[int]]]] = None,
+    ):
+        self.days = days
+        self.slots_per_day = slots_per_day
+        self.n_slots = days * slots_per_day
+        self.breaks = set(breaks)
+        self.slot_times = slot_times or []
+        self.shifts = shifts or {}
+        self._shift_slots: Dict[str, Optional[Set[int]]] = {}
+
+    @classmethod
+    def from_config(cls, config: Optional[Dict[str, Any]], legacy: Optional[Dict[str, Any]] = None) -> "TimeGrid":
+        config = dict(config or {})
+        legacy = legacy or {}
+
+        shifts = {
+            name: window if isinstance(window, dict) else {"slots": list(window)}
+            for name, window in (legacy.get("shift_windows") or {}).items()
+        }
+        shifts.update(config.get("shifts") or {})
+
+        return cls(
+            days=config.get("days") or DEFAULT_DAYS,
+            slots_per_day=config.get("slots_per_day") or DEFAULT_SLOTS_PER_DAY,
+            breaks=config.get("breaks") or (),
+            slot_times=config.get("slot_times") or legacy.get("slot_times"),
+            shifts=shifts,
+        )
+
+    @classmethod
+    def from_school_data(cls, school_data: Dict[str, Any]) -> "TimeGrid":
+        return cls.from_config(school_data.get("time_grid"), legacy=school_data)
+
+    # ------------------------------------------------------------------
+    # Índice achatado
+    # ------------------------------------------------------------------
+    def slot(self, day: int, period: int) -> Optional[int]:
+        """Índice achatado de (dia, horário), ou None se estiver fora da semana."""
+        if 0 <= day < self.days and 0 <= period < self.slots_per_day:
+            return day * self.slots_per_day + period
+        return None
+
+    def split(self, slot: int) -> Tuple[int, int]:
+        """(dia, horário) de um índice achatado."""
+        return divmod(slot, self.slots_per_day)
+
+    def day_slots(self, day: int) -> range:
+        return range(day * self.slots_per_day, (day + 1) * self.slots_per_day)
+
+    def is_consecutive(self, slot: int) -> bool:
+        """True se slot e slot + 1 são aulas seguidas (mesmo dia, sem intervalo entre elas)."""
+        period = slot % self.slots_per_day
+        return period < self.slots_per_day - 1 and period not in self.breaks
+
+    # ------------------------------------------------------------------
+    # Horários e turnos
+    # ------------------------------------------------------------------
+    def periods_in_interval(self, start_time, end_time) -> List[int]:
+        """Horários (índices do dia) que se sobrepõem ao intervalo [start_time, end_time)."""
+        if not self.slot_times or not start_time or not end_time:
+            # Sem tabela de horários não dá para saber quais aulas o intervalo cobre:
+            # considera o dia inteiro.
+            return list(range(self.slots_per_day))
+
+        return [
+            h for h, (slot_start, slot_end) in enumerate(self.slot_times[:self.slots_per_day])
+            if slot_start < end_time and start_time < slot_end
+        ]
+
+    def shift_slots(self, shift: Optional[str]) -> Optional[Set[int]]:
+        """Índices achatados permitidos para um turno, ou None (semana inteira)."""
+        if shift not in self._shift_slots:
+            window = self.shifts.get(shift)
+            if window is None:
+                self._shift_slots[shift] = None
+            else:
+                days = window.get("days")
+                periods = window.get("slots")
+                self._shift_slots[shift] = {
+                    self.slot(d, h)
+                    for d in (days if days is not None else range(self.days))
+                    for h in (periods if periods is not None else range(self.slots_per_day))
+                    if self.slot(d, h) is not None
+                }
+        return self._shift_slots[shift]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "days": self.days,
+            "slots_per_day": self.slots_per_day,
+            "breaks": sorted(self.breaks),
+            "slot_times": self.slot_times,
+            "shifts": self.shifts,
+        }
@@ -0,0 +1,38 @@
+from celery import Celery
+
+from app.core.config import settings
+
+# Em modo eager não há broker: tudo roda em memória, no próprio processo
+if settings.CELERY_TASK_ALWAYS_EAGER:
+    broker_url = "memory://"
+    result_backend = "cache+memory://"
+else:
+    broker_url = settings.REDIS_URL
+    result_backend = settings.REDIS_URL
+
+celery_app = Celery(
+    "school_schedule",
+    broker=broker_url,
+    backend=result_backend,
+    include=["app.tasks.generate_schedule"],
+)
+
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+    task_always_eager=settings.CELERY_TASK_ALWAYS_EAGER,
+    task_eager_propagates=True,
+    # Gerações vão para uma fila própria, consumida pelos nós de solver
+    task_routes={"app.tasks.generate_schedule.*": {"queue": settings.CELERY_SOLVER_QUEUE}},
+    # Confirma a mensagem só no fim: se o dyno reiniciar no meio, a geração volta para a fila
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    # Cada worker pega uma geração por vez (solves são longos e pesados)
+    worker_prefetch_multiplier=1,
+    broker_transport_options={"visibility_timeout": settings.CELERY_VISIBILITY_TIMEOUT},
+    # Soft limit: a task marca a geração como "error" (SoftTimeLimitExceeded); hard limit: mata o processo
+    task_soft_time_limit=settings.CELERY_SOFT_TIME_LIMIT,
+    task_time_limit=settings.CELERY_TASK_TIME_LIMIT,
+    result_expires=24 * 3600,
+)
@@ -1,15 +1,112 @@
-import asyncio
-from sqlalchemy import select
-from app.db.session import AsyncSessionLocal
-from app.models.schedule import Schedule
-from app.services.schedule_generator import ScheduleGeneratorService
+from celery.exceptions import SoftTimeLimitExceeded
+from fastapi import BackgroundTasks
+from sqlalchemy import update
+from sqlalchemy.exc import DBAPIError, OperationalError
 
+from app.core.config import settings
+from app.core.exceptions import GenerationCancelledError
+from app.db.session import BackgroundSessionLocal, WorkerSessionLocal
+from app.models.schedule import RUNNING_STATUSES, Schedule
+from app.services.cancellation import CancelToken
+from app.services.decomposition import solve_school
+from app.services.grid_renderer import materialize_grid
+from app.services.lesson_index import store_lessons
+from app.services.progress import ProgressReporter, publish_progress
+from app.services.result_cache import result_cache
+from app.tasks.celery_app import celery_app
+from app.tasks.solver_executor import solver_executor
+from app.utils.helpers import get_lessons, run_coroutine_sync
 
-async def task_generate_schedule(schedule_id: int, school_data: dict, db_session=None):
+
+async def _update_schedule(
+        schedule_id: int,
+        status: str,
+        result_data=None,
+        keep_data: bool = False,
+        session_factory=BackgroundSessionLocal,
+        raise_errors: bool = False
+):
+    """
+    Atualiza status (e opcionalmente o result_data) de um agendamento numa sessão própria.
+    O UPDATE só vale para gerações em andamento (RUNNING_STATUSES): um cancelamento
+    gravado a qualquer momento antes dele nunca é sobrescrito (o solver pode terminar
+    depois do cancelamento).
+    """
+    async with session_factory() as session:
+        try:
+            values = {"status": status}
+            lessons = None
+            if status == "completed" and not keep_data:
+                # Aulas vão em lote para a schedule_lesson; no JSON ficam só as métricas
+                lessons = get_lessons(result_data)
+                values["result_data"] = {"stats": result_data.get("stats"), "lesson_count": len(lessons)}
+            elif not keep_data:
+                values["result_data"] = result_data
+
+            updated = await session.execute(
+                update(Schedule)
+                .where(Schedule.id == schedule_id, Schedule.status.in_(RUNNING_STATUSES))
+                .values(**values)
+            )
+            if updated.rowcount == 0:
+                await session.rollback()
+                print(f"--> [Task] Geração {schedule_id} não está mais em andamento "
+                      f"(cancelada ou removida); resultado descartado.")
+                return
+
+            schedule = None
+            if lessons is not None:
+                schedule = await session.get(Schedule, schedule_id)
+                await store_lessons(session, schedule_id, lessons)
+                # Grade visual montada uma vez aqui, e não a cada GET /grid
+                await materialize_grid(session, schedule, lessons)
+
+            # Salva as alterações
+            await session.commit()
+
+            if schedule is not None:
+                result_cache.remember(schedule.school_id, schedule.input_fingerprint, schedule.id)
+            print(f"--> [Task] Banco de dados atualizado com sucesso (ID: {schedule_id}, status: {status}).")
+
+        except Exception as e:
+            print(f"--> [Task] Erro ao salvar no banco: {str(e)}")
+            await session.rollback()
+            if raise_errors:
+                raise
+
+
+def _build_final_result(result: dict):
+    """Traduz o retorno do solver para (status, result_data) do Schedule."""
+    # Define status final baseado no retorno do service
+    if result.get("status") == "cancelled":
+        final_status = "cancelled"
+    else:
+        final_status = "completed" if result.get("status") == "success" else "error"
+
+    if final_status == "completed":
+        final_data = {"lessons": result.get("result"), "stats": result.get("stats")}
+    else:
+        final_data = result
+
+    print(f"--> [Task] Algoritmo finalizado. Status: {final_status}")
+    return final_status, final_data
+
+
+async def task_generate_schedule(
+        schedule_id: int,
+        school_data: dict,
+        school_id: int = None,
+        solver_params: dict = None,
+        db_session=None
+):
     """
     Função Worker que roda em background.
-    Adaptada para não travar a API (usando thread) e salvar via AsyncSession.
+    O solver roda no executor configurado em SOLVER_BACKEND (pool de processos ou thread),
+    e o resultado é salvo via AsyncSession.
 
+    :param school_id: Escola dona da reserva feita em solver_executor.reserve();
+                      a vaga é liberada ao final da execução.
+    :param solver_params: Parâmetros do CP-SAT já resolvidos (resolve_solver_params).
     :param db_session: Ignorado (mantido apenas para compatibilidade se passado por engano),
                        pois criamos nossa própria sessão aqui.
     """
@@ -19,19 +116,29 @@ async def task_generate_schedule(schedule_id: int, school_data: dict, db_session
     # ---------------------------------------------------------
     # 1. EXECUÇÃO DO ALGORITMO (CPU BOUND)
     # ---------------------------------------------------------
-    try:
-        # Instancia o serviço
-        service = ScheduleGeneratorService(school_data)
+    cancel_token = CancelToken(schedule_id)
 
-        # MÁGICA AQUI: O 'to_thread' joga o processamento pesado (solve) 
-        # para uma thread separada, liberando o FastAPI para receber outras requisições.
-        result = await asyncio.to_thread(service.solve)
+    async def mark_processing():
+        # Cancelada enquanto esperava na fila: nem chega a ocupar o worker
+        if await cancel_token.is_cancelled_async():
+            raise GenerationCancelledError()
 
-        # Define status final baseado no retorno do service
-        final_status = "completed" if result.get("status") == "success" else "error"
-        final_data = result.get("result") if final_status == "completed" else result
+        # Saiu da fila: agora a geração está de fato rodando
+        await _update_schedule(schedule_id, "processing", keep_data=True)
+        publish_progress(schedule_id, {"type": "status", "schedule_id": schedule_id, "status": "processing"})
+
+    try:
+        # O executor espera uma vaga de worker e roda o solve fora do event loop
+        result = await solver_executor.execute(
+            school_id, schedule_id, solve_school, school_data, solver_params,
+            ProgressReporter(schedule_id), cancel_token,
+            on_start=mark_processing
+        )
+        final_status, final_data = _build_final_result(result)
 
-        print(f"--> [Task] Algoritmo finalizado. Status: {final_status}")
+    except GenerationCancelledError:
+        print(f"--> [Task] Geração {schedule_id} cancelada antes de começar.")
+        return
 
     except Exception as e:
         print(f"--> [Task] Erro fatal no algoritmo: {str(e)}")
@@ -42,25 +149,112 @@ async def task_generate_schedule(schedule_id: int, school_data: dict, db_session
     # 2. ATUALIZAÇÃO DO BANCO DE DADOS (IO BOUND)
     # ---------------------------------------------------------
     # Como a sessão original fechou quando a requisição HTTP acabou,
-    # abrimos uma nova conexão exclusiva para esta task.
-    async with AsyncSessionLocal() as session:
-        try:
-            # Busca o agendamento pelo ID
-            query = select(Schedule).where(Schedule.id == schedule_id)
-            db_result = await session.execute(query)
-            schedule = db_result.scalar_one_or_none()
-
-            if schedule:
-                # Atualiza os campos
-                schedule.status = final_status
-                schedule.result_data = final_data  # Certifique-se de ter criado esta coluna JSON no banco
-
-                # Salva as alterações
-                await session.commit()
-                print(f"--> [Task] Banco de dados atualizado com sucesso (ID: {schedule_id}).")
-            else:
-                print(f"--> [Task] Erro Crítico: Schedule {schedule_id} não encontrado no banco para atualização.")
+    # abrimos uma nova conexão exclusiva para esta task (pool de fundo, não o das requisições).
+    await _update_schedule(schedule_id, final_status, final_data)
+    publish_progress(schedule_id, {"type": "done", "schedule_id": schedule_id, "status": final_status})
+
+
+@celery_app.task(
+    bind=True,
+    name="app.tasks.generate_schedule.generate_schedule_job",
+    max_retries=settings.CELERY_MAX_RETRIES,
+    acks_late=True,
+)
+def generate_schedule_job(self, schedule_id: int, school_data: dict, solver_params: dict = None):
+    """
+    Versão Celery da geração: roda nos workers da fila de solver (Procfile: worker),
+    podendo escalar horizontalmente em várias máquinas.
+
+    Só falhas de infraestrutura (banco fora do ar) são re-tentadas; um modelo
+    inviável é um resultado válido e vai para o banco como status "error".
+    """
+    print(f"--> [Celery] Geração {schedule_id} (tentativa {self.request.retries + 1})")
+
+    def save(status, result_data=None, keep_data=False):
+        run_coroutine_sync(_update_schedule(
+            schedule_id,
+            status,
+            result_data,
+            keep_data=keep_data,
+            session_factory=WorkerSessionLocal,
+            raise_errors=True,
+        ))
+
+    cancel_token = CancelToken(schedule_id)
+    if cancel_token.is_cancelled():
+        print(f"--> [Celery] Geração {schedule_id} cancelada antes de começar.")
+        return {"schedule_id": schedule_id, "status": "cancelled"}
+
+    try:
+        save("processing", keep_data=True)
+        publish_progress(schedule_id, {"type": "status", "schedule_id": schedule_id, "status": "processing"})
 
+        try:
+            final_status, final_data = _build_final_result(
+                solve_school(school_data, solver_params, ProgressReporter(schedule_id), cancel_token)
+            )
+        except SoftTimeLimitExceeded:
+            raise
         except Exception as e:
-            print(f"--> [Task] Erro ao salvar no banco: {str(e)}")
-            await session.rollback()
\ No newline at end of file
+            print(f"--> [Celery] Erro fatal no algoritmo: {str(e)}")
+            final_status, final_data = "error", {"error": str(e)}
+
+        save(final_status, final_data)
+        publish_progress(schedule_id, {"type": "done", "schedule_id": schedule_id, "status": final_status})
+    except SoftTimeLimitExceeded:
+        # Sem isso o hard limit mataria o processo e a geração ficaria em "processing" para sempre
+        print(f"--> [Celery] Geração {schedule_id} excedeu {settings.CELERY_SOFT_TIME_LIMIT}s.")
+        final_status = "error"
+        save(final_status, {"error": "Tempo limite da geração excedido."})
+        publish_progress(schedule_id, {"type": "done", "schedule_id": schedule_id, "status": final_status})
+    except (OperationalError, DBAPIError, OSError) as e:
+        # Banco indisponível: devolve para a fila com backoff exponencial
+        raise self.retry(exc=e, countdown=2 ** self.request.retries * 10)
+
+    return {"schedule_id": schedule_id, "status": final_status}
+
+
+def dispatch_generation(
+        background_tasks: BackgroundTasks,
+        schedule_id: int,
+        school_data: dict,
+        school_id: int,
+        solver_params: dict = None
+) -> None:
+    """
+    Envia a geração para o backend configurado (SOLVER_RUN_BACKEND).
+    No modo "celery" a vaga local (solver_executor) não é usada: a fila é do broker.
+    Com CELERY_TASK_ALWAYS_EAGER a geração vai para a thread (não roda no event loop).
+    """
+    if settings.SOLVER_RUN_BACKEND == "celery":
+        generate_schedule_job.apply_async(
+            kwargs={"schedule_id": schedule_id, "school_data": school_data, "solver_params": solver_params},
+            queue=settings.CELERY_SOLVER_QUEUE,
+            task_id=_celery_task_id(schedule_id),
+        )
+        return
+
+    background_tasks.add_task(
+        task_generate_schedule,
+        schedule_id=schedule_id,
+        school_data=school_data,
+        school_id=school_id,
+        solver_params=solver_params
+    )
+
+
+def _celery_task_id(schedule_id: int) -> str:
+    # Id determinístico: permite revogar a task só com o id do agendamento
+    return f"schedule-{schedule_id}"
+
+
+def revoke_generation(schedule_id: int) -> None:
+    """
+    Revoga a task do Celery: se ainda estiver na fila, nunca roda.
+    Se já estiver rodando, o CancelToken interrompe o solver pelo status no banco.
+    """
+    try:
+        celery_app.control.revoke(_celery_task_id(schedule_id))
+    except Exception as e:
+        # Sem broker (ex.: modo eager) não há o que revogar
+        print(f"--> [Celery] Não foi possível revogar a geração {schedule_id}: {e}")
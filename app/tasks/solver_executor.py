@@ -0,0 +1,150 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+from app.core.config import settings
+from app.core.exceptions import SolverSaturatedError
+
+
+class SolverExecutor:
+    """
+    Backend de execução do solver.
+
+    O endpoint só reserva uma vaga (reserve) e agenda o trabalho; quem roda o
+    CP-SAT é um pool de processos dedicado (SOLVER_BACKEND="process") ou, em
+    desenvolvimento, uma thread do próprio processo da API ("thread").
+
+    Limites:
+      - max_workers: gerações rodando ao mesmo tempo (as demais esperam na fila)
+      - queue_limit: gerações aceitas no total (rodando + esperando)
+      - max_per_school: gerações simultâneas de uma mesma escola
+    """
+
+    def __init__(self, backend: str, max_workers: int, queue_limit: int, max_per_school: int):
+        self.backend = backend
+        self.max_workers = max_workers
+        self.queue_limit = queue_limit
+        self.max_per_school = max_per_school
+
+        self._lock = threading.Lock()
+        self._accepted = 0
+        self._running = 0
+        self._per_school: Dict[int, Set[int]] = {}  # school_id -> schedule_ids ativos
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    # ------------------------------------------------------------------
+    # Controle de vagas (chamado no request)
+    # ------------------------------------------------------------------
+    def reserve(self, school_id: int, schedule_id: int) -> bool:
+        """
+        Reserva uma vaga para a geração da escola. Retorna True se a geração vai
+        começar imediatamente e False se vai esperar na fila.
+        Levanta SolverSaturatedError quando não há vaga.
+        """
+        with self._lock:
+            if self._accepted >= self.queue_limit:
+                raise SolverSaturatedError(
+                    "Fila de geração cheia. Tente novamente em instantes.",
+                    retry_after=settings.SOLVER_RETRY_AFTER_SECONDS,
+                )
+            if len(self._per_school.get(school_id, ())) >= self.max_per_school:
+                raise SolverSaturatedError(
+                    "Já existe uma geração em andamento para esta escola.",
+                    retry_after=settings.SOLVER_RETRY_AFTER_SECONDS,
+                )
+
+            self._accepted += 1
+            self._per_school.setdefault(school_id, set()).add(schedule_id)
+            return self._accepted <= self.max_workers
+
+    def release(self, school_id: int, schedule_id: int) -> None:
+        """Libera a vaga ao fim da execução (chamado uma única vez por geração)."""
+        with self._lock:
+            self._accepted = max(0, self._accepted - 1)
+        self.discard(school_id, schedule_id)
+
+    def discard(self, school_id: int, schedule_id: int) -> None:
+        """
+        Tira a geração da contagem da escola. Usado no cancelamento: a escola já pode
+        enfileirar outra, mesmo antes do worker terminar de parar o solver.
+        """
+        with self._lock:
+            active = self._per_school.get(school_id)
+            if active is not None:
+                active.discard(schedule_id)
+                if not active:
+                    del self._per_school[school_id]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": self.backend,
+                "max_workers": self.max_workers,
+                "running": self._running,
+                "queued": self._accepted - self._running,
+                "queue_limit": self.queue_limit,
+            }
+
+    # ------------------------------------------------------------------
+    # Execução (chamado na background task)
+    # ------------------------------------------------------------------
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Criado sob demanda para ficar preso ao event loop que realmente executa as tasks
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        return self._semaphore
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        if self._pool is None:
+            # "spawn" evita herdar o event loop e as conexões do banco do processo da API
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._pool
+
+    async def execute(
+            self,
+            school_id: int,
+            schedule_id: int,
+            fn: Callable[..., Any],
+            *args: Any,
+            on_start: Optional[Callable[[], Awaitable[None]]] = None,
+    ) -> Any:
+        """
+        Espera uma vaga de worker, roda fn(*args) e libera a reserva feita em reserve().
+        fn precisa ser uma função de módulo (picklable) no backend "process".
+        """
+        try:
+            async with self._get_semaphore():
+                with self._lock:
+                    self._running += 1
+                try:
+                    if on_start is not None:
+                        await on_start()
+
+                    if self.backend == "process":
+                        loop = asyncio.get_running_loop()
+                        return await loop.run_in_executor(self._get_pool(), fn, *args)
+                    return await asyncio.to_thread(fn, *args)
+                finally:
+                    with self._lock:
+                        self._running -= 1
+        finally:
+            self.release(school_id, schedule_id)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+solver_executor = SolverExecutor(
+    backend=settings.SOLVER_RUN_BACKEND,
+    max_workers=settings.SOLVER_MAX_WORKERS,
+    queue_limit=settings.SOLVER_QUEUE_LIMIT,
+    max_per_school=settings.SOLVER_MAX_JOBS_PER_SCHOOL,
+)
@@ -1 +1,47 @@
-# Funções comuns (tempo, validações)
\ No newline at end of file
+from typing import Any, Dict, List
+
+
+def get_lessons(result_data: Any) -> List[Dict[str, Any]]:
+    """
+    Retorna a lista de aulas de um Schedule.result_data.
+
+    Aceita o formato atual ({"lessons": [...], "stats": {...}}) e o antigo,
+    em que o result_data era a própria lista de aulas.
+    """
+    if not result_data:
+        return []
+    if isinstance(result_data, list):
+        return result_data
+    return result_data.get("lessons") or []
+
+
+def run_coroutine_sync(coro):
+    """
+    Executa uma coroutine a partir de código síncrono (ex.: task do Celery).
+
+    Se já houver um event loop rodando nesta thread (Celery em modo eager chamado
+    de dentro de um endpoint), executa em uma thread separada com um loop próprio.
+    """
+    import asyncio
+    import threading
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    outcome = {}
+
+    def runner():
+        try:
+            outcome["result"] = asyncio.run(coro)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=runner)
+    thread.start()
+    thread.join()
+
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome.get("result")
@@ -1 +1,173 @@
-# Import/export
\ No newline at end of file
+# Import/export: leitura incremental de registros em CSV, JSON e XML
+import codecs
+import csv
+import json
+from typing import IO, Any, Dict, Iterator
+
+# Upload de terceiros: defusedxml recusa entidades (billion laughs) e DTDs externos
+from defusedxml.ElementTree import iterparse
+
+FORMATS = ("csv", "json", "xml")
+EXTENSIONS = {".csv": "csv", ".json": "json", ".jsonl": "json", ".ndjson": "json", ".xml": "xml"}
+
+CHUNK_SIZE = 64 * 1024
+MAX_RECORD_CHARS = 1024 * 1024  # Um registro (objeto JSON) maior que isso recusa o arquivo
+
+
+def detect_format(filename: str) -> str:
+    """Formato pela extensão do arquivo; '' se não reconhecer."""
+    name = (filename or "").lower()
+    for extension, fmt in EXTENSIONS.items():
+        if name.endswith(extension):
+            return fmt
+    return ""
+
+
+def iter_records(fileobj: IO[bytes], fmt: str) -> Iterator[Dict[str, Any]]:
+    """
+    Registros (dicionários) do arquivo, um por vez, sem carregar o arquivo inteiro.
+    Um registro que não é um objeto vem como {"__invalid__": descrição}.
+    """
+    if fmt == "csv":
+        return iter_csv_records(fileobj)
+    if fmt == "json":
+        return iter_json_records(fileobj)
+    if fmt == "xml":
+        return iter_xml_records(fileobj)
+    raise ValueError(f"Formato desconhecido: {fmt}")
+
+
+def iter_csv_records(fileobj: IO[bytes]) -> Iterator[Dict[str, Any]]:
+    """CSV com cabeçalho; aceita ',' ou ';' (Excel em português) como separador."""
+    text = codecs.getreader("utf-8-sig")(fileobj)
+    first_line = text.readline()
+    delimiter = ";" if first_line.count(";") > first_line.count(",") else ","
+
+    header = next(csv.reader([first_line], delimiter=delimiter), [])
+    reader = csv.DictReader(text, fieldnames=[h.strip() for h in header], delimiter=delimiter)
+    for row in reader:
+        # Colunas a mais na linha vêm na chave None
+        row.pop(None, None)
+        yield row
+
+
+def iter_json_records(fileobj: IO[bytes]) -> Iterator[Dict[str, Any]]:
+    """
+    Lista de objetos ([{...}, {...}]) ou um objeto por linha (NDJSON), lidos em
+    blocos de CHUNK_SIZE: cada objeto é decodificado assim que termina de chegar.
+
+    No NDJSON uma linha inválida vira um registro inválido e a leitura segue. Na lista
+    não há como achar o próximo registro depois de um erro: o arquivo é recusado assim
+    que o registro pendente passa de MAX_RECORD_CHARS (ou no fim do arquivo).
+    """
+    reader = codecs.getreader("utf-8-sig")(fileobj)
+    first = reader.read(1)
+    while first and first.isspace():
+        first = reader.read(1)
+
+    if first == "[":
+        yield from _iter_json_array(reader)
+    elif first:
+        yield from _iter_ndjson(first, reader)
+
+
+def _json_record(value: Any) -> Dict[str, Any]:
+    return value if isinstance(value, dict) else {"__invalid__": "o registro não é um objeto JSON"}
+
+
+def _iter_ndjson(prefix: str, reader) -> Iterator[Dict[str, Any]]:
+    buffer = prefix
+    eof = False
+    while True:
+        newline = buffer.find("\n")
+        if newline < 0 and not eof:
+            if len(buffer) > MAX_RECORD_CHARS:
+                raise ValueError(f"linha com mais de {MAX_RECORD_CHARS} caracteres")
+            chunk = reader.read(CHUNK_SIZE)
+            if chunk:
+                buffer += chunk
+            else:
+                eof = True
+            continue
+
+        if newline < 0:
+            line, buffer = buffer, ""
+        else:
+            line, buffer = buffer[:newline], buffer[newline + 1:]
+
+        if line.strip():
+            try:
+                yield _json_record(json.loads(line))
+            except json.JSONDecodeError as e:
+                yield {"__invalid__": f"JSON inválido: {e.msg}"}
+        if eof and not buffer:
+            return
+
+
+def _iter_json_array(reader) -> Iterator[Dict[str, Any]]:
+    decoder = json.JSONDecoder()
+    buffer = ""
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buffer, eof
+        chunk = reader.read(CHUNK_SIZE)
+        if not chunk:
+            eof = True
+            return False
+        buffer += chunk
+        return True
+
+    def skip(chars: str) -> None:
+        nonlocal buffer
+        while True:
+            stripped = buffer.lstrip(chars)
+            if stripped or eof:
+                buffer = stripped
+                return
+            buffer = ""
+            if not fill():
+                return
+
+    while True:
+        # Entre registros: espaços, quebras de linha e vírgulas
+        skip(" \t\r\n,")
+        if not buffer or buffer.startswith("]"):
+            return
+
+        try:
+            value, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError as e:
+            # Registro ainda incompleto: lê mais um bloco, até o limite de tamanho
+            if len(buffer) <= MAX_RECORD_CHARS and fill():
+                continue
+            raise ValueError(f"JSON inválido: {e.msg}") from e
+
+        buffer = buffer[end:]
+        yield _json_record(value)
+
+
+def iter_xml_records(fileobj: IO[bytes]) -> Iterator[Dict[str, Any]]:
+    """
+    Cada filho da raiz é um registro; atributos e subelementos viram os campos:
+      <teachers><teacher code="P1"><name>Ana</name></teacher>...</teachers>
+    Os elementos já lidos são descartados (iterparse + clear). O parser é o do
+    defusedxml: entidades e DTDs externos fazem o arquivo ser recusado.
+    """
+    depth = 0
+    root = None
+    for event, element in iterparse(fileobj, events=("start", "end")):
+        if event == "start":
+            if root is None:
+                root = element
+            depth += 1
+            continue
+
+        depth -= 1
+        if depth == 1:
+            record: Dict[str, Any] = dict(element.attrib)
+            for child in element:
+                record[child.tag] = (child.text or "").strip()
+            yield record
+            element.clear()
+            root.clear()
@@ -0,0 +1,137 @@
+"""
+Benchmark do hash de senhas no login: compara o bcrypt chamado direto na corrotina
+("inline", como o /auth/login fazia) com o PasswordHasher (pool de threads) e mede,
+além da vazão de logins, o quanto o event loop fica travado.
+
+Um "batimento" agenda asyncio.sleep(intervalo) em loop e registra o atraso de cada
+acordada: com o bcrypt no loop, o atraso chega ao tempo de um hash inteiro (é o que
+qualquer outra requisição do worker esperaria); com o pool, fica perto de zero.
+
+Com --old-rounds, as senhas começam com outro custo e cada login devolve o hash
+refeito com PASSWORD_BCRYPT_ROUNDS (rehash-on-login).
+
+Uso:
+    python -m benchmarks.bench_login
+    python -m benchmarks.bench_login --logins 200 --concurrency 50 --workers 8 \\
+        --rounds 12 --old-rounds 10 --out bench_login
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+PASSWORD = "senha-de-teste"
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Percentil por posição mais próxima (valores já ordenados)."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[k]
+
+
+async def heartbeat(interval: float, lags: List[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(max(0.0, time.perf_counter() - start - interval))
+
+
+async def run_mode(mode: str, hashed: str, args) -> Dict[str, Any]:
+    from app.core.security import PasswordHasher, pwd_context
+
+    hasher = PasswordHasher(max_workers=args.workers, max_pending=args.logins)
+    latencies: List[float] = []
+    lags: List[float] = []
+    rehashed = 0
+    counter = iter(range(args.logins))
+
+    async def login():
+        nonlocal rehashed
+        for _ in counter:
+            start = time.perf_counter()
+            if mode == "inline":
+                ok, new_hash = pwd_context.verify_and_update(PASSWORD, hashed)
+            else:
+                ok, new_hash = await hasher.verify_and_update(PASSWORD, hashed)
+            latencies.append(time.perf_counter() - start)
+            assert ok
+            rehashed += new_hash is not None
+            await asyncio.sleep(0)  # Devolve o loop entre logins, como um endpoint faria
+
+    stop = asyncio.Event()
+    beat = asyncio.create_task(heartbeat(args.heartbeat_ms / 1000, lags, stop))
+    start = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(args.concurrency)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await beat
+    hasher.shutdown()
+
+    latencies.sort()
+    lags.sort()
+    return {
+        "mode": mode,
+        "logins": len(latencies),
+        "logins_per_second": round(len(latencies) / elapsed, 1),
+        "login_p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "login_p99_ms": round(percentile(latencies, 99) * 1000, 1),
+        "loop_lag_p99_ms": round(percentile(lags, 99) * 1000, 1),
+        "loop_lag_max_ms": round(lags[-1] * 1000, 1) if lags else 0.0,
+        "rehashed": rehashed,
+    }
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark do hash de senhas no login")
+    parser.add_argument("--logins", type=int, default=64, help="Logins por modo")
+    parser.add_argument("--concurrency", type=int, default=16, help="Logins simultâneos")
+    parser.add_argument("--workers", type=int, default=4, help="Threads do PasswordHasher")
+    parser.add_argument("--rounds", type=int, default=12, help="PASSWORD_BCRYPT_ROUNDS")
+    parser.add_argument("--old-rounds", type=int, default=None,
+                        help="Custo dos hashes existentes (diferente de --rounds = rehash no login)")
+    parser.add_argument("--heartbeat-ms", type=float, default=5.0, help="Intervalo do batimento do loop")
+    parser.add_argument("--modes", nargs="+", default=["inline", "executor"], choices=["inline", "executor"])
+    parser.add_argument("--out", default=None, help="Grava os resultados em <out>.json")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    # O custo precisa estar no ambiente antes de importar app.core.security (pwd_context)
+    os.environ["PASSWORD_BCRYPT_ROUNDS"] = str(args.rounds)
+    from passlib.hash import bcrypt
+
+    # Direto no handler: o pwd_context sempre gera hashes com o custo configurado
+    hashed = bcrypt.using(rounds=args.old_rounds or args.rounds).hash(PASSWORD)
+
+    print(f"{'modo':>9} {'logins/s':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} "
+          f"{'lag p99':>8} {'lag máx':>8} {'rehash':>7}")
+    results = []
+    for mode in args.modes:
+        row = asyncio.run(run_mode(mode, hashed, args))
+        results.append(row)
+        print(f"{mode:>9} {row['logins_per_second']:>9} {row['login_p50_ms']:>9} {row['login_p99_ms']:>9} "
+              f"{row['loop_lag_p99_ms']:>8} {row['loop_lag_max_ms']:>8} {row['rehashed']:>7}")
+
+    if args.out:
+        with open(f"{args.out}.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "generated_at": datetime.utcnow().isoformat(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "cpus": os.cpu_count(),
+                "args": vars(args),
+                "results": results,
+            }, f, indent=2, ensure_ascii=False)
+        print(f"Resultados em {args.out}.json")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
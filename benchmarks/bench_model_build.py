@@ -0,0 +1,45 @@
+"""
+Mede o tempo de construção do modelo CP-SAT em função do tamanho da escola.
+
+Uso:
+    python -m benchmarks.bench_model_build [n_turmas ...]
+"""
+import sys
+import time
+
+from app.services.schedule_generator import ScheduleGeneratorService
+from benchmarks.synthetic import make_school_data
+
+DEFAULT_SIZES = [5, 15, 30, 60, 90]
+
+
+def bench(n_groups: int) -> dict:
+    school_data = make_school_data(n_groups)
+    service = ScheduleGeneratorService(school_data)
+
+    start = time.perf_counter()
+    service.build_model()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "class_groups": n_groups,
+        "subjects": len(school_data["subjects"]),
+        "variables": len(service.vars),
+        "constraints": len(service.model.Proto().constraints),
+        "build_seconds": round(elapsed, 4),
+    }
+
+
+def main(argv):
+    sizes = [int(a) for a in argv] or DEFAULT_SIZES
+    print(f"{'turmas':>7} {'matérias':>9} {'variáveis':>10} {'restrições':>11} {'build (s)':>10}")
+    for n in sizes:
+        row = bench(n)
+        print(
+            f"{row['class_groups']:>7} {row['subjects']:>9} {row['variables']:>10} "
+            f"{row['constraints']:>11} {row['build_seconds']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,188 @@
+"""
+Benchmark do solver: roda o ScheduleGeneratorService sobre uma matriz de tamanhos
+de escola sintética e grava, por caso, tempo de construção do modelo, tempo de
+solve, variáveis, restrições, pico de memória (RSS) e status; por tamanho, a taxa
+de viabilidade entre as sementes.
+
+Não usa banco nem rede: cada caso roda em um processo novo (para o pico de RSS
+ser só daquele caso) com os dados de benchmarks/synthetic.py.
+
+Uso:
+    python -m benchmarks.bench_solver
+    python -m benchmarks.bench_solver --groups 10 30 60 --seeds 3 --max-time 20 \\
+        --density 0.1 --shifts Matutino Vespertino --slots 10 --out bench_solver
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import platform
+import resource
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List
+
+from benchmarks.synthetic import make_school_data
+
+DEFAULT_GROUPS = [5, 15, 30, 60]
+
+CSV_FIELDS = [
+    "class_groups", "teachers", "subjects", "density", "shifts", "days", "slots_per_day", "seed",
+    "variables", "constraints", "build_seconds", "solve_seconds", "status", "feasible", "peak_rss_mb",
+]
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_case(case: Dict[str, Any]) -> Dict[str, Any]:
+    """Um caso da matriz; roda no processo filho."""
+    from app.services.schedule_generator import ScheduleGeneratorService, resolve_solver_params
+
+    school_data = make_school_data(
+        case["class_groups"],
+        n_teachers=case["teachers"],
+        unavailability_density=case["density"],
+        shifts=case["shifts"],
+        days=case["days"],
+        slots_per_day=case["slots_per_day"],
+        seed=case["seed"],
+    )
+    params = resolve_solver_params({
+        "max_time_in_seconds": case["max_time"],
+        "num_search_workers": case["workers"],
+        "random_seed": case["seed"],
+    })
+    service = ScheduleGeneratorService(school_data, params)
+
+    start = time.perf_counter()
+    service.build_model()
+    build_seconds = time.perf_counter() - start
+
+    # solve() monta o próprio modelo: o tempo de solve é o wall_time do CP-SAT
+    result = ScheduleGeneratorService(school_data, params).solve()
+    solve_seconds = result["stats"].get("wall_time") or 0.0
+
+    return {
+        "class_groups": case["class_groups"],
+        "teachers": len(school_data["teachers"]),
+        "subjects": len(school_data["subjects"]),
+        "density": case["density"],
+        "shifts": "+".join(case["shifts"]),
+        "days": case["days"],
+        "slots_per_day": case["slots_per_day"],
+        "seed": case["seed"],
+        "variables": len(service.vars),
+        "constraints": len(service.model.Proto().constraints),
+        "build_seconds": round(build_seconds, 4),
+        "solve_seconds": round(solve_seconds, 4),
+        "status": result["stats"].get("solver_status", result["status"]),
+        "feasible": result["status"] == "success",
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def build_matrix(args) -> List[Dict[str, Any]]:
+    return [
+        {
+            "class_groups": n,
+            "teachers": args.teachers,
+            "density": args.density,
+            "shifts": args.shifts,
+            "days": args.days,
+            "slots_per_day": args.slots,
+            "seed": seed,
+            "max_time": args.max_time,
+            "workers": args.workers,
+        }
+        for n in args.groups
+        for seed in range(args.seeds)
+    ]
+
+
+def summarize(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Por tamanho: taxa de viabilidade e médias de tempo e memória."""
+    summary = []
+    for n in sorted({r["class_groups"] for r in rows}):
+        group = [r for r in rows if r["class_groups"] == n]
+        summary.append({
+            "class_groups": n,
+            "runs": len(group),
+            "feasibility_rate": round(sum(r["feasible"] for r in group) / len(group), 3),
+            "avg_variables": round(sum(r["variables"] for r in group) / len(group)),
+            "avg_build_seconds": round(sum(r["build_seconds"] for r in group) / len(group), 4),
+            "avg_solve_seconds": round(sum(r["solve_seconds"] for r in group) / len(group), 4),
+            "max_peak_rss_mb": max(r["peak_rss_mb"] for r in group),
+        })
+    return summary
+
+
+def write_results(out: str, rows: List[Dict[str, Any]], summary: List[Dict[str, Any]], args) -> None:
+    with open(f"{out}.json", "w", encoding="utf-8") as f:
+        json.dump({
+            "generated_at": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "args": vars(args),
+            "summary": summary,
+            "runs": rows,
+        }, f, indent=2, ensure_ascii=False)
+
+    with open(f"{out}.csv", "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark do gerador de grades (CP-SAT)")
+    parser.add_argument("--groups", type=int, nargs="+", default=DEFAULT_GROUPS, help="Turmas (N) por tamanho")
+    parser.add_argument("--teachers", type=int, default=None, help="Professores (M); padrão: 30")
+    parser.add_argument("--density", type=float, default=0.0, help="Fração de horários indisponíveis")
+    parser.add_argument("--shifts", nargs="*", default=[], help="Turnos distribuídos entre as turmas")
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--slots", type=int, default=5, help="Aulas por dia")
+    parser.add_argument("--seeds", type=int, default=3, help="Sementes por tamanho (taxa de viabilidade)")
+    parser.add_argument("--max-time", type=float, default=10.0, help="Tempo limite do solve por caso")
+    parser.add_argument("--workers", type=int, default=4, help="num_search_workers do CP-SAT")
+    parser.add_argument("--out", default="bench_solver", help="Prefixo dos arquivos .json e .csv")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    matrix = build_matrix(args)
+
+    print(f"{'turmas':>7} {'seed':>5} {'variáveis':>10} {'restrições':>11} "
+          f"{'build (s)':>10} {'solve (s)':>10} {'RSS (MB)':>9} status")
+
+    rows = []
+    # Um processo por caso (max_tasks_per_child=1): o pico de RSS não vaza entre casos
+    with ProcessPoolExecutor(
+            max_workers=1,
+            mp_context=multiprocessing.get_context("spawn"),
+            max_tasks_per_child=1,
+    ) as pool:
+        for row in pool.map(run_case, matrix):
+            rows.append(row)
+            print(
+                f"{row['class_groups']:>7} {row['seed']:>5} {row['variables']:>10} {row['constraints']:>11} "
+                f"{row['build_seconds']:>10} {row['solve_seconds']:>10} {row['peak_rss_mb']:>9} {row['status']}"
+            )
+
+    summary = summarize(rows)
+    write_results(args.out, rows, summary, args)
+
+    print()
+    for s in summary:
+        print(f"{s['class_groups']:>7} turmas: viáveis {s['feasibility_rate']:.0%} de {s['runs']}")
+    print(f"Resultados em {args.out}.json e {args.out}.csv")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
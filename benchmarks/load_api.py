@@ -0,0 +1,409 @@
+"""
+Teste de carga da API: semeia um banco local com escolas grandes e mede latência
+(p50/p95/p99) e vazão dos endpoints principais, dentro do processo (httpx +
+ASGITransport sobre app.main:app) ou contra um uvicorn local de 1 worker.
+
+Não precisa de serviços externos: por padrão usa SQLite (aiosqlite) num diretório
+temporário. Para medir com Postgres, passe --database-url.
+
+O cenário "auth" é uma rota só com Depends(get_current_user), montada pelo próprio
+benchmark: a diferença para "root" (sem autenticação) é o custo do JWT + busca do
+usuário em cada requisição.
+
+Uso:
+    python -m benchmarks.load_api
+    python -m benchmarks.load_api --schools 3 --teachers 300 --groups 120 \\
+        --requests 2000 --concurrency 32 --server uvicorn --out load_api
+    python -m benchmarks.load_api --max-p95-ms 250   # CI: sai com 1 se algum p95 passar disso
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+API = "/api/v1"
+AUTH_PROBE = "/__load/auth"
+DEFAULT_SCENARIOS = ["root", "auth", "teachers", "schedule", "grid", "grid_304", "teacher_view"]
+
+
+# ----------------------------------------------------------------------
+# Banco e dados
+# ----------------------------------------------------------------------
+def _lessons_for(subjects: List[Dict[str, Any]], days: int, slots_per_day: int) -> List[Dict[str, Any]]:
+    """
+    Aulas plausíveis para ler (não é uma solução do solver): cada turma preenche a
+    semana em ordem com as aulas das suas matérias.
+    """
+    from app.services.lesson_index import lesson_view
+
+    by_group: Dict[int, List[Dict[str, Any]]] = {}
+    for s in subjects:
+        by_group.setdefault(s["class_group_id"], []).append(s)
+
+    lessons = []
+    for g_id, group_subjects in by_group.items():
+        slot = 0
+        for s in group_subjects:
+            for _ in range(s["weekly_lessons"]):
+                if slot >= days * slots_per_day:
+                    break
+                day, period = divmod(slot, slots_per_day)
+                lessons.append(lesson_view(g_id, s["teacher_id"], s["id"], day, period))
+                slot += 1
+    return lessons
+
+
+async def seed(args) -> List[Dict[str, Any]]:
+    """Cria as tabelas e as escolas; devolve, por escola, token e ids usados nos cenários."""
+    from sqlalchemy import insert, select
+
+    import app.models  # noqa: F401  (registra todas as tabelas no Base.metadata)
+    from app.core.security import create_access_token
+    from app.db.migrations import run_migrations
+    from app.db.session import AsyncSessionLocal, engine
+    from app.models.base import Base
+    from app.models.class_group import ClassGroup
+    from app.models.schedule import Schedule
+    from app.models.school import School
+    from app.models.subject import Subject
+    from app.models.teacher import Teacher
+    from app.models.user import User
+    from app.services.lesson_index import store_lessons
+    from app.services.principal_cache import Principal
+    from benchmarks.synthetic import make_school_data
+
+    # O ASGITransport não dispara o lifespan: cria as tabelas como o main.py faria.
+    # Num banco já existente as escolas de carga entram ao lado dos dados (código único por execução).
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(run_migrations)
+
+    tenants = []
+    run_tag = int(time.time())
+    for n in range(args.schools):
+        data = make_school_data(
+            args.groups,
+            subjects_per_group=args.subjects,
+            n_teachers=args.teachers,
+            seed=n,
+            days=args.days,
+            slots_per_day=args.slots,
+        )
+
+        async with AsyncSessionLocal() as session:
+            user = User(email=f"load{n}.{run_tag}@example.com", hashed_password="x", role="admin_school")
+            session.add(user)
+            await session.flush()
+            school = School(name=f"Escola {n}", code=f"LOAD-{run_tag}-{n}", owner_id=user.id)
+            session.add(school)
+            await session.flush()
+            user.school_id = school.id
+
+            # Insert pelo Core: sem disparar os eventos de catalog_version (models/events.py) por linha
+            teacher_ids = {}
+            for t in data["teachers"]:
+                result = await session.execute(
+                    insert(Teacher).values(name=t["name"], code=f"P{t['id']}", importance=1, school_id=school.id)
+                    .returning(Teacher.id)
+                )
+                teacher_ids[t["id"]] = result.scalar_one()
+            group_ids = {}
+            for g in data["class_groups"]:
+                result = await session.execute(
+                    insert(ClassGroup).values(name=g["name"], grade=g["grade"], school_id=school.id)
+                    .returning(ClassGroup.id)
+                )
+                group_ids[g["id"]] = result.scalar_one()
+
+            subjects = []
+            for s in data["subjects"]:
+                result = await session.execute(
+                    insert(Subject).values(
+                        name=s["name"], code=f"M{s['id']}",
+                        class_group_id=group_ids[s["class_group_id"]],
+                        teacher_id=teacher_ids[s["teacher_id"]],
+                        weekly_lessons=s["weekly_lessons"],
+                        max_daily_lessons=s["max_daily_lessons"],
+                        school_id=school.id,
+                    ).returning(Subject.id)
+                )
+                subjects.append({
+                    **s,
+                    "id": result.scalar_one(),
+                    "class_group_id": group_ids[s["class_group_id"]],
+                    "teacher_id": teacher_ids[s["teacher_id"]],
+                })
+
+            lessons = _lessons_for(subjects, args.days, args.slots)
+            schedule = Schedule(
+                status="completed",
+                generated_at=datetime.utcnow(),
+                school_id=school.id,
+                result_data={"stats": {}, "lesson_count": len(lessons)},
+            )
+            session.add(schedule)
+            await session.flush()
+            await store_lessons(session, schedule.id, lessons)
+            await session.commit()
+
+            # Professor com aulas, para a visão por professor
+            first_teacher = (await session.execute(
+                select(Teacher.id).where(Teacher.school_id == school.id).order_by(Teacher.id).limit(1)
+            )).scalar_one()
+
+        tenants.append({
+            "school_id": school.id,
+            "schedule_id": schedule.id,
+            "teacher_id": first_teacher,
+            "lessons": len(lessons),
+            # Mesmo token do /auth/login (com os claims de escola e papel)
+            "token": create_access_token(
+                user.id, expires_delta=timedelta(hours=2), claims=Principal.from_user(user).claims()
+            ),
+        })
+        print(f"--> [Load] Escola {school.id}: {len(data['teachers'])} professores, "
+              f"{len(data['class_groups'])} turmas, {len(lessons)} aulas")
+
+    await engine.dispose()
+    return tenants
+
+
+# ----------------------------------------------------------------------
+# Cenários
+# ----------------------------------------------------------------------
+def _mount_auth_probe() -> None:
+    """Rota só com a dependência de autenticação (não faz parte da API)."""
+    from fastapi import Depends
+
+    from app.api.dependencies import get_current_user
+    from app.main import app
+
+    if any(getattr(r, "path", None) == AUTH_PROBE for r in app.routes):
+        return
+
+    @app.get(AUTH_PROBE, include_in_schema=False)
+    async def auth_probe(current_user=Depends(get_current_user)):
+        return {"user_id": current_user.id}
+
+
+def build_request(scenario: str, tenant: Dict[str, Any]):
+    """(caminho, headers) de uma requisição do cenário para a escola."""
+    auth = {"Authorization": f"Bearer {tenant['token']}"}
+    schedule_id = tenant["schedule_id"]
+
+    if scenario == "root":
+        return "/", {}
+    if scenario == "auth":
+        return AUTH_PROBE, auth
+    if scenario == "teachers":
+        return f"{API}/teachers/?limit=100", auth
+    if scenario == "schedule":
+        return f"{API}/schedules/{schedule_id}", auth
+    if scenario == "grid":
+        return f"{API}/schedules/{schedule_id}/grid", auth
+    if scenario == "grid_304":
+        return f"{API}/schedules/{schedule_id}/grid", {**auth, "If-None-Match": tenant.get("etag", "")}
+    if scenario == "teacher_view":
+        return f"{API}/schedules/{schedule_id}/teachers/{tenant['teacher_id']}", auth
+    raise ValueError(f"Cenário desconhecido: {scenario}")
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Percentil por posição mais próxima (valores já ordenados)."""
+    if not sorted_values:
+        return 0.0
+    k = max(0, min(len(sorted_values) - 1, round(p / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[k]
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: str, tenants: List[Dict[str, Any]],
+                       total: int, concurrency: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    counter = iter(range(total))
+
+    async def worker():
+        for i in counter:
+            path, headers = build_request(scenario, tenants[i % len(tenants)])
+            start = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    errors = sum(count for code, count in statuses.items() if code >= 400)
+    return {
+        "scenario": scenario,
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "errors": errors,
+        "statuses": {str(code): count for code, count in sorted(statuses.items())},
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+    }
+
+
+async def warm_up(client: httpx.AsyncClient, tenants: List[Dict[str, Any]]) -> None:
+    """
+    Uma requisição de grade por escola: a primeira materializa o grid_data (escrita);
+    as medições pegam o estado estável. Guarda o ETag para o cenário grid_304.
+    """
+    for tenant in tenants:
+        path, headers = build_request("grid", tenant)
+        response = await client.get(path, headers=headers)
+        response.raise_for_status()
+        tenant["etag"] = response.headers.get("etag", "")
+
+
+# ----------------------------------------------------------------------
+# Servidor
+# ----------------------------------------------------------------------
+def start_uvicorn(port: int, env: Dict[str, str]) -> subprocess.Popen:
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", "1", "--log-level", "warning"],
+        env=env,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/", timeout=1).status_code == 200:
+                return process
+        except httpx.TransportError:
+            pass
+        if process.poll() is not None:
+            break
+        time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("uvicorn não subiu a tempo")
+
+
+async def measure(args, tenants: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    if args.server == "uvicorn":
+        client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=60,
+                                   limits=httpx.Limits(max_connections=args.concurrency))
+    else:
+        from app.main import app
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://load", timeout=60)
+
+    results = []
+    async with client:
+        await warm_up(client, tenants)
+        for scenario in args.scenarios:
+            row = await run_scenario(client, scenario, tenants, args.requests, args.concurrency)
+            results.append(row)
+            print(f"{scenario:>13} {row['requests']:>6} {row['throughput_rps']:>9} "
+                  f"{row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9} {row['errors']:>6}")
+        # Pico de conexões em uso durante a carga (dimensionamento do DB_POOL_SIZE)
+        args.db_pool = (await client.get(
+            "/health/db-pool", headers={"Authorization": f"Bearer {tenants[0]['token']}"}
+        )).json()
+    return results
+
+
+def auth_overhead(results: List[Dict[str, Any]]) -> Optional[Dict[str, float]]:
+    by_name = {r["scenario"]: r for r in results}
+    if "root" not in by_name or "auth" not in by_name:
+        return None
+    return {
+        f"{p}_ms": round(by_name["auth"][f"{p}_ms"] - by_name["root"][f"{p}_ms"], 2)
+        for p in ("p50", "p95", "p99")
+    }
+
+
+# ----------------------------------------------------------------------
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Teste de carga da API (latência e vazão)")
+    parser.add_argument("--database-url", default=None,
+                        help="URL async do banco; padrão: SQLite num diretório temporário")
+    parser.add_argument("--server", choices=["asgi", "uvicorn"], default="asgi",
+                        help="asgi: no processo (httpx.ASGITransport); uvicorn: servidor local, 1 worker")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--schools", type=int, default=2, help="Escolas (tenants) semeadas")
+    parser.add_argument("--teachers", type=int, default=150, help="Professores por escola")
+    parser.add_argument("--groups", type=int, default=60, help="Turmas por escola")
+    parser.add_argument("--subjects", type=int, default=10, help="Matérias por turma")
+    parser.add_argument("--days", type=int, default=5)
+    parser.add_argument("--slots", type=int, default=5, help="Aulas por dia")
+    parser.add_argument("--requests", type=int, default=500, help="Requisições por cenário")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requisições simultâneas")
+    parser.add_argument("--scenarios", nargs="+", default=DEFAULT_SCENARIOS, choices=DEFAULT_SCENARIOS)
+    parser.add_argument("--max-p95-ms", type=float, default=None,
+                        help="Falha (código 1) se o p95 de algum cenário passar deste valor")
+    parser.add_argument("--out", default=None, help="Grava os resultados em <out>.json")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+
+    # A URL do banco precisa estar no ambiente antes de importar app.* (settings e engine)
+    if not args.database_url:
+        args.database_url = f"sqlite+aiosqlite:///{tempfile.mkdtemp(prefix='load_api_')}/load_api.db"
+    os.environ["DATABASE_URL"] = args.database_url
+    os.environ.setdefault("PROGRESS_BACKEND", "memory")
+
+    tenants = asyncio.run(seed(args))
+
+    server = None
+    if args.server == "uvicorn":
+        # O uvicorn não conhece a rota de sonda: sem cenário "auth" isolado
+        args.scenarios = [s for s in args.scenarios if s != "auth"]
+        server = start_uvicorn(args.port, dict(os.environ))
+    else:
+        _mount_auth_probe()
+
+    print(f"\n{'cenário':>13} {'req':>6} {'req/s':>9} {'p50 (ms)':>9} {'p95 (ms)':>9} "
+          f"{'p99 (ms)':>9} {'erros':>6}")
+    try:
+        results = asyncio.run(measure(args, tenants))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    overhead = auth_overhead(results)
+    if overhead:
+        print(f"\nAutenticação (auth - root): p50 +{overhead['p50_ms']} ms, p95 +{overhead['p95_ms']} ms")
+
+    if args.out:
+        with open(f"{args.out}.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "generated_at": datetime.utcnow().isoformat(),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "args": {k: v for k, v in vars(args).items() if k not in ("database_url", "db_pool")},
+                "database": args.database_url.split(":", 1)[0],
+                "tenants": [{k: v for k, v in t.items() if k not in ("token", "etag")} for t in tenants],
+                "auth_overhead": overhead,
+                "db_pool": getattr(args, "db_pool", None),
+                "results": results,
+            }, f, indent=2, ensure_ascii=False)
+        print(f"Resultados em {args.out}.json")
+
+    failed = [r for r in results if r["errors"]]
+    if args.max_p95_ms is not None:
+        failed += [r for r in results if r["p95_ms"] > args.max_p95_ms]
+    if failed:
+        print(f"Falhou: {', '.join(sorted({r['scenario'] for r in failed}))}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
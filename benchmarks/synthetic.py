@@ -0,0 +1,100 @@
+"""
+Gerador de escolas sintéticas para benchmarks.
+
+Produz um dicionário no mesmo formato do `school_data` montado em
+`app/api/v1/endpoints/schedules.py::generate_schedule`, sem precisar do banco.
+"""
+import random
+from typing import Any, Dict, Optional, Sequence
+
+
+def shift_windows(shifts: Sequence[str], slots_per_day: int) -> Dict[str, Dict[str, Any]]:
+    """Divide o dia em blocos seguidos, um por turno (ex.: 10 horários, 2 turnos -> 5 + 5)."""
+    if len(shifts) <= 1:
+        return {}
+    size = slots_per_day // len(shifts)
+    return {name: {"slots": list(range(i * size, (i + 1) * size))} for i, name in enumerate(shifts)}
+
+
+def make_school_data(
+        n_groups: int,
+        subjects_per_group: int = 10,
+        teachers_per_subject_area: int = 3,
+        seed: int = 42,
+        n_teachers: Optional[int] = None,
+        unavailability_density: float = 0.0,
+        shifts: Sequence[str] = (),
+        days: int = 5,
+        slots_per_day: int = 5,
+) -> Dict[str, Any]:
+    """
+    :param n_teachers: Total de professores (M). Se omitido, subjects_per_group x
+                       teachers_per_subject_area; os professores são repartidos entre as áreas.
+    :param unavailability_density: Fração dos horários de cada professor marcada como
+                                   indisponível (TEACHER_UNAVAILABILITY por horário).
+    :param shifts: Turnos distribuídos entre as turmas (ex.: ["Matutino", "Vespertino"]);
+                   cada turno fica com um bloco de slots_per_day / len(shifts) horários.
+    """
+    rng = random.Random(seed)
+
+    # Cada "área" (Matemática, Português...) tem um pequeno grupo de professores
+    n_teachers = max(1, n_teachers or subjects_per_group * teachers_per_subject_area)
+    teachers = [{"id": t_id, "name": f"Prof. {t_id}"} for t_id in range(1, n_teachers + 1)]
+    area_teachers = {area: [] for area in range(subjects_per_group)}
+    for t_id in range(1, n_teachers + 1):
+        area_teachers[(t_id - 1) % subjects_per_group].append(t_id)
+
+    class_groups = [
+        {
+            "id": g_id,
+            "name": f"Turma {g_id}",
+            "grade": f"{1 + (g_id - 1) % 9}º Ano",
+            "shift": shifts[(g_id - 1) % len(shifts)] if shifts else None,
+        }
+        for g_id in range(1, n_groups + 1)
+    ]
+
+    subjects = []
+    s_id = 1
+    for g in class_groups:
+        for area in range(subjects_per_group):
+            # Área sem professor próprio (M pequeno): empresta um qualquer
+            candidates = area_teachers[area] or [rng.randint(1, n_teachers)]
+            subjects.append({
+                "id": s_id,
+                "name": f"Matéria {area}",
+                "teacher_id": rng.choice(candidates),
+                "class_group_id": g["id"],
+                "weekly_lessons": rng.choice([1, 2, 2, 3]),
+                "max_daily_lessons": 2,
+                "allow_consecutive": True,
+            })
+            s_id += 1
+
+    constraints = []
+    if unavailability_density > 0:
+        c_id = 1
+        for t in teachers:
+            for d in range(days):
+                for h in range(slots_per_day):
+                    if rng.random() < unavailability_density:
+                        constraints.append({
+                            "id": c_id,
+                            "type": "TEACHER_UNAVAILABILITY",
+                            "data": {"teacher_id": t["id"], "day_of_week": d, "period": h},
+                            "weight": 100,
+                        })
+                        c_id += 1
+
+    return {
+        "teachers": teachers,
+        "class_groups": class_groups,
+        "subjects": subjects,
+        "constraints": constraints,
+        "availabilities": [],
+        "time_grid": {
+            "days": days,
+            "slots_per_day": slots_per_day,
+            "shifts": shift_windows(shifts, slots_per_day),
+        },
+    }